@@ -0,0 +1,259 @@
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select, func, case, event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from loguru import logger
+from DATABASE.base import get_session
+from DATABASE.users import User
+from DATABASE.catalog import CatalogPost, CatalogReview
+from DATABASE.games import RatingPost, RatingVote
+from DATABASE.analytics import Statistics
+
+# Типы дневных агрегатов (value - приращение за день)
+STAT_NEW_USERS = 'new_users'
+STAT_ACTIVE_CARDS = 'active_cards'
+STAT_RATING_POSTS = 'rating_posts'
+STAT_REVIEWS = 'reviews'
+STAT_VOTES = 'votes'
+ROLLUP_TYPES = (STAT_NEW_USERS, STAT_ACTIVE_CARDS, STAT_RATING_POSTS, STAT_REVIEWS, STAT_VOTES)
+
+# Строк в одном INSERT ... ON CONFLICT
+UPSERT_CHUNK_SIZE = 500
+
+
+def utc_today() -> date:
+    """Текущий день статистики: границы дней везде по UTC, как created_at в БД"""
+    return datetime.now(timezone.utc).date()
+
+
+class DailyRollups:
+    """
+    Дневные агрегаты в statistics: одна строка на (stat_date, stat_type)
+    с приращением за день. События ORM (новый пользователь, отзыв,
+    публикация карточки) и голоса только копят приращения в памяти,
+    запись - пакетным upsert value = value + приращение по расписанию.
+    Итоги - сумма приращений по дням, за день - строка этой даты.
+    """
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[date, str], int] = {}
+        self._lock = asyncio.Lock()
+        self.backfilled = False
+
+        self.last_flush_ms = 0.0
+
+    def incr(self, stat_type: str, amount: int = 1, day: Optional[date] = None):
+        if not amount:
+            return
+        key = (day or utc_today(), stat_type)
+        self._deltas[key] = self._deltas.get(key, 0) + amount
+
+    @property
+    def depth(self) -> int:
+        return len(self._deltas)
+
+    @staticmethod
+    def _insert(session: AsyncSession):
+        dialect = session.bind.dialect.name
+        return postgresql.insert(Statistics) if dialect == 'postgresql' else sqlite.insert(Statistics)
+
+    async def _upsert(self, session: AsyncSession, values: Dict[Tuple[date, str], int], accumulate: bool):
+        rows = [
+            {'stat_date': day, 'stat_type': stat_type, 'value': value}
+            for (day, stat_type), value in values.items()
+        ]
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            statement = self._insert(session).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            value = statement.excluded.value
+            if accumulate:
+                value = func.coalesce(Statistics.value, 0) + value
+            statement = statement.on_conflict_do_update(
+                index_elements=['stat_date', 'stat_type'],
+                set_={'value': value, 'updated_at': func.now()}
+            )
+            await session.execute(statement)
+
+    async def flush(self) -> int:
+        """Записать накопленные приращения одним upsert"""
+        async with self._lock:
+            if not self._deltas:
+                return 0
+
+            pending, self._deltas = self._deltas, {}
+            started = time.perf_counter()
+
+            try:
+                async for session in get_session():
+                    await self._upsert(session, pending, accumulate=True)
+                    await session.commit()
+            except Exception as e:
+                for key, amount in pending.items():
+                    self._deltas[key] = self._deltas.get(key, 0) + amount
+                logger.error(f"Ошибка записи дневной статистики, приращения возвращены в буфер: {e}")
+                return 0
+
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            logger.debug(f"Дневная статистика записана: {len(pending)} строк за {self.last_flush_ms:.1f} мс")
+            return len(pending)
+
+    async def ensure_backfilled(self, session: AsyncSession):
+        """Первичное заполнение агрегатов из таблиц (однократно, при пустой статистике)"""
+        if self.backfilled:
+            return
+        async with self._lock:
+            if self.backfilled:
+                return
+            exists = await session.scalar(
+                select(Statistics.id).where(Statistics.stat_type.in_(ROLLUP_TYPES)).limit(1)
+            )
+            if exists is None:
+                await self._backfill(session)
+            self.backfilled = True
+
+    async def _backfill(self, session: AsyncSession):
+        # Разовый полный проход с группировкой по дням - дальше только события
+        sources = (
+            (STAT_NEW_USERS, User, None),
+            (STAT_ACTIVE_CARDS, CatalogPost, CatalogPost.is_active == True),
+            (STAT_RATING_POSTS, RatingPost, RatingPost.status == 'approved'),
+            (STAT_REVIEWS, CatalogReview, None),
+            (STAT_VOTES, RatingVote, None),
+        )
+        values: Dict[Tuple[date, str], int] = {}
+        postgres = session.bind.dialect.name == 'postgresql'
+        for stat_type, model, condition in sources:
+            # date() от timestamptz в PostgreSQL берет часовой пояс сессии
+            created_at = func.timezone('UTC', model.created_at) if postgres else model.created_at
+            day = func.date(created_at)
+            query = select(day, func.count()).group_by(day)
+            if condition is not None:
+                query = query.where(condition)
+            for stat_day, count in (await session.execute(query)).all():
+                if stat_day is None:
+                    continue
+                if not isinstance(stat_day, date):
+                    stat_day = date.fromisoformat(str(stat_day))
+                values[(stat_day, stat_type)] = count
+
+        if values:
+            await self._upsert(session, values, accumulate=False)
+        await session.commit()
+        logger.info(f"Дневная статистика заполнена из таблиц: {len(values)} строк")
+
+    async def read(self, session: AsyncSession, day: date) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """Итоги на конец дня и приращения за день - одним запросом"""
+        await self.ensure_backfilled(session)
+        await self.flush()
+
+        result = await session.execute(
+            select(
+                Statistics.stat_type,
+                func.sum(Statistics.value),
+                func.sum(case((Statistics.stat_date == day, Statistics.value), else_=0))
+            )
+            .where(Statistics.stat_type.in_(ROLLUP_TYPES), Statistics.stat_date <= day)
+            .group_by(Statistics.stat_type)
+        )
+        totals = dict.fromkeys(ROLLUP_TYPES, 0)
+        for_day = dict.fromkeys(ROLLUP_TYPES, 0)
+        for stat_type, total, value in result.all():
+            totals[stat_type] = int(total or 0)
+            for_day[stat_type] = int(value or 0)
+        return totals, for_day
+
+    def get_metrics(self) -> dict:
+        return {
+            'pending_rows': self.depth,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+        }
+
+
+daily_rollups = DailyRollups()
+
+
+_ROLLUP_KEY = 'daily_rollup_deltas'
+
+
+def _defer(target, stat_type: str, amount: int):
+    # Учитываем только зафиксированные изменения
+    session = inspect(target).session
+    if session is None or not amount:
+        return
+    deltas = session.info.setdefault(_ROLLUP_KEY, {})
+    deltas[stat_type] = deltas.get(stat_type, 0) + amount
+
+
+def _transition(target, attribute: str, is_counted) -> int:
+    """+1/-1 при входе в учитываемое состояние и выходе из него"""
+    history = inspect(target).attrs[attribute].history
+    if not history.has_changes():
+        return 0
+    was = bool(history.deleted) and is_counted(history.deleted[0])
+    return int(is_counted(getattr(target, attribute))) - int(was)
+
+
+def _card_active(value) -> bool:
+    return bool(value)
+
+
+def _rating_approved(value) -> bool:
+    return value == 'approved'
+
+
+@event.listens_for(User, 'after_insert')
+def _on_user_inserted(mapper, connection, target: User):
+    _defer(target, STAT_NEW_USERS, 1)
+
+
+@event.listens_for(CatalogReview, 'after_insert')
+def _on_review_inserted(mapper, connection, target: CatalogReview):
+    _defer(target, STAT_REVIEWS, 1)
+
+
+@event.listens_for(CatalogPost, 'after_insert')
+def _on_catalog_post_inserted(mapper, connection, target: CatalogPost):
+    if target.is_active is not False:
+        _defer(target, STAT_ACTIVE_CARDS, 1)
+
+
+@event.listens_for(CatalogPost, 'after_update')
+def _on_catalog_post_updated(mapper, connection, target: CatalogPost):
+    _defer(target, STAT_ACTIVE_CARDS, _transition(target, 'is_active', _card_active))
+
+
+@event.listens_for(CatalogPost, 'after_delete')
+def _on_catalog_post_deleted(mapper, connection, target: CatalogPost):
+    if target.is_active:
+        _defer(target, STAT_ACTIVE_CARDS, -1)
+
+
+@event.listens_for(RatingPost, 'after_insert')
+def _on_rating_post_inserted(mapper, connection, target: RatingPost):
+    if _rating_approved(target.status):
+        _defer(target, STAT_RATING_POSTS, 1)
+
+
+@event.listens_for(RatingPost, 'after_update')
+def _on_rating_post_updated(mapper, connection, target: RatingPost):
+    _defer(target, STAT_RATING_POSTS, _transition(target, 'status', _rating_approved))
+
+
+@event.listens_for(RatingPost, 'after_delete')
+def _on_rating_post_deleted(mapper, connection, target: RatingPost):
+    if _rating_approved(target.status):
+        _defer(target, STAT_RATING_POSTS, -1)
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session):
+    for stat_type, amount in session.info.pop(_ROLLUP_KEY, {}).items():
+        daily_rollups.incr(stat_type, amount)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _on_rollback(session, previous_transaction):
+    session.info.pop(_ROLLUP_KEY, None)
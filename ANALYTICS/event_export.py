@@ -0,0 +1,153 @@
+import asyncio
+import csv
+import gzip
+import os
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import List, Optional, Sequence
+from sqlalchemy import select
+from loguru import logger
+from DATABASE.base import get_session
+from DATABASE.analytics import EventLog
+from CORE.config import settings
+from ANALYTICS.event_log import EVENT_COLUMNS, event_recorder
+
+# Строк на одну порцию чтения и записи
+EXPORT_CHUNK_SIZE = 10_000
+
+
+class _ParquetWriter:
+    extension = 'parquet'
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.schema = pa.schema([
+            ('created_at', pa.timestamp('us', tz='UTC')),
+            ('event_type', pa.string()),
+            ('user_id', pa.int64()),
+            ('object_id', pa.int64()),
+            ('value', pa.int64()),
+            ('action', pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, rows: Sequence[tuple]):
+        columns = list(zip(*rows))
+        arrays = [self._pa.array(column, type=field.type) for column, field in zip(columns, self.schema)]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self._writer.close()
+
+
+class _CsvGzWriter:
+    extension = 'csv.gz'
+
+    def __init__(self, path: str):
+        self._file = gzip.open(path, 'wt', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EVENT_COLUMNS)
+
+    def write(self, rows: Sequence[tuple]):
+        self._writer.writerows((row[0].isoformat(), *row[1:]) for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+def _writer_class(export_format: str):
+    if export_format == 'csv':
+        return _CsvGzWriter
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        if export_format == 'parquet':
+            raise
+        return _CsvGzWriter
+    return _ParquetWriter
+
+
+class EventExporter:
+    """
+    Выгрузка журнала событий по дням (UTC) в каталог с разбиением
+    date=YYYY-MM-DD: Parquet (zstd), если установлен pyarrow, иначе CSV.gz.
+    Файл дня пишется через временный и больше не перезаписывается,
+    поэтому повторный запуск выгружает только пропущенные дни.
+    """
+
+    def __init__(self, directory: str, export_format: str = 'auto'):
+        self.directory = directory
+        self.export_format = export_format
+
+        self.exported_rows_total = 0
+
+    def _day_dir(self, day: date) -> str:
+        return os.path.join(self.directory, f"date={day.isoformat()}")
+
+    def is_exported(self, day: date) -> bool:
+        day_dir = self._day_dir(day)
+        return any(
+            os.path.exists(os.path.join(day_dir, f"events.{writer.extension}"))
+            for writer in (_ParquetWriter, _CsvGzWriter)
+        )
+
+    async def export_day(self, day: date) -> Optional[str]:
+        """Выгрузить события одного дня, вернуть путь к файлу (None - уже выгружен)"""
+        if self.is_exported(day):
+            return None
+
+        writer_class = _writer_class(self.export_format)
+        day_dir = self._day_dir(day)
+        os.makedirs(day_dir, exist_ok=True)
+        path = os.path.join(day_dir, f"events.{writer_class.extension}")
+        tmp_path = path + '.tmp'
+
+        start = datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+        query = (
+            select(*(getattr(EventLog, column) for column in EVENT_COLUMNS))
+            .where(EventLog.created_at >= start, EventLog.created_at < start + timedelta(days=1))
+            .order_by(EventLog.id)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+
+        rows_written = 0
+        writer = await asyncio.to_thread(writer_class, tmp_path)
+        try:
+            async for session in get_session():
+                result = await session.stream(query)
+                async for chunk in result.partitions(EXPORT_CHUNK_SIZE):
+                    # Запись файла - в потоке, чтобы не блокировать обработку обновлений
+                    await asyncio.to_thread(writer.write, [tuple(row) for row in chunk])
+                    rows_written += len(chunk)
+            await asyncio.to_thread(writer.close)
+        except BaseException:
+            await asyncio.to_thread(writer.close)
+            os.remove(tmp_path)
+            raise
+
+        os.replace(tmp_path, path)
+        self.exported_rows_total += rows_written
+        logger.info(f"📦 Журнал событий за {day}: {rows_written} событий -> {path}")
+        return path
+
+    async def export_pending(self, days: int = 7) -> List[str]:
+        """Выгрузить завершившиеся дни за последние days, которых еще нет на диске"""
+        await event_recorder.flush()
+
+        today = datetime.now(timezone.utc).date()
+        paths = []
+        for offset in range(days, 0, -1):
+            day = today - timedelta(days=offset)
+            try:
+                path = await self.export_day(day)
+            except Exception as e:
+                logger.error(f"Ошибка выгрузки журнала событий за {day}: {e}")
+                continue
+            if path:
+                paths.append(path)
+        return paths
+
+
+event_exporter = EventExporter(settings.EVENT_EXPORT_DIR, settings.EVENT_EXPORT_FORMAT)
@@ -0,0 +1,130 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import insert, event, inspect
+from sqlalchemy.orm import Session
+from loguru import logger
+from DATABASE.base import get_session
+from DATABASE.users import User
+from DATABASE.catalog import CatalogReview
+from DATABASE.analytics import EventLog
+
+EVENT_REGISTRATION = 'registration'
+EVENT_CATALOG_VIEW = 'catalog_view'
+EVENT_CLICK = 'click'
+EVENT_VOTE = 'vote'
+EVENT_REVIEW = 'review'
+EVENT_COMMAND = 'command'
+EVENT_TYPES = (EVENT_REGISTRATION, EVENT_CATALOG_VIEW, EVENT_CLICK, EVENT_VOTE, EVENT_REVIEW, EVENT_COMMAND)
+
+# Строк в одном пакетном INSERT
+INSERT_CHUNK_SIZE = 1000
+
+# (created_at, event_type, user_id, object_id, value, action)
+Event = Tuple[datetime, str, Optional[int], Optional[int], Optional[int], Optional[str]]
+EVENT_COLUMNS = ('created_at', 'event_type', 'user_id', 'object_id', 'value', 'action')
+
+
+class EventRecorder:
+    """
+    Журнал событий с отложенной записью.
+    Горячий путь только добавляет кортеж в буфер, в event_log события
+    пишутся пакетным INSERT по расписанию. При недоступной БД буфер
+    ограничен max_pending - старые события отбрасываются.
+    """
+
+    def __init__(self, max_pending: int = 200_000):
+        self.max_pending = max_pending
+        self._pending: List[Event] = []
+        self._lock = asyncio.Lock()
+
+        self.recorded_total = 0
+        self.dropped_total = 0
+        self.last_flush_ms = 0.0
+
+    def record(
+        self,
+        event_type: str,
+        user_id: Optional[int] = None,
+        object_id: Optional[int] = None,
+        value: Optional[int] = None,
+        action: Optional[str] = None
+    ):
+        self._pending.append((datetime.now(timezone.utc), event_type, user_id, object_id, value, action))
+        self.recorded_total += 1
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Записать накопленные события пакетными INSERT"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = self._pending, []
+            started = time.perf_counter()
+            rows = [dict(zip(EVENT_COLUMNS, item)) for item in pending]
+
+            try:
+                async for session in get_session():
+                    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                        await session.execute(insert(EventLog), rows[start:start + INSERT_CHUNK_SIZE])
+                    await session.commit()
+            except Exception as e:
+                self._pending[:0] = pending
+                overflow = len(self._pending) - self.max_pending
+                if overflow > 0:
+                    del self._pending[:overflow]
+                    self.dropped_total += overflow
+                logger.error(f"Ошибка записи журнала событий, события возвращены в буфер: {e}")
+                return 0
+
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            logger.debug(f"Журнал событий: {len(rows)} событий записано за {self.last_flush_ms:.1f} мс")
+            return len(rows)
+
+    def get_metrics(self) -> dict:
+        return {
+            'pending_events': self.depth,
+            'recorded_total': self.recorded_total,
+            'dropped_total': self.dropped_total,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+        }
+
+
+event_recorder = EventRecorder()
+
+
+_EVENTS_KEY = 'event_log_pending'
+
+
+def _defer(target, event_type: str, user_id: Optional[int], object_id: Optional[int] = None,
+           value: Optional[int] = None):
+    # В журнал попадают только зафиксированные вставки
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault(_EVENTS_KEY, []).append((event_type, user_id, object_id, value))
+
+
+@event.listens_for(User, 'after_insert')
+def _on_user_inserted(mapper, connection, target: User):
+    _defer(target, EVENT_REGISTRATION, target.id)
+
+
+@event.listens_for(CatalogReview, 'after_insert')
+def _on_review_inserted(mapper, connection, target: CatalogReview):
+    _defer(target, EVENT_REVIEW, target.user_id, target.catalog_post_id, target.rating)
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session):
+    for event_type, user_id, object_id, value in session.info.pop(_EVENTS_KEY, ()):
+        event_recorder.record(event_type, user_id, object_id, value)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _on_rollback(session, previous_transaction):
+    session.info.pop(_EVENTS_KEY, None)
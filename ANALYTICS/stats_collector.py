@@ -1,76 +1,74 @@
-from datetime import datetime, date
-from sqlalchemy import select, func
+from datetime import date
+from typing import Optional
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func
 from loguru import logger
-from DATABASE.users import User
-from DATABASE.catalog import CatalogPost
-from DATABASE.games import RatingPost
 from DATABASE.analytics import Statistics
+from ANALYTICS.daily_rollups import (
+    daily_rollups, utc_today, STAT_NEW_USERS, STAT_ACTIVE_CARDS, STAT_RATING_POSTS, STAT_REVIEWS, STAT_VOTES
+)
 
 class StatsCollector:
-    """Сборщик статистики"""
-    
+    """Сборщик статистики (чтение дневных агрегатов)"""
+
     @staticmethod
-    async def collect_daily_stats(session: AsyncSession) -> dict:
-        """Собрать дневную статистику"""
-        today = date.today()
-        
-        # Общее количество пользователей
-        result = await session.execute(select(func.count(User.id)))
-        total_users = result.scalar_one()
-        
-        # Новые пользователи за сегодня
-        result = await session.execute(
-            select(func.count(User.id))
-            .where(func.date(User.created_at) == today)
-        )
-        new_users_today = result.scalar_one()
-        
-        # Активных карточек
-        result = await session.execute(
-            select(func.count(CatalogPost.id))
-            .where(CatalogPost.is_active == True)
-        )
-        active_cards = result.scalar_one()
-        
-        # Рейтинговых постов
-        result = await session.execute(
-            select(func.count(RatingPost.id))
-            .where(RatingPost.status == 'approved')
-        )
-        rating_posts = result.scalar_one()
-        
-        stats = {
-            'date': today,
-            'total_users': total_users,
-            'new_users_today': new_users_today,
-            'active_cards': active_cards,
-            'rating_posts': rating_posts
+    async def collect_daily_stats(session: AsyncSession, day: Optional[date] = None) -> dict:
+        """Собрать статистику на конец дня из агрегатов одним запросом"""
+        day = day or utc_today()
+        totals, for_day = await daily_rollups.read(session, day)
+
+        return {
+            'date': day,
+            'total_users': totals[STAT_NEW_USERS],
+            'new_users_today': for_day[STAT_NEW_USERS],
+            'active_cards': totals[STAT_ACTIVE_CARDS],
+            'rating_posts': totals[STAT_RATING_POSTS],
+            'new_rating_posts_today': for_day[STAT_RATING_POSTS],
+            'reviews': totals[STAT_REVIEWS],
+            'reviews_today': for_day[STAT_REVIEWS],
+            'votes_today': for_day[STAT_VOTES],
         }
-        
-        # Сохраняем в БД
-        stat_record = Statistics(
-            stat_date=today,
+
+    @staticmethod
+    async def save_daily_summary(session: AsyncSession, stats: dict):
+        """Сохранить сводку за день (повторный вызов перезаписывает ее)"""
+        dialect = session.bind.dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        summary = {**stats, 'date': stats['date'].isoformat()}
+
+        statement = insert(Statistics).values(
+            stat_date=stats['date'],
             stat_type='daily_summary',
-            value_json=stats
+            value_json=summary
         )
-        session.add(stat_record)
+        statement = statement.on_conflict_do_update(
+            index_elements=['stat_date', 'stat_type'],
+            set_={'value_json': statement.excluded.value_json, 'updated_at': func.now()}
+        )
+        await session.execute(statement)
         await session.commit()
-        
-        logger.info(f"Собрана статистика за {today}")
-        return stats
-    
+
+        logger.info(f"Сохранена статистика за {stats['date']}")
+
     @staticmethod
-    async def get_stats_text(session: AsyncSession) -> str:
-        """Получить текст статистики"""
-        stats = await StatsCollector.collect_daily_stats(session)
-        
-        text = (
+    def format_stats(stats: dict) -> str:
+        """Текст статистики"""
+        return (
             f"📊 <b>Статистика на {stats['date']}</b>\n\n"
             f"👥 Всего пользователей: {stats['total_users']}\n"
-            f"🆕 Новых за сегодня: {stats['new_users_today']}\n"
             f"📋 Активных карточек: {stats['active_cards']}\n"
             f"⭐ Рейтинговых постов: {stats['rating_posts']}\n"
+            f"💬 Отзывов: {stats['reviews']}\n\n"
+            f"📈 За день:\n"
+            f"• Новых пользователей: {stats['new_users_today']}\n"
+            f"• Одобрено рейтинговых постов: {stats['new_rating_posts_today']}\n"
+            f"• Отзывов: {stats['reviews_today']}\n"
+            f"• Голосов: {stats['votes_today']}\n"
         )
-        
-        return text
+
+    @staticmethod
+    async def get_stats_text(session: AsyncSession, day: Optional[date] = None) -> str:
+        """Получить текст статистики"""
+        stats = await StatsCollector.collect_daily_stats(session, day)
+        return StatsCollector.format_stats(stats)
@@ -1,8 +1,10 @@
 """
 Core модуль - ядро бота
+
+Бот и диспетчер импортируются из своих модулей (CORE.bot, CORE.dispatcher):
+пакет не тянет их при импорте настроек - сервисы, миграции и стенды
+обходятся без обработчиков.
 """
 from .config import settings
-from .bot import bot
-from .dispatcher import setup_dispatcher
 
-__all__ = ['settings', 'bot', 'setup_dispatcher']
+__all__ = ['settings']
@@ -7,6 +7,7 @@ from aiogram.enums import ParseMode
 from loguru import logger
 
 from .config import settings
+from SERVICES.utils.metrics import ApiTimingMiddleware
 
 
 # Инициализация бота
@@ -18,4 +19,7 @@ bot = Bot(
     )
 )
 
+# Время вызовов Telegram API по обновлениям
+bot.session.middleware(ApiTimingMiddleware())
+
 logger.info("✅ Бот инициализирован")
@@ -4,7 +4,7 @@
 import os
 from typing import List
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
+from pydantic import AliasChoices, Field
 
 
 class Settings(BaseSettings):
@@ -22,6 +22,7 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = Field(..., description="PostgreSQL Database URL")
     REDIS_URL: str = Field("redis://localhost:6379", description="Redis URL")
+    STATE_BACKEND: str = Field("memory", description="Shared state backend: memory/redis/local")
     
     # Channels
     MARKET_ID: int = Field(-1003033694255, description="Барахолка⚡️Будапешт")
@@ -43,6 +44,20 @@ class Settings(BaseSettings):
     # Environment
     ENVIRONMENT: str = Field("production", description="Environment: development/production")
     DEBUG: bool = Field(False, description="Debug mode")
+    AUTO_MIGRATE: bool = Field(False, description="Apply pending migrations on startup (alembic upgrade head)")
+    
+    # Runtime mode
+    RUN_MODE: str = Field("polling", description="Update delivery: polling/webhook")
+    WEBHOOK_URL: str = Field("", description="Public base URL for webhook, e.g. https://bot.example.com")
+    WEBHOOK_PATH: str = Field("/webhook", description="Webhook endpoint path")
+    WEBHOOK_SECRET: str = Field("", description="Secret token checked in X-Telegram-Bot-Api-Secret-Token (required for webhook mode)")
+    WEBAPP_HOST: str = Field("0.0.0.0", description="Webhook server host")
+    WEBAPP_PORT: int = Field(8080, validation_alias=AliasChoices("WEBAPP_PORT", "PORT"), description="Webhook server port")
+    WEBHOOK_MAX_CONCURRENCY: int = Field(32, description="Max updates processed concurrently")
+    WEBHOOK_MAX_PENDING: int = Field(1000, description="Max accepted updates waiting for processing")
+    METRICS_PORT: int = Field(0, description="Port for /metrics in polling mode (0 - disabled)")
+    SLOW_UPDATE_MS: int = Field(0, description="Log updates slower than this many ms (0 - disabled)")
+    OUTBOUND_SPOOL_PATH: str = Field("logs/outbound_spool.jsonl", description="Spool file for unsent outbound messages")
     
     # Reserved UIDs (cannot be auto-assigned)
     RESERVED_UIDS: List[int] = Field(
@@ -68,12 +83,23 @@ class Settings(BaseSettings):
     MAX_CATALOG_NUMBER: int = Field(9999, description="Maximum catalog number")
     CATALOG_SLOTS: int = Field(5, description="Number of catalog slots per page")
     MAX_PRIORITY_POSTS: int = Field(10, description="Maximum priority posts")
+    COUNTER_FLUSH_INTERVAL: int = Field(10, description="Views/clicks flush interval in seconds")
+    ACTIVITY_FLUSH_INTERVAL: int = Field(5, description="User activity flush interval in seconds")
+    SEEN_FLUSH_INTERVAL: int = Field(30, description="Seen catalog posts flush interval in seconds")
     
     # Rating Settings
     MIN_VOTE: int = Field(-2, description="Minimum vote value")
     MAX_VOTE: int = Field(2, description="Maximum vote value")
     MAX_ABOUT_WORDS: int = Field(3, description="Maximum words in 'about'")
     MAX_WORD_LENGTH: int = Field(7, description="Maximum length per word")
+    VOTE_FLUSH_INTERVAL: int = Field(2, description="Rating score flush interval in seconds")
+    VOTE_RETENTION_MONTHS: int = Field(0, description="Detach rating_votes partitions older than N months (0 - keep all)")
+    
+    # Analytics
+    STATS_FLUSH_INTERVAL: int = Field(60, description="Daily statistics rollups flush interval in seconds")
+    EVENT_FLUSH_INTERVAL: int = Field(5, description="Event log flush interval in seconds")
+    EVENT_EXPORT_DIR: str = Field("RESULTS/events", description="Directory for daily event log exports")
+    EVENT_EXPORT_FORMAT: str = Field("auto", description="Event export format: auto/parquet/csv")
     
     def get_admin_ids(self) -> List[int]:
         """Получить список ID администраторов"""
@@ -4,6 +4,15 @@
 from aiogram import Dispatcher
 from loguru import logger
 
+from .storage import create_fsm_storage
+from handlers.special.middleware import (
+    LoggingMiddleware,
+    ThrottlingMiddleware,
+    UserTrackingMiddleware,
+    MetricsMiddleware,
+    EventLogMiddleware
+)
+
 # Импорты обработчиков
 from handlers.commands import (
     start_handler,
@@ -14,29 +23,27 @@ from handlers.commands import (
 )
 from handlers.callbacks import (
     catalog_callbacks,
-    rating_callbacks,
-    admin_callbacks
-)
-from handlers.messages import (
-    catalog_messages,
-    rating_messages
-)
-from middleware import (
-    logging_middleware,
-    throttling_middleware,
-    user_middleware
+    rating_callbacks
 )
 
 
 def setup_dispatcher() -> Dispatcher:
     """Создание и настройка диспетчера"""
-    dp = Dispatcher()
+    dp = Dispatcher(storage=create_fsm_storage())
     
-    # Регистрация middleware
-    dp.message.middleware(logging_middleware.LoggingMiddleware())
-    dp.message.middleware(throttling_middleware.ThrottlingMiddleware())
-    dp.message.middleware(user_middleware.UserTrackingMiddleware())
-    dp.callback_query.middleware(logging_middleware.LoggingMiddleware())
+    # Метрики по каждому обновлению (внешний слой - учитывает все middleware)
+    dp.update.outer_middleware(MetricsMiddleware())
+    
+    # Команды и нажатия кнопок в журнал событий
+    dp.update.outer_middleware(EventLogMiddleware())
+    
+    # Регистрация middleware (один ограничитель на сообщения и кнопки)
+    throttling = ThrottlingMiddleware()
+    dp.message.middleware(LoggingMiddleware())
+    dp.message.middleware(throttling)
+    dp.message.middleware(UserTrackingMiddleware())
+    dp.callback_query.middleware(LoggingMiddleware())
+    dp.callback_query.middleware(throttling)
     
     # Регистрация обработчиков команд
     dp.include_router(start_handler.router)
@@ -48,11 +55,6 @@ def setup_dispatcher() -> Dispatcher:
     # Регистрация обработчиков callback
     dp.include_router(catalog_callbacks.router)
     dp.include_router(rating_callbacks.router)
-    dp.include_router(admin_callbacks.router)
-    
-    # Регистрация обработчиков сообщений
-    dp.include_router(catalog_messages.router)
-    dp.include_router(rating_messages.router)
     
     logger.info("✅ Диспетчер настроен с обработчиками")
     return dp
@@ -0,0 +1,192 @@
+"""
+Бэкенд общего состояния: FSM, троттлинг, кулдауны
+
+STATE_BACKEND:
+- memory - всё в памяти процесса (один воркер)
+- redis  - Redis по REDIS_URL (несколько воркеров)
+- local  - локальная замена Redis в памяти (тесты, отладка кода для Redis)
+"""
+import fnmatch
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
+from loguru import logger
+
+from .config import settings
+from SERVICES.utils.rate_limiter import TOKEN_BUCKET_SCRIPT, SharedTokenBucketLimiter, TokenBucket, TokenBucketLimiter
+
+
+class LocalRedis:
+    """Минимальная замена redis.asyncio.Redis в памяти процесса (в духе fakeredis)"""
+
+    def __init__(self):
+        # ключ -> (значение, момент истечения по monotonic или None)
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    @staticmethod
+    def _encode(value: Union[str, bytes, int, float]) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode('utf-8')
+
+    def _alive(self, name: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        item = self._data.get(name)
+        if item is None:
+            return None
+        if item[1] is not None and item[1] <= time.monotonic():
+            del self._data[name]
+            return None
+        return item
+
+    async def get(self, name: str) -> Optional[bytes]:
+        item = self._alive(name)
+        return item[0] if item else None
+
+    async def set(
+        self,
+        name: str,
+        value: Any,
+        ex: Optional[int] = None,
+        px: Optional[int] = None,
+        nx: bool = False,
+        xx: bool = False
+    ) -> Optional[bool]:
+        exists = self._alive(name) is not None
+        if (nx and exists) or (xx and not exists):
+            return None
+        expires = None
+        if ex is not None:
+            expires = time.monotonic() + ex
+        elif px is not None:
+            expires = time.monotonic() + px / 1000
+        self._data[name] = (self._encode(value), expires)
+        return True
+
+    async def delete(self, *names: str) -> int:
+        removed = 0
+        for name in names:
+            if self._alive(name) is not None:
+                del self._data[name]
+                removed += 1
+        return removed
+
+    async def exists(self, *names: str) -> int:
+        return sum(1 for name in names if self._alive(name) is not None)
+
+    async def incrby(self, name: str, amount: int = 1) -> int:
+        item = self._alive(name)
+        value = int(item[0]) + amount if item else amount
+        self._data[name] = (self._encode(value), item[1] if item else None)
+        return value
+
+    async def incr(self, name: str, amount: int = 1) -> int:
+        return await self.incrby(name, amount)
+
+    async def expire(self, name: str, seconds: int) -> bool:
+        item = self._alive(name)
+        if item is None:
+            return False
+        self._data[name] = (item[0], time.monotonic() + seconds)
+        return True
+
+    async def pttl(self, name: str) -> int:
+        item = self._alive(name)
+        if item is None:
+            return -2
+        if item[1] is None:
+            return -1
+        return int((item[1] - time.monotonic()) * 1000)
+
+    async def ttl(self, name: str) -> int:
+        value = await self.pttl(name)
+        return value if value < 0 else value // 1000
+
+    async def keys(self, pattern: str = '*') -> list:
+        return [name.encode('utf-8') for name in list(self._data)
+                if self._alive(name) is not None and fnmatch.fnmatchcase(name, pattern)]
+
+    async def flushall(self) -> bool:
+        self._data.clear()
+        return True
+
+    async def ping(self) -> bool:
+        return True
+
+    def register_script(self, script: str) -> Callable:
+        """Lua не исполняется: скрипт заменяется Python-эквивалентом из LOCAL_SCRIPTS"""
+        handler = LOCAL_SCRIPTS[script]
+
+        async def run(keys: List[str], args: List[Any]):
+            # Без await внутри - атомарно, как скрипт в Redis
+            return handler(self, keys, args)
+
+        return run
+
+    async def aclose(self, close_connection_pool: Optional[bool] = None):
+        self._data.clear()
+
+
+def _local_token_bucket(client: LocalRedis, keys: List[str], args: List[Any]) -> int:
+    """Эквивалент TOKEN_BUCKET_SCRIPT: состояние ведра - 'tokens updated' в значении ключа"""
+    rate, burst, ttl_ms = float(args[0]), float(args[1]), int(args[2])
+    now = time.monotonic()
+    bucket = TokenBucket(rate, burst, now)
+    item = client._alive(keys[0])
+    if item is not None:
+        tokens, updated = item[0].split()
+        bucket.tokens, bucket.updated = float(tokens), float(updated)
+    wait = bucket.consume(now)
+    client._data[keys[0]] = (f"{bucket.tokens} {bucket.updated}".encode('utf-8'), now + ttl_ms / 1000)
+    return math.ceil(wait * 1000)
+
+
+# Скрипты, которые понимает LocalRedis
+LOCAL_SCRIPTS: Dict[str, Callable] = {
+    TOKEN_BUCKET_SCRIPT: _local_token_bucket,
+}
+
+
+_client = None
+
+
+def get_state_client():
+    """Клиент общего состояния (redis.asyncio.Redis или LocalRedis)"""
+    global _client
+    if _client is None:
+        if settings.STATE_BACKEND == 'redis':
+            from redis.asyncio import Redis
+            _client = Redis.from_url(settings.REDIS_URL)
+            logger.info("✅ Общее состояние: Redis")
+        else:
+            _client = LocalRedis()
+            logger.info(f"✅ Общее состояние: память процесса ({settings.STATE_BACKEND})")
+    return _client
+
+
+def create_fsm_storage() -> BaseStorage:
+    """Хранилище FSM по STATE_BACKEND"""
+    if settings.STATE_BACKEND == 'memory':
+        return MemoryStorage()
+    return RedisStorage(
+        redis=get_state_client(),
+        key_builder=DefaultKeyBuilder(prefix='trixbot:fsm')
+    )
+
+
+def create_rate_limiter():
+    """Ограничитель частоты по STATE_BACKEND: ведра в памяти или в общем бэкенде"""
+    if settings.STATE_BACKEND == 'memory':
+        return TokenBucketLimiter()
+    return SharedTokenBucketLimiter(get_state_client())
+
+
+async def close_state_backend():
+    """Закрыть соединение с бэкендом состояния"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
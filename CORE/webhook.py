@@ -0,0 +1,178 @@
+"""
+Режим webhook: aiohttp-сервер вместо long polling
+
+- POST WEBHOOK_PATH - обновления от Telegram (обязательная проверка X-Telegram-Bot-Api-Secret-Token)
+- GET  /healthz     - состояние очереди и задержки обработки
+- GET  /metrics     - метрики обновлений в формате Prometheus
+"""
+import asyncio
+import hmac
+import time
+from collections import deque
+from typing import Deque, Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from loguru import logger
+
+from .config import settings
+from SERVICES.utils.metrics import handle_metrics
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+# Сколько последних задержек держать для перцентилей
+LATENCY_WINDOW = 2048
+
+
+class UpdateGate:
+    """
+    Передача обновлений в диспетчер с ограничением параллельности.
+    Не более max_concurrency обработчиков одновременно; когда в очереди
+    накопилось max_pending обновлений, сервер отвечает 503 и Telegram
+    повторит доставку позже (обратное давление вместо роста памяти).
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_concurrency: int, max_pending: int):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self.in_flight = 0
+
+        self.accepted_total = 0
+        self.rejected_total = 0
+        self.failed_total = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def submit(self, update: Update, received: float) -> bool:
+        """Поставить обновление в обработку; False - очередь заполнена"""
+        if self.pending >= self.max_pending:
+            self.rejected_total += 1
+            return False
+        self.accepted_total += 1
+        task = asyncio.create_task(self._process(update, received))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _process(self, update: Update, received: float):
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception as e:
+                self.failed_total += 1
+                logger.exception(f"Ошибка обработки обновления {update.update_id}: {e}")
+            finally:
+                self.in_flight -= 1
+                self._latencies.append((time.perf_counter() - received) * 1000)
+
+    async def drain(self, timeout: float = 10.0):
+        """Дождаться обработки принятых обновлений при остановке"""
+        if self._tasks:
+            logger.info(f"Ожидание обработки {self.pending} обновлений...")
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+    def get_metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 2)
+
+        return {
+            'pending': self.pending,
+            'in_flight': self.in_flight,
+            'accepted_total': self.accepted_total,
+            'rejected_total': self.rejected_total,
+            'failed_total': self.failed_total,
+            'latency_p50_ms': percentile(0.50),
+            'latency_p95_ms': percentile(0.95),
+            'latency_p99_ms': percentile(0.99),
+        }
+
+
+def create_webhook_app(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    secret: Optional[str] = None,
+    path: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    max_pending: Optional[int] = None
+) -> web.Application:
+    """aiohttp-приложение с приемом обновлений и /healthz (без секрета не создается)"""
+    secret = settings.WEBHOOK_SECRET if secret is None else secret
+    if not secret:
+        raise RuntimeError("WEBHOOK_SECRET не задан - webhook без проверки секрета не запускается")
+    # Заголовок сравнивается байтами: не-ASCII значение дает 401, а не TypeError (500)
+    expected = secret.encode('utf-8')
+    gate = UpdateGate(
+        dispatcher,
+        bot,
+        max_concurrency=max_concurrency or settings.WEBHOOK_MAX_CONCURRENCY,
+        max_pending=max_pending or settings.WEBHOOK_MAX_PENDING
+    )
+
+    async def handle_update(request: web.Request) -> web.Response:
+        received = time.perf_counter()
+        provided = request.headers.get(SECRET_HEADER, '').encode('utf-8', 'surrogateescape')
+        if not hmac.compare_digest(provided, expected):
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={'bot': bot})
+        except Exception as e:
+            logger.warning(f"Некорректное обновление webhook: {e}")
+            return web.Response(status=400)
+
+        if not gate.submit(update, received):
+            return web.Response(status=503, headers={'Retry-After': '1'})
+        return web.Response()
+
+    async def handle_health(request: web.Request) -> web.Response:
+        return web.json_response({'status': 'ok', **gate.get_metrics()})
+
+    async def on_shutdown(app: web.Application):
+        await gate.drain()
+
+    app = web.Application()
+    app['gate'] = gate
+    app.router.add_post(path or settings.WEBHOOK_PATH, handle_update)
+    app.router.add_get('/healthz', handle_health)
+    app.router.add_get('/metrics', handle_metrics)
+    app.on_shutdown.append(on_shutdown)
+    return app
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot):
+    """Запуск сервера и регистрация webhook в Telegram"""
+    if not settings.WEBHOOK_URL:
+        raise RuntimeError("WEBHOOK_URL не задан для RUN_MODE=webhook")
+    if not settings.WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_SECRET не задан для RUN_MODE=webhook")
+
+    app = create_webhook_app(dispatcher, bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBAPP_HOST, settings.WEBAPP_PORT)
+    await site.start()
+
+    await bot.set_webhook(
+        url=settings.WEBHOOK_URL.rstrip('/') + settings.WEBHOOK_PATH,
+        secret_token=settings.WEBHOOK_SECRET,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        max_connections=min(100, settings.WEBHOOK_MAX_CONCURRENCY)
+    )
+    logger.info(f"🌐 Webhook слушает {settings.WEBAPP_HOST}:{settings.WEBAPP_PORT}{settings.WEBHOOK_PATH}")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
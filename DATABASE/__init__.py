@@ -2,11 +2,10 @@
 Database модуль - модели и работа с БД
 """
 from .base import Base, init_db, get_session
-from .models.user import User
-from .models.catalog import CatalogPost, CatalogReview
-from .models.rating import RatingPost, RatingVote
-from .models.cooldown import Cooldown
-from .models.special_slot import SpecialSlot
+from .users import User
+from .catalog import CatalogPost, CatalogReview
+from .games import RatingPost, RatingVote, Cooldown
+from .posts import SpecialSlot
 
 __all__ = [
     'Base', 'init_db', 'get_session',
@@ -0,0 +1,61 @@
+"""
+Модели статистики и аналитики
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Date, String, Integer, BigInteger, JSON, DateTime, UniqueConstraint, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from DATABASE.base import Base, TimestampMixin
+
+
+class Statistics(Base, TimestampMixin):
+    """Модель статистики"""
+    __tablename__ = "statistics"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    
+    stat_date: Mapped[datetime] = mapped_column(Date, index=True)
+    stat_type: Mapped[str] = mapped_column(String(50), index=True)  # 'users', 'catalog', 'ratings', 'commands'
+    
+    # Значение может быть числом или JSON
+    value: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    value_json: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    
+    # Одна строка на день и тип - дневные агрегаты пишутся upsert
+    __table_args__ = (
+        UniqueConstraint('stat_date', 'stat_type', name='unique_daily_stat'),
+    )
+    
+    def __repr__(self):
+        return f"<Statistics {self.stat_type} {self.stat_date}>"
+
+
+class EventLog(Base):
+    """Журнал событий пользователей (только добавление, выгружается в RESULTS/)"""
+    __tablename__ = "event_log"
+    
+    # BIGINT в Postgres, INTEGER в SQLite (автоинкремент только у INTEGER PRIMARY KEY)
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True
+    )
+    
+    # Время события (ставится при записи в буфер, а не при вставке пакета)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    event_type: Mapped[str] = mapped_column(String(32))  # 'registration', 'catalog_view', 'click', 'vote', 'review', 'command'
+    
+    # Без внешних ключей - журнал не должен тормозить вставку и удаление строк
+    user_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    object_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # карточка/рейтинговый пост
+    value: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # значение голоса, оценка отзыва
+    action: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)  # команда или префикс callback
+    
+    __table_args__ = (
+        # Выгрузка идет диапазонами по времени
+        Index('ix_event_log_created_at', 'created_at'),
+        Index('ix_event_log_type_created_at', 'event_type', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f"<EventLog {self.event_type} user:{self.user_id} {self.created_at}>"
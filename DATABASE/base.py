@@ -0,0 +1,107 @@
+"""
+Базовые настройки и подключение к БД
+"""
+from datetime import datetime
+import asyncio
+from typing import AsyncGenerator, Optional
+
+from sqlalchemy import DateTime, func, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from loguru import logger
+
+from CORE.config import settings
+
+
+# Базовый класс для моделей
+class Base(DeclarativeBase):
+    """Базовый класс для всех моделей"""
+    pass
+
+
+# Общий миксин для временных меток
+class TimestampMixin:
+    """Миксин для автоматических временных меток"""
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now()
+    )
+
+
+# Размер пула - только для серверных БД (SQLite в стендах работает без пула)
+_pool_options = {} if settings.DATABASE_URL.startswith('sqlite') else {'pool_size': 10, 'max_overflow': 20}
+
+# Создание движка БД
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=settings.DEBUG,
+    pool_pre_ping=True,
+    **_pool_options
+)
+
+# Создание фабрики сессий
+async_session_maker = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+
+async def get_schema_revision() -> Optional[str]:
+    """Текущая ревизия схемы из alembic_version (None - миграции не применялись)"""
+    async with engine.connect() as conn:
+        try:
+            return await conn.scalar(text("SELECT version_num FROM alembic_version"))
+        except (ProgrammingError, OperationalError):
+            # Таблицы alembic_version еще нет
+            return None
+
+
+async def init_db() -> bool:
+    """
+    Проверка версии схемы: один запрос к alembic_version.
+    Миграции применяются отдельно (alembic upgrade head перед запуском),
+    при AUTO_MIGRATE - здесь же, если схема отстает.
+    """
+    from DATABASE.migrations import head_revision, upgrade_head
+    
+    try:
+        head = head_revision()
+        current = await get_schema_revision()
+        
+        if current != head and settings.AUTO_MIGRATE:
+            logger.info(f"🔄 Миграция схемы БД {current or 'без версии'} -> {head}")
+            # env.py запускает свой цикл событий - выполняем в отдельном потоке
+            await asyncio.to_thread(upgrade_head)
+            current = await get_schema_revision()
+        
+        if current != head:
+            logger.error(
+                f"❌ Схема БД {current or 'без версии'}, ожидается {head}: выполните alembic upgrade head"
+            )
+            return False
+        
+        logger.info(f"✅ База данных: схема {current}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Ошибка проверки БД: {e}")
+        return False
+
+
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    """Получение сессии базы данных"""
+    async with async_session_maker() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.error(f"Ошибка сессии БД: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
@@ -0,0 +1,38 @@
+"""
+Модели рассылок
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, String, Integer, Text, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+
+from DATABASE.base import Base, TimestampMixin
+
+
+class Broadcast(Base, TimestampMixin):
+    """Модель рассылки /broadcast с контрольной точкой прогресса"""
+    __tablename__ = "broadcasts"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    
+    # Содержимое и автор
+    text: Mapped[str] = mapped_column(Text)
+    created_by: Mapped[int] = mapped_column(BigInteger)
+    
+    # Статус: running/done/cancelled
+    status: Mapped[str] = mapped_column(String(20), default='running', index=True)
+    
+    # Контрольная точка: все получатели с id <= last_user_id обработаны
+    last_user_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    
+    # Прогресс
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    sent: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    blocked: Mapped[int] = mapped_column(Integer, default=0)
+    
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<Broadcast #{self.id} {self.status} {self.sent}/{self.total}>"
@@ -4,7 +4,10 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import BigInteger, String, Integer, Boolean, Text, JSON, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import (
+    BigInteger, String, Integer, Boolean, Text, JSON, DateTime, ForeignKey, UniqueConstraint,
+    LargeBinary, Index, DDL, cast, event, func, literal_column, text
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from DATABASE.base import Base, TimestampMixin
@@ -23,7 +26,7 @@ class CatalogPost(Base, TimestampMixin):
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), index=True)
     
     # Категория и информация
-    category: Mapped[str] = mapped_column(String(255), index=True)
+    category: Mapped[str] = mapped_column(String(255))
     name: Mapped[str] = mapped_column(String(255))
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
@@ -48,18 +51,95 @@ class CatalogPost(Base, TimestampMixin):
     clicks: Mapped[int] = mapped_column(Integer, default=0)
     
     # Флаги
-    is_active: Mapped[bool] = mapped_column(Boolean, default=True, index=True)
-    is_priority: Mapped[bool] = mapped_column(Boolean, default=False, index=True)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    is_priority: Mapped[bool] = mapped_column(Boolean, default=False)
     is_ad: Mapped[bool] = mapped_column(Boolean, default=False)
     ad_frequency: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Частота показа рекламы
     
     # Relationships
     reviews = relationship("CatalogReview", back_populates="catalog_post", cascade="all, delete-orphan")
     
+    # Индексы под горячие запросы (проверка планов: python -m Deploy.explain_queries).
+    # Флаги отдельно не индексируются - неактивные карточки отсекает условие частичных индексов.
+    __table_args__ = (
+        # Keyset-пагинация каталога: по категории и общая лента, без сортировки
+        Index(
+            'ix_catalog_posts_active_listing', 'category', 'created_at', 'id',
+            postgresql_where=text('is_active'),
+            sqlite_where=text('is_active = 1')
+        ),
+        Index(
+            'ix_catalog_posts_active_recent', 'created_at', 'id',
+            postgresql_where=text('is_active'),
+            sqlite_where=text('is_active = 1')
+        ),
+        # Загрузка пулов слотов: index-only scan по активным карточкам
+        Index(
+            'ix_catalog_posts_slots', 'id',
+            postgresql_include=['catalog_number', 'is_priority', 'is_ad'],
+            postgresql_where=text('is_active'),
+            sqlite_where=text('is_active = 1')
+        ),
+    )
+    
     def __repr__(self):
         return f"<CatalogPost #{self.catalog_number} {self.name}>"
 
 
+# Полнотекстовый поиск (только PostgreSQL).
+# Выражение должно совпадать с индексом, иначе планировщик его не использует.
+SEARCH_CONFIGS = ('russian', 'hungarian')
+
+
+def catalog_search_vector():
+    """tsvector карточки: название (A), категория и теги (B), описание (C)"""
+    fields = (
+        (CatalogPost.name, 'A'),
+        (CatalogPost.category, 'B'),
+        (cast(CatalogPost.tags, Text), 'B'),
+        (CatalogPost.description, 'C'),
+    )
+    vector = None
+    for config in SEARCH_CONFIGS:
+        regconfig = literal_column(f"'{config}'::regconfig")
+        for column, weight in fields:
+            part = func.setweight(
+                func.to_tsvector(regconfig, func.coalesce(column, '')),
+                literal_column(f"'{weight}'")
+            )
+            vector = part if vector is None else vector.op('||')(part)
+    return vector
+
+
+def catalog_search_query(query: str):
+    """tsquery по всем словарям поиска"""
+    tsquery = None
+    for config in SEARCH_CONFIGS:
+        part = func.plainto_tsquery(literal_column(f"'{config}'::regconfig"), query)
+        tsquery = part if tsquery is None else tsquery.op('||')(part)
+    return tsquery
+
+
+Index(
+    'ix_catalog_posts_search',
+    catalog_search_vector(),
+    postgresql_using='gin'
+).ddl_if(dialect='postgresql')
+
+Index(
+    'ix_catalog_posts_name_trgm',
+    CatalogPost.name,
+    postgresql_using='gin',
+    postgresql_ops={'name': 'gin_trgm_ops'}
+).ddl_if(dialect='postgresql')
+
+event.listen(
+    CatalogPost.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql')
+)
+
+
 class CatalogReview(Base, TimestampMixin):
     """Модель отзыва на карточку каталога"""
     __tablename__ = "catalog_reviews"
@@ -70,7 +150,7 @@ class CatalogReview(Base, TimestampMixin):
     catalog_post_id: Mapped[int] = mapped_column(Integer, ForeignKey("catalog_posts.id", ondelete="CASCADE"), index=True)
     
     # Автор отзыва
-    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), index=True)
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"))
     username: Mapped[Optional[str]] = mapped_column(String(255))
     
     # Содержание отзыва
@@ -83,6 +163,11 @@ class CatalogReview(Base, TimestampMixin):
     # Relationships
     catalog_post = relationship("CatalogPost", back_populates="reviews")
     
+    __table_args__ = (
+        # Отзывы пользователя, новые первыми
+        Index('ix_catalog_reviews_user_created', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f"<CatalogReview #{self.id} rating:{self.rating}/5>"
 
@@ -98,6 +183,9 @@ class UserSession(Base, TimestampMixin):
     # Просмотренные посты (JSON массив ID)
     viewed_posts: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, default=list)
     
+    # Просмотренные номера каталога - битовая карта (1 бит на номер 1-9999, до 1250 байт)
+    seen_bitmap: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    
     # Активность сессии
     session_active: Mapped[bool] = mapped_column(Boolean, default=True)
     last_activity: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
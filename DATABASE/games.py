@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import BigInteger, String, Integer, Boolean, Text, JSON, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import BigInteger, String, Integer, Boolean, Text, JSON, DateTime, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from DATABASE.base import Base, TimestampMixin
@@ -23,7 +23,7 @@ class RatingPost(Base, TimestampMixin):
     name: Mapped[str] = mapped_column(String(255))
     profile_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)  # Instagram/Telegram
     about: Mapped[str] = mapped_column(String(255))  # 3 слова × 7 символов
-    gender: Mapped[str] = mapped_column(String(10), index=True)  # 'boy'/'girl'
+    gender: Mapped[str] = mapped_column(String(10))  # 'boy'/'girl'
     
     # Медиа
     media_type: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
@@ -34,21 +34,42 @@ class RatingPost(Base, TimestampMixin):
     author_username: Mapped[Optional[str]] = mapped_column(String(255))
     
     # Модерация
-    status: Mapped[str] = mapped_column(String(50), default='pending', index=True)  # pending/approved/rejected
+    status: Mapped[str] = mapped_column(String(50), default='pending')  # pending/approved/rejected
     published_link: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
     moderation_message_id: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     
     # Голосование
     votes: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, default=dict)  # {"user_id": vote_value}
-    total_score: Mapped[int] = mapped_column(Integer, default=0, index=True)
+    total_score: Mapped[int] = mapped_column(Integer, default=0)
     vote_count: Mapped[int] = mapped_column(Integer, default=0)
     
+    # Все чтения рейтинга идут по одобренным постам - индексы частичные
+    __table_args__ = (
+        # Топ по полу, таблицы лидеров и пулы рейтинговых слотов (index-only scan)
+        Index(
+            'ix_rating_posts_leaderboard', 'gender', text('total_score DESC'),
+            postgresql_include=['id', 'name', 'about', 'vote_count'],
+            postgresql_where=text("status = 'approved'"),
+            sqlite_where=text("status = 'approved'")
+        ),
+        # Общий топ: top-N index scan без сортировки
+        Index(
+            'ix_rating_posts_top', 'total_score',
+            postgresql_where=text("status = 'approved'"),
+            sqlite_where=text("status = 'approved'")
+        ),
+    )
+    
     def __repr__(self):
         return f"<RatingPost #{self.catalog_number} {self.name} score:{self.total_score}>"
 
 
 class RatingVote(Base, TimestampMixin):
-    """Модель голосов в рейтинге"""
+    """
+    Модель голосов в рейтинге
+    В Postgres таблица секционирована по created_at (миграция 0001), поэтому
+    уникальность голоса держит rating_vote_claims, а не индекс этой таблицы.
+    """
     __tablename__ = "rating_votes"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -58,27 +79,46 @@ class RatingVote(Base, TimestampMixin):
     
     vote_value: Mapped[int] = mapped_column(Integer)  # -2 to +2
     
-    __table_args__ = (
-        UniqueConstraint('rating_post_id', 'user_id', name='unique_user_vote'),
+    def __repr__(self):
+        return f"<RatingVote post:{self.rating_post_id} user:{self.user_id} vote:{self.vote_value}>"
+
+
+class RatingVoteClaim(Base):
+    """
+    Отметка «пользователь уже голосовал за пост» (уникальность голосов)
+    Живет столько же, сколько голос: при отсоединении устаревшей секции
+    rating_votes ее отметки удаляются в той же транзакции (partition_manager).
+    """
+    __tablename__ = "rating_vote_claims"
+    
+    rating_post_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("rating_posts.id", ondelete="CASCADE"), primary_key=True
     )
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), primary_key=True)
     
     def __repr__(self):
-        return f"<RatingVote post:{self.rating_post_id} user:{self.user_id} vote:{self.vote_value}>"
+        return f"<RatingVoteClaim post:{self.rating_post_id} user:{self.user_id}>"
 
 
 class Cooldown(Base, TimestampMixin):
-    """Модель кулдаунов команд"""
+    """
+    Модель кулдаунов команд
+    Таблица не секционирована (миграция 0004): в ней только живые кулдауны,
+    один на пользователя и команду - set_cooldown пишет upsert по unique_user_cooldown.
+    """
     __tablename__ = "cooldowns"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     
-    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"), index=True)
-    command: Mapped[str] = mapped_column(String(50), index=True)  # 'gorateme', 'review'
+    user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.id"))
+    command: Mapped[str] = mapped_column(String(50))  # 'gorateme', 'review'
     
-    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     
     __table_args__ = (
         UniqueConstraint('user_id', 'command', name='unique_user_cooldown'),
+        # Загрузка активных кулдаунов (index-only scan) и вычистка истекших
+        Index('ix_cooldowns_active', 'expires_at', postgresql_include=['user_id', 'command']),
     )
     
     def __repr__(self):
@@ -0,0 +1,30 @@
+"""
+Миграции схемы БД (alembic)
+
+    alembic upgrade head                                      # применить
+    alembic revision -m "описание"                            # новая ревизия
+    alembic revision --autogenerate -m "описание"             # по изменениям моделей
+"""
+import os
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'alembic.ini')
+
+
+def alembic_config():
+    from alembic.config import Config
+    return Config(ALEMBIC_INI)
+
+
+def head_revision() -> str:
+    """Последняя ревизия по файлам миграций (без обращения к БД)"""
+    from alembic.script import ScriptDirectory
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def upgrade_head():
+    """alembic upgrade head (синхронно - запускать в отдельном потоке)"""
+    from alembic import command
+    config = alembic_config()
+    # env.py не вызывает fileConfig: иначе он отключил бы логгеры работающего бота
+    config.attributes['in_process'] = True
+    command.upgrade(config, 'head')
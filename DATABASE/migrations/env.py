@@ -0,0 +1,59 @@
+"""
+Окружение alembic: асинхронный движок по DATABASE_URL из настроек бота.
+Каждая ревизия - отдельная транзакция, чтобы ревизии с CREATE INDEX
+CONCURRENTLY могли выходить из нее через autocommit_block().
+"""
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from CORE.config import settings
+from DATABASE.base import Base
+# Все модели в метаданных (для autogenerate)
+from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+
+config = context.config
+# В процессе бота (AUTO_MIGRATE) логирование уже настроено - не перенастраиваем
+if config.config_file_name is not None and not config.attributes.get('in_process'):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def run_migrations_offline():
+    """SQL-скрипт без подключения к БД (alembic upgrade head --sql)"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online():
+    connectable = create_async_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+    await connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
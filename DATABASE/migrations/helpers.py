@@ -0,0 +1,87 @@
+"""
+Операции миграций без долгих блокировок (Postgres)
+
+Вызывать внутри op.get_context().autocommit_block(): CREATE/DROP INDEX
+CONCURRENTLY не работает в транзакции.
+"""
+from typing import List
+
+from alembic import op
+from sqlalchemy import Index, text
+from sqlalchemy.schema import CreateIndex
+
+
+def is_postgres() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def is_partitioned(table: str) -> bool:
+    return bool(op.get_bind().execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+        {'table': table}
+    ).scalar())
+
+
+def _partitions(table: str) -> List[str]:
+    return list(op.get_bind().execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {'table': table}
+    ).scalars())
+
+
+def _drop_invalid(name: str):
+    # Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс,
+    # который IF NOT EXISTS молча пропустил бы
+    invalid = op.get_bind().execute(
+        text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {'name': name}
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def create_index_concurrently(name: str, table: str, definition: str, unique: bool = False):
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS без блокировки записи.
+    definition - все после имени таблицы: "(a, b) INCLUDE (c) WHERE ...".
+    Секционированной таблице индекс строится по секциям и подключается
+    через ATTACH PARTITION (на самой таблице CONCURRENTLY недоступен).
+    """
+    unique_sql = 'UNIQUE ' if unique else ''
+    if not is_partitioned(table):
+        _drop_invalid(name)
+        op.execute(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}")
+        return
+
+    op.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON ONLY {table} {definition}")
+    prefix = f"ix_{table}_"
+    suffix = name[len(prefix):] if name.startswith(prefix) else name
+    for partition in _partitions(table):
+        partition_index = f"{partition}_{suffix}"
+        _drop_invalid(partition_index)
+        op.execute(
+            f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} {definition}"
+        )
+        op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+
+
+def create_model_index_concurrently(index: Index):
+    """Индекс, объявленный в моделях (выражения, GIN), с CONCURRENTLY IF NOT EXISTS"""
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(
+        dialect=op.get_bind().dialect,
+        compile_kwargs={'literal_binds': True}
+    ))
+    _drop_invalid(index.name)
+    op.execute(ddl.replace('INDEX', 'INDEX CONCURRENTLY', 1))
+
+
+def drop_index_concurrently(name: str, table: str):
+    if is_partitioned(table):
+        # У секционированной таблицы удаление каскадом по секциям, без CONCURRENTLY
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    else:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
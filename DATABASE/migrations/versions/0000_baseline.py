@@ -0,0 +1,238 @@
+"""
+Исходная схема (до alembic ее создавал create_all при каждом запуске)
+
+Зафиксирована явным DDL - так, как ее создавали модели до перехода на
+alembic; текущие модели сюда не попадают, их изменения - в следующих ревизиях.
+- существующая БД: недостающие таблицы создаются, остальное не трогается;
+- пустая БД: создаются все таблицы исходной схемы.
+
+Revision ID: 0000
+Revises:
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0000'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _timestamps():
+    return [
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    ]
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    def create(name, *elements, indexes=()):
+        if name in existing:
+            return
+        op.create_table(name, *elements)
+        for index_name, columns, unique in indexes:
+            op.create_index(index_name, name, columns, unique=unique)
+
+    # Порядок - по внешним ключам
+    create(
+        'users',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('uid', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=True),
+        sa.Column('first_name', sa.String(length=255), nullable=True),
+        sa.Column('last_name', sa.String(length=255), nullable=True),
+        sa.Column('language_code', sa.String(length=10), nullable=True),
+        sa.Column('is_banned', sa.Boolean(), nullable=False),
+        sa.Column('is_admin', sa.Boolean(), nullable=False),
+        sa.Column('is_moderator', sa.Boolean(), nullable=False),
+        sa.Column('last_activity', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('message_count', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_users_uid', ['uid'], True)]
+    )
+    create(
+        'moderation_queue',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('content_type', sa.String(length=50), nullable=False),
+        sa.Column('content_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('moderator_id', sa.BigInteger(), nullable=True),
+        sa.Column('moderated_at', sa.DateTime(timezone=True), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_moderation_queue_content_id', ['content_id'], False),
+            ('ix_moderation_queue_content_type', ['content_type'], False),
+            ('ix_moderation_queue_status', ['status'], False),
+        ]
+    )
+    create(
+        'special_slots',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('post_link', sa.String(length=500), nullable=False),
+        sa.Column('total_shows', sa.Integer(), nullable=False),
+        sa.Column('target_shows', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_special_slots_is_active', ['is_active'], False)]
+    )
+    create(
+        'statistics',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('stat_date', sa.Date(), nullable=False),
+        sa.Column('stat_type', sa.String(length=50), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=True),
+        sa.Column('value_json', sa.JSON(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_statistics_stat_date', ['stat_date'], False),
+            ('ix_statistics_stat_type', ['stat_type'], False),
+        ]
+    )
+    create(
+        'catalog_posts',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('catalog_number', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('category', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('catalog_link', sa.String(length=500), nullable=True),
+        sa.Column('media_type', sa.String(length=50), nullable=True),
+        sa.Column('media_file_id', sa.String(length=500), nullable=True),
+        sa.Column('media_group_id', sa.String(length=500), nullable=True),
+        sa.Column('media_json', sa.JSON(), nullable=True),
+        sa.Column('author_username', sa.String(length=255), nullable=True),
+        sa.Column('author_id', sa.BigInteger(), nullable=True),
+        sa.Column('views', sa.Integer(), nullable=False),
+        sa.Column('clicks', sa.Integer(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('is_priority', sa.Boolean(), nullable=False),
+        sa.Column('is_ad', sa.Boolean(), nullable=False),
+        sa.Column('ad_frequency', sa.Integer(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_catalog_posts_catalog_number', ['catalog_number'], True),
+            ('ix_catalog_posts_category', ['category'], False),
+            ('ix_catalog_posts_is_active', ['is_active'], False),
+            ('ix_catalog_posts_is_priority', ['is_priority'], False),
+            ('ix_catalog_posts_user_id', ['user_id'], False),
+        ]
+    )
+    create(
+        'cooldowns',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('command', sa.String(length=50), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'command', name='unique_user_cooldown'),
+        indexes=[
+            ('ix_cooldowns_command', ['command'], False),
+            ('ix_cooldowns_expires_at', ['expires_at'], False),
+            ('ix_cooldowns_user_id', ['user_id'], False),
+        ]
+    )
+    create(
+        'rating_posts',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('catalog_number', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('profile_url', sa.String(length=500), nullable=True),
+        sa.Column('about', sa.String(length=255), nullable=False),
+        sa.Column('gender', sa.String(length=10), nullable=False),
+        sa.Column('media_type', sa.String(length=50), nullable=True),
+        sa.Column('media_file_id', sa.String(length=500), nullable=True),
+        sa.Column('author_user_id', sa.BigInteger(), nullable=False),
+        sa.Column('author_username', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('published_link', sa.String(length=500), nullable=True),
+        sa.Column('moderation_message_id', sa.BigInteger(), nullable=True),
+        sa.Column('votes', sa.JSON(), nullable=True),
+        sa.Column('total_score', sa.Integer(), nullable=False),
+        sa.Column('vote_count', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['author_user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_rating_posts_author_user_id', ['author_user_id'], False),
+            ('ix_rating_posts_catalog_number', ['catalog_number'], True),
+            ('ix_rating_posts_gender', ['gender'], False),
+            ('ix_rating_posts_status', ['status'], False),
+            ('ix_rating_posts_total_score', ['total_score'], False),
+        ]
+    )
+    create(
+        'subscriptions',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('subscription_type', sa.String(length=50), nullable=False),
+        sa.Column('subscription_value', sa.String(length=255), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'subscription_value', name='unique_user_subscription'),
+        indexes=[('ix_subscriptions_user_id', ['user_id'], False)]
+    )
+    create(
+        'user_sessions',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('viewed_posts', sa.JSON(), nullable=True),
+        sa.Column('session_active', sa.Boolean(), nullable=False),
+        sa.Column('last_activity', sa.DateTime(timezone=True), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[('ix_user_sessions_user_id', ['user_id'], True)]
+    )
+    create(
+        'catalog_reviews',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('catalog_post_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=True),
+        sa.Column('review_text', sa.Text(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('approved', sa.Boolean(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['catalog_post_id'], ['catalog_posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        indexes=[
+            ('ix_catalog_reviews_approved', ['approved'], False),
+            ('ix_catalog_reviews_catalog_post_id', ['catalog_post_id'], False),
+            ('ix_catalog_reviews_user_id', ['user_id'], False),
+        ]
+    )
+    create(
+        'rating_votes',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('rating_post_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.BigInteger(), nullable=False),
+        sa.Column('vote_value', sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['rating_post_id'], ['rating_posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('rating_post_id', 'user_id', name='unique_user_vote'),
+        indexes=[
+            ('ix_rating_votes_rating_post_id', ['rating_post_id'], False),
+            ('ix_rating_votes_user_id', ['user_id'], False),
+        ]
+    )
+
+
+def downgrade():
+    # Исходную схему с данными не удаляем
+    pass
@@ -0,0 +1,97 @@
+"""
+Таблицы и колонки, добавленные в модели до перехода на alembic
+
+- users.is_blocked (бот заблокирован пользователем), user_sessions.seen_bitmap
+  (просмотренные номера каталога);
+- broadcasts (рассылки с контрольной точкой), event_log (журнал событий),
+  rating_vote_claims (уникальность голосов).
+Базы, где create_all уже создал что-то из этого, не меняются - создается
+только недостающее.
+
+Revision ID: 0000a
+Revises: 0000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0000a'
+down_revision = '0000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+
+    def columns(table):
+        return {column['name'] for column in inspector.get_columns(table)}
+
+    if 'is_blocked' not in columns('users'):
+        op.add_column(
+            'users',
+            sa.Column('is_blocked', sa.Boolean(), server_default=sa.false(), nullable=False)
+        )
+    if 'seen_bitmap' not in columns('user_sessions'):
+        op.add_column('user_sessions', sa.Column('seen_bitmap', sa.LargeBinary(), nullable=True))
+
+    if 'broadcasts' not in existing:
+        op.create_table(
+            'broadcasts',
+            sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+            sa.Column('text', sa.Text(), nullable=False),
+            sa.Column('created_by', sa.BigInteger(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('last_user_id', sa.BigInteger(), nullable=False),
+            sa.Column('total', sa.Integer(), nullable=False),
+            sa.Column('sent', sa.Integer(), nullable=False),
+            sa.Column('failed', sa.Integer(), nullable=False),
+            sa.Column('blocked', sa.Integer(), nullable=False),
+            sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_broadcasts_status', 'broadcasts', ['status'])
+
+    if 'event_log' not in existing:
+        op.create_table(
+            'event_log',
+            # BIGINT в Postgres, INTEGER в SQLite (автоинкремент только у INTEGER PRIMARY KEY)
+            sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('event_type', sa.String(length=32), nullable=False),
+            sa.Column('user_id', sa.BigInteger(), nullable=True),
+            sa.Column('object_id', sa.Integer(), nullable=True),
+            sa.Column('value', sa.Integer(), nullable=True),
+            sa.Column('action', sa.String(length=64), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_event_log_created_at', 'event_log', ['created_at'])
+        op.create_index('ix_event_log_type_created_at', 'event_log', ['event_type', 'created_at'])
+
+    if 'rating_vote_claims' not in existing:
+        op.create_table(
+            'rating_vote_claims',
+            sa.Column('rating_post_id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.BigInteger(), nullable=False),
+            sa.ForeignKeyConstraint(['rating_post_id'], ['rating_posts.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('rating_post_id', 'user_id')
+        )
+        # Голоса, принятые до появления таблицы
+        op.execute(
+            "INSERT INTO rating_vote_claims (rating_post_id, user_id) "
+            "SELECT DISTINCT rating_post_id, user_id FROM rating_votes"
+        )
+
+
+def downgrade():
+    op.drop_table('rating_vote_claims')
+    op.drop_table('event_log')
+    op.drop_table('broadcasts')
+    # batch - SQLite не умеет DROP COLUMN через ALTER TABLE в старых версиях
+    with op.batch_alter_table('user_sessions') as batch:
+        batch.drop_column('seen_bitmap')
+    with op.batch_alter_table('users') as batch:
+        batch.drop_column('is_blocked')
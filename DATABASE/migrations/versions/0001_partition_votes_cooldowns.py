@@ -0,0 +1,213 @@
+"""
+Секционирование rating_votes (по created_at, месяцы) и cooldowns (по expires_at, дни)
+
+- rating_vote_claims: уникальность (rating_post_id, user_id) вынесена в узкую
+  таблицу - уникальный индекс секционированной таблицы обязан включать ключ секций;
+- rating_votes и cooldowns пересоздаются как PARTITION BY RANGE с секцией
+  по умолчанию, данные переносятся (из cooldowns - только активные);
+- дальше секции создает и удаляет SERVICES.database.partitions.partition_manager.
+
+Секционирование - только Postgres; на других диалектах снимаются лишь
+ограничения unique_user_vote и unique_user_cooldown, как у секционированных таблиц.
+
+Revision ID: 0001
+Revises: 0000a
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = '0000a'
+branch_labels = None
+depends_on = None
+
+
+def _postgres() -> bool:
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def _drop_unique_constraints():
+    """Без секционирования: те же ограничения уникальности, что и у секционированных таблиц"""
+    inspector = sa.inspect(op.get_bind())
+    for table, constraint in (('rating_votes', 'unique_user_vote'), ('cooldowns', 'unique_user_cooldown')):
+        names = {unique['name'] for unique in inspector.get_unique_constraints(table)}
+        if constraint in names:
+            with op.batch_alter_table(table) as batch:
+                batch.drop_constraint(constraint, type_='unique')
+
+
+def upgrade():
+    if not _postgres():
+        _drop_unique_constraints()
+        return
+
+    # Уникальность голосов
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS rating_vote_claims (
+            rating_post_id INTEGER NOT NULL REFERENCES rating_posts (id) ON DELETE CASCADE,
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            PRIMARY KEY (rating_post_id, user_id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO rating_vote_claims (rating_post_id, user_id)
+        SELECT rating_post_id, user_id FROM rating_votes
+        ON CONFLICT DO NOTHING
+    """)
+
+    # rating_votes -> секции по месяцам created_at
+    op.execute("ALTER TABLE rating_votes RENAME TO rating_votes_legacy")
+    op.execute("ALTER TABLE rating_votes_legacy RENAME CONSTRAINT rating_votes_pkey TO rating_votes_legacy_pkey")
+    op.execute("ALTER SEQUENCE rating_votes_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_rating_votes_rating_post_id")
+    op.execute("DROP INDEX IF EXISTS ix_rating_votes_user_id")
+    op.execute("""
+        CREATE TABLE rating_votes (
+            id INTEGER NOT NULL DEFAULT nextval('rating_votes_id_seq'),
+            rating_post_id INTEGER NOT NULL REFERENCES rating_posts (id) ON DELETE CASCADE,
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            vote_value INTEGER NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE rating_votes_id_seq OWNED BY rating_votes.id")
+    op.execute("CREATE INDEX ix_rating_votes_rating_post_id ON rating_votes (rating_post_id)")
+    op.execute("CREATE INDEX ix_rating_votes_user_id ON rating_votes (user_id)")
+    op.execute("CREATE TABLE rating_votes_default PARTITION OF rating_votes DEFAULT")
+    # Месячные секции от первого голоса до трех месяцев вперед
+    op.execute("""
+        DO $$
+        DECLARE
+            month_start DATE := date_trunc('month', COALESCE(
+                (SELECT min(created_at) FROM rating_votes_legacy), now()
+            ) AT TIME ZONE 'UTC')::date;
+            last_month DATE := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF rating_votes FOR VALUES FROM (%L) TO (%L)',
+                    'rating_votes_p' || to_char(month_start, 'YYYYMM'),
+                    month_start::text || ' 00:00:00+00',
+                    (month_start + interval '1 month')::date::text || ' 00:00:00+00'
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+    op.execute("""
+        INSERT INTO rating_votes (id, rating_post_id, user_id, vote_value, created_at, updated_at)
+        SELECT id, rating_post_id, user_id, vote_value, created_at, updated_at FROM rating_votes_legacy
+    """)
+    op.execute("DROP TABLE rating_votes_legacy")
+
+    # cooldowns -> секции по дням expires_at
+    op.execute("ALTER TABLE cooldowns RENAME TO cooldowns_legacy")
+    op.execute("ALTER TABLE cooldowns_legacy RENAME CONSTRAINT cooldowns_pkey TO cooldowns_legacy_pkey")
+    op.execute("ALTER TABLE cooldowns_legacy DROP CONSTRAINT IF EXISTS unique_user_cooldown")
+    op.execute("ALTER SEQUENCE cooldowns_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_user_id")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_command")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_expires_at")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_user_command")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_user_command_expires")
+    op.execute("""
+        CREATE TABLE cooldowns (
+            id INTEGER NOT NULL DEFAULT nextval('cooldowns_id_seq'),
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            command VARCHAR(50) NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+    """)
+    op.execute("ALTER SEQUENCE cooldowns_id_seq OWNED BY cooldowns.id")
+    op.execute("CREATE INDEX ix_cooldowns_user_id ON cooldowns (user_id)")
+    op.execute("CREATE INDEX ix_cooldowns_command ON cooldowns (command)")
+    op.execute("CREATE INDEX ix_cooldowns_user_command ON cooldowns (user_id, command)")
+    op.execute("CREATE TABLE cooldowns_default PARTITION OF cooldowns DEFAULT")
+    op.execute("""
+        DO $$
+        DECLARE
+            day_start DATE := (now() AT TIME ZONE 'UTC')::date;
+        BEGIN
+            FOR offset_days IN 0..3 LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF cooldowns FOR VALUES FROM (%L) TO (%L)',
+                    'cooldowns_p' || to_char(day_start + offset_days, 'YYYYMMDD'),
+                    (day_start + offset_days)::text || ' 00:00:00+00',
+                    (day_start + offset_days + 1)::text || ' 00:00:00+00'
+                );
+            END LOOP;
+        END $$
+    """)
+    # Истекшие кулдауны не переносим - они ничего не значат
+    op.execute("""
+        INSERT INTO cooldowns (id, user_id, command, expires_at, created_at, updated_at)
+        SELECT id, user_id, command, expires_at, created_at, updated_at
+        FROM cooldowns_legacy WHERE expires_at > now()
+    """)
+    op.execute("DROP TABLE cooldowns_legacy")
+
+
+def downgrade():
+    if not _postgres():
+        return
+
+    op.execute("ALTER TABLE cooldowns RENAME TO cooldowns_partitioned")
+    op.execute("ALTER SEQUENCE cooldowns_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_user_id")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_command")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_user_command")
+    op.execute("ALTER TABLE cooldowns_partitioned RENAME CONSTRAINT cooldowns_pkey TO cooldowns_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE cooldowns (
+            id INTEGER PRIMARY KEY DEFAULT nextval('cooldowns_id_seq'),
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            command VARCHAR(50) NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            CONSTRAINT unique_user_cooldown UNIQUE (user_id, command)
+        )
+    """)
+    op.execute("ALTER SEQUENCE cooldowns_id_seq OWNED BY cooldowns.id")
+    op.execute("CREATE INDEX ix_cooldowns_user_id ON cooldowns (user_id)")
+    op.execute("CREATE INDEX ix_cooldowns_command ON cooldowns (command)")
+    op.execute("CREATE INDEX ix_cooldowns_expires_at ON cooldowns (expires_at)")
+    op.execute("""
+        INSERT INTO cooldowns (id, user_id, command, expires_at, created_at, updated_at)
+        SELECT DISTINCT ON (user_id, command) id, user_id, command, expires_at, created_at, updated_at
+        FROM cooldowns_partitioned WHERE expires_at > now()
+        ORDER BY user_id, command, expires_at DESC
+    """)
+    op.execute("DROP TABLE cooldowns_partitioned")
+
+    op.execute("ALTER TABLE rating_votes RENAME TO rating_votes_partitioned")
+    op.execute("ALTER SEQUENCE rating_votes_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_rating_votes_rating_post_id")
+    op.execute("DROP INDEX IF EXISTS ix_rating_votes_user_id")
+    op.execute("ALTER TABLE rating_votes_partitioned RENAME CONSTRAINT rating_votes_pkey TO rating_votes_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE rating_votes (
+            id INTEGER PRIMARY KEY DEFAULT nextval('rating_votes_id_seq'),
+            rating_post_id INTEGER NOT NULL REFERENCES rating_posts (id) ON DELETE CASCADE,
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            vote_value INTEGER NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            CONSTRAINT unique_user_vote UNIQUE (rating_post_id, user_id)
+        )
+    """)
+    op.execute("ALTER SEQUENCE rating_votes_id_seq OWNED BY rating_votes.id")
+    op.execute("CREATE INDEX ix_rating_votes_rating_post_id ON rating_votes (rating_post_id)")
+    op.execute("CREATE INDEX ix_rating_votes_user_id ON rating_votes (user_id)")
+    # Отсоединенные архивные секции в откат не попадают
+    op.execute("""
+        INSERT INTO rating_votes (id, rating_post_id, user_id, vote_value, created_at, updated_at)
+        SELECT id, rating_post_id, user_id, vote_value, created_at, updated_at FROM rating_votes_partitioned
+        ON CONFLICT DO NOTHING
+    """)
+    op.execute("DROP TABLE rating_votes_partitioned")
@@ -0,0 +1,99 @@
+"""
+Индексы горячих запросов (CREATE INDEX CONCURRENTLY - без блокировки записи)
+
+- statistics: уникальный (stat_date, stat_type) для upsert дневных агрегатов
+  (дубли 'daily_summary' от старого сборщика удаляются, остается последняя строка);
+- catalog_posts: keyset-листинг, поиск (GIN), пулы слотов (покрывающий частичный);
+- rating_posts: таблицы лидеров и рейтинговые слоты (покрывающий частичный);
+- cooldowns: (user_id, command, expires_at) вместо (user_id, command).
+На других диалектах (SQLite) - те же индексы обычным CREATE INDEX, без поиска.
+
+Revision ID: 0002
+Revises: 0001
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from DATABASE.migrations.helpers import (
+    is_postgres, create_index_concurrently, create_model_index_concurrently, drop_index_concurrently
+)
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _upgrade_other():
+    op.execute("""
+        DELETE FROM statistics
+        WHERE id NOT IN (SELECT max(id) FROM statistics GROUP BY stat_date, stat_type)
+    """)
+    op.create_index('unique_daily_stat', 'statistics', ['stat_date', 'stat_type'], unique=True, if_not_exists=True)
+    op.create_index('ix_catalog_posts_listing', 'catalog_posts', ['category', 'created_at', 'id'], if_not_exists=True)
+    op.create_index(
+        'ix_catalog_posts_slots', 'catalog_posts', ['id'],
+        sqlite_where=sa.text('is_active = 1'), if_not_exists=True
+    )
+    op.create_index(
+        'ix_rating_posts_leaderboard', 'rating_posts', ['gender', sa.text('total_score DESC')],
+        sqlite_where=sa.text("status = 'approved'"), if_not_exists=True
+    )
+    op.create_index(
+        'ix_cooldowns_user_command_expires', 'cooldowns', ['user_id', 'command', 'expires_at'], if_not_exists=True
+    )
+
+
+def upgrade():
+    if not is_postgres():
+        _upgrade_other()
+        return
+
+    from DATABASE.catalog import CatalogPost
+
+    op.execute("""
+        DELETE FROM statistics s
+        USING statistics newer
+        WHERE s.stat_date = newer.stat_date AND s.stat_type = newer.stat_type AND s.id < newer.id
+    """)
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    search_indexes = {index.name: index for index in CatalogPost.__table__.indexes}
+
+    with op.get_context().autocommit_block():
+        create_index_concurrently('unique_daily_stat', 'statistics', '(stat_date, stat_type)', unique=True)
+
+        create_index_concurrently('ix_catalog_posts_listing', 'catalog_posts', '(category, created_at, id)')
+        create_index_concurrently(
+            'ix_catalog_posts_slots', 'catalog_posts',
+            '(id) INCLUDE (catalog_number, is_priority, is_ad) WHERE is_active'
+        )
+        create_model_index_concurrently(search_indexes['ix_catalog_posts_search'])
+        create_model_index_concurrently(search_indexes['ix_catalog_posts_name_trgm'])
+
+        create_index_concurrently(
+            'ix_rating_posts_leaderboard', 'rating_posts',
+            "(gender, total_score DESC) INCLUDE (id, name, about, vote_count) WHERE status = 'approved'"
+        )
+
+        create_index_concurrently('ix_cooldowns_user_command_expires', 'cooldowns', '(user_id, command, expires_at)')
+        drop_index_concurrently('ix_cooldowns_user_command', 'cooldowns')
+
+
+def downgrade():
+    if not is_postgres():
+        for name, table in (
+            ('ix_cooldowns_user_command_expires', 'cooldowns'),
+            ('ix_rating_posts_leaderboard', 'rating_posts'),
+            ('ix_catalog_posts_slots', 'catalog_posts'),
+        ):
+            op.drop_index(name, table_name=table, if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        create_index_concurrently('ix_cooldowns_user_command', 'cooldowns', '(user_id, command)')
+        drop_index_concurrently('ix_cooldowns_user_command_expires', 'cooldowns')
+        drop_index_concurrently('ix_rating_posts_leaderboard', 'rating_posts')
+        drop_index_concurrently('ix_catalog_posts_slots', 'catalog_posts')
+        # Листинг, поиск и unique_daily_stat объявлены в моделях и существовали
+        # на части баз до этой ревизии - при откате их не удаляем
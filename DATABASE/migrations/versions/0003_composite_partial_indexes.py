@@ -0,0 +1,109 @@
+"""
+Составные и частичные индексы вместо одноколоночных (CREATE INDEX CONCURRENTLY)
+
+Набор подобран по планам Deploy.explain_queries для запросов CatalogService,
+RatingService, UserService и CooldownService:
+- catalog_posts: keyset-листинг только по активным карточкам - по категории
+  и общая лента; индексы флагов is_active/is_priority и category удаляются;
+- rating_posts: общий топ одобренных (top-N index scan); индексы gender,
+  status и total_score удаляются - их заменяет ix_rating_posts_leaderboard;
+- catalog_reviews: (user_id, created_at) - отзывы пользователя без сортировки;
+- cooldowns: покрывающий (expires_at) INCLUDE (user_id, command) для загрузки
+  активных; индексы user_id и command перекрыты (user_id, command, expires_at).
+На других диалектах (SQLite) - обычные CREATE/DROP INDEX, без INCLUDE.
+
+Revision ID: 0003
+Revises: 0002
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from DATABASE.migrations.helpers import is_postgres, create_index_concurrently, drop_index_concurrently
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (имя, таблица, определение) индексов, которые заменяются новыми
+REPLACED_INDEXES = [
+    ('ix_catalog_posts_listing', 'catalog_posts', '(category, created_at, id)'),
+    ('ix_catalog_posts_category', 'catalog_posts', '(category)'),
+    ('ix_catalog_posts_is_active', 'catalog_posts', '(is_active)'),
+    ('ix_catalog_posts_is_priority', 'catalog_posts', '(is_priority)'),
+    ('ix_rating_posts_gender', 'rating_posts', '(gender)'),
+    ('ix_rating_posts_status', 'rating_posts', '(status)'),
+    ('ix_rating_posts_total_score', 'rating_posts', '(total_score)'),
+    ('ix_catalog_reviews_user_id', 'catalog_reviews', '(user_id)'),
+    ('ix_cooldowns_user_id', 'cooldowns', '(user_id)'),
+    ('ix_cooldowns_command', 'cooldowns', '(command)'),
+    ('ix_cooldowns_expires_at', 'cooldowns', '(expires_at)'),
+]
+
+
+def _upgrade_other():
+    active = sa.text('is_active = 1')
+    op.create_index(
+        'ix_catalog_posts_active_listing', 'catalog_posts', ['category', 'created_at', 'id'],
+        sqlite_where=active, if_not_exists=True
+    )
+    op.create_index(
+        'ix_catalog_posts_active_recent', 'catalog_posts', ['created_at', 'id'],
+        sqlite_where=active, if_not_exists=True
+    )
+    op.create_index(
+        'ix_rating_posts_top', 'rating_posts', ['total_score'],
+        sqlite_where=sa.text("status = 'approved'"), if_not_exists=True
+    )
+    op.create_index('ix_catalog_reviews_user_created', 'catalog_reviews', ['user_id', 'created_at'], if_not_exists=True)
+    op.create_index('ix_cooldowns_active', 'cooldowns', ['expires_at'], if_not_exists=True)
+    for name, table, _ in REPLACED_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def upgrade():
+    if not is_postgres():
+        _upgrade_other()
+        return
+
+    with op.get_context().autocommit_block():
+        # Сначала новые индексы - запросы не остаются без индекса между шагами
+        create_index_concurrently(
+            'ix_catalog_posts_active_listing', 'catalog_posts', '(category, created_at, id) WHERE is_active'
+        )
+        create_index_concurrently(
+            'ix_catalog_posts_active_recent', 'catalog_posts', '(created_at, id) WHERE is_active'
+        )
+        create_index_concurrently(
+            'ix_rating_posts_top', 'rating_posts', "(total_score) WHERE status = 'approved'"
+        )
+        create_index_concurrently('ix_catalog_reviews_user_created', 'catalog_reviews', '(user_id, created_at)')
+        create_index_concurrently('ix_cooldowns_active', 'cooldowns', '(expires_at) INCLUDE (user_id, command)')
+
+        for name, table, _ in REPLACED_INDEXES:
+            drop_index_concurrently(name, table)
+
+
+def downgrade():
+    if not is_postgres():
+        for name, table, definition in REPLACED_INDEXES:
+            op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} {definition}")
+        for name, table in (
+            ('ix_cooldowns_active', 'cooldowns'),
+            ('ix_catalog_reviews_user_created', 'catalog_reviews'),
+            ('ix_rating_posts_top', 'rating_posts'),
+            ('ix_catalog_posts_active_recent', 'catalog_posts'),
+            ('ix_catalog_posts_active_listing', 'catalog_posts'),
+        ):
+            op.drop_index(name, table_name=table, if_exists=True)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, definition in REPLACED_INDEXES:
+            create_index_concurrently(name, table, definition)
+
+        drop_index_concurrently('ix_cooldowns_active', 'cooldowns')
+        drop_index_concurrently('ix_catalog_reviews_user_created', 'catalog_reviews')
+        drop_index_concurrently('ix_rating_posts_top', 'rating_posts')
+        drop_index_concurrently('ix_catalog_posts_active_recent', 'catalog_posts')
+        drop_index_concurrently('ix_catalog_posts_active_listing', 'catalog_posts')
@@ -0,0 +1,138 @@
+"""
+cooldowns снова без секций, с ограничением unique_user_cooldown
+
+Уникальный индекс секционированной таблицы обязан включать expires_at, поэтому
+после 0001 единственность (user_id, command) держал только DELETE + INSERT в
+set_cooldown - при одновременных вызовах появлялись дубли, а DELETE обходил все
+секции. В таблице лежат только живые кулдауны (часы), секции ей не нужны:
+- cooldowns пересоздается обычной таблицей с UNIQUE (user_id, command),
+  переносятся активные строки (по одной на пользователя и команду);
+- (user_id, command, expires_at) не нужен - поиск идет по уникальному индексу;
+- set_cooldown - один INSERT ... ON CONFLICT DO UPDATE, истекшие строки
+  удаляет purge_expired по ix_cooldowns_active.
+На других диалектах (SQLite) - удаление дублей и ограничение через batch.
+
+Revision ID: 0004
+Revises: 0003
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from DATABASE.migrations.helpers import is_postgres, is_partitioned
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def _unique_names() -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {unique['name'] for unique in inspector.get_unique_constraints('cooldowns')}
+
+
+def _upgrade_other():
+    op.execute(
+        "DELETE FROM cooldowns WHERE id NOT IN "
+        "(SELECT max(id) FROM cooldowns GROUP BY user_id, command)"
+    )
+    op.drop_index('ix_cooldowns_user_command_expires', table_name='cooldowns', if_exists=True)
+    if 'unique_user_cooldown' not in _unique_names():
+        with op.batch_alter_table('cooldowns') as batch:
+            batch.create_unique_constraint('unique_user_cooldown', ['user_id', 'command'])
+
+
+def _downgrade_other():
+    if 'unique_user_cooldown' in _unique_names():
+        with op.batch_alter_table('cooldowns') as batch:
+            batch.drop_constraint('unique_user_cooldown', type_='unique')
+    op.create_index(
+        'ix_cooldowns_user_command_expires', 'cooldowns', ['user_id', 'command', 'expires_at'], if_not_exists=True
+    )
+
+
+def upgrade():
+    if not is_postgres():
+        _upgrade_other()
+        return
+    if not is_partitioned('cooldowns'):
+        return
+
+    op.execute("ALTER TABLE cooldowns RENAME TO cooldowns_partitioned")
+    op.execute("ALTER TABLE cooldowns_partitioned RENAME CONSTRAINT cooldowns_pkey TO cooldowns_partitioned_pkey")
+    op.execute("ALTER SEQUENCE cooldowns_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_user_command")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_user_command_expires")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_active")
+    op.execute("""
+        CREATE TABLE cooldowns (
+            id INTEGER PRIMARY KEY DEFAULT nextval('cooldowns_id_seq'),
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            command VARCHAR(50) NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            CONSTRAINT unique_user_cooldown UNIQUE (user_id, command)
+        )
+    """)
+    op.execute("ALTER SEQUENCE cooldowns_id_seq OWNED BY cooldowns.id")
+    op.execute("CREATE INDEX ix_cooldowns_active ON cooldowns (expires_at) INCLUDE (user_id, command)")
+    # Истекшие не переносим; из дублей остается самый поздний
+    op.execute("""
+        INSERT INTO cooldowns (id, user_id, command, expires_at, created_at, updated_at)
+        SELECT DISTINCT ON (user_id, command) id, user_id, command, expires_at, created_at, updated_at
+        FROM cooldowns_partitioned WHERE expires_at > now()
+        ORDER BY user_id, command, expires_at DESC
+    """)
+    # Вместе с секциями
+    op.execute("DROP TABLE cooldowns_partitioned")
+
+
+def downgrade():
+    if not is_postgres():
+        _downgrade_other()
+        return
+    if is_partitioned('cooldowns'):
+        return
+
+    # Та же схема, что после 0001-0003
+    op.execute("ALTER TABLE cooldowns RENAME TO cooldowns_plain")
+    op.execute("ALTER TABLE cooldowns_plain RENAME CONSTRAINT cooldowns_pkey TO cooldowns_plain_pkey")
+    op.execute("ALTER SEQUENCE cooldowns_id_seq OWNED BY NONE")
+    op.execute("DROP INDEX IF EXISTS ix_cooldowns_active")
+    op.execute("""
+        CREATE TABLE cooldowns (
+            id INTEGER NOT NULL DEFAULT nextval('cooldowns_id_seq'),
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            command VARCHAR(50) NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+    """)
+    op.execute("ALTER SEQUENCE cooldowns_id_seq OWNED BY cooldowns.id")
+    op.execute("CREATE INDEX ix_cooldowns_user_command_expires ON cooldowns (user_id, command, expires_at)")
+    op.execute("CREATE INDEX ix_cooldowns_active ON cooldowns (expires_at) INCLUDE (user_id, command)")
+    op.execute("CREATE TABLE cooldowns_default PARTITION OF cooldowns DEFAULT")
+    op.execute("""
+        DO $$
+        DECLARE
+            day_start DATE := (now() AT TIME ZONE 'UTC')::date;
+        BEGIN
+            FOR offset_days IN 0..3 LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF cooldowns FOR VALUES FROM (%L) TO (%L)',
+                    'cooldowns_p' || to_char(day_start + offset_days, 'YYYYMMDD'),
+                    (day_start + offset_days)::text || ' 00:00:00+00',
+                    (day_start + offset_days + 1)::text || ' 00:00:00+00'
+                );
+            END LOOP;
+        END $$
+    """)
+    op.execute("""
+        INSERT INTO cooldowns (id, user_id, command, expires_at, created_at, updated_at)
+        SELECT id, user_id, command, expires_at, created_at, updated_at
+        FROM cooldowns_plain WHERE expires_at > now()
+    """)
+    op.execute("DROP TABLE cooldowns_plain")
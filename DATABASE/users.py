@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import BigInteger, String, Boolean, Integer, DateTime
+from sqlalchemy import BigInteger, String, Boolean, Integer, DateTime, false
 from sqlalchemy.orm import Mapped, mapped_column
 
 from DATABASE.base import Base, TimestampMixin
@@ -30,6 +30,7 @@ class User(Base, TimestampMixin):
     is_banned: Mapped[bool] = mapped_column(Boolean, default=False)
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False)
     is_moderator: Mapped[bool] = mapped_column(Boolean, default=False)
+    is_blocked: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())  # бот заблокирован пользователем
     
     # Активность
     last_activity: Mapped[datetime] = mapped_column(
@@ -0,0 +1,338 @@
+"""
+Нагрузочный стенд диспетчера: синтетические Update прямо в setup_dispatcher()
+
+Бот работает через записывающую сессию (без сети), БД - локальный SQLite
+(нужен aiosqlite) или одноразовый Postgres через --database-url.
+
+    python -m Deploy.dispatcher_bench --updates 5000 --concurrency 50
+    python -m Deploy.dispatcher_bench --database-url postgresql+asyncpg://bench@localhost/bench_tmp
+    python -m Deploy.dispatcher_bench --baseline Deploy/dispatcher_baseline.json   # CI: код 1 при регрессии
+    python -m Deploy.dispatcher_bench --save-baseline Deploy/dispatcher_baseline.json
+    python -m Deploy.dispatcher_bench --baseline Deploy/dispatcher_baseline.json --tolerance 0.25   # и по времени
+
+Без файла базовой линии --baseline завершается ошибкой, а не пропускает сравнение.
+Регрессией считается рост числа SQL-запросов на обновление; пропускная способность
+и p99 зависят от машины и проверяются только с --tolerance. SQLite выполняет запись
+последовательно и при большом --concurrency отвечает "database is locked" - в CI
+стенд идет с --concurrency 1, параллельную нагрузку имеет смысл мерить на Postgres.
+
+Отчет: пропускная способность, p50/p99 задержки и SQL-запросов на обновление по сценариям.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+SCENARIOS = {
+    # сценарий: (вес, действие метрик)
+    'start': (10, '/start'),
+    'catalog': (30, '/catalog'),
+    'search': (15, '/search'),
+    'vote': (25, 'vote:'),
+    'gorateme': (10, '/gorateme'),
+    'toppeople': (10, '/toppeople'),
+}
+
+_update_ids = itertools.count(1)
+
+
+def message_update(user_id: int, text: str) -> dict:
+    update_id = next(_update_ids)
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f'Bench{user_id}', 'username': f'bench{user_id}'},
+            'text': text,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+            if text.startswith('/') else None,
+        },
+    }
+
+
+def callback_update(user_id: int, data: str) -> dict:
+    update_id = next(_update_ids)
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f'Bench{user_id}'},
+            'chat_instance': str(user_id),
+            'data': data,
+            'message': {
+                'message_id': update_id,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'text': 'bench',
+            },
+        },
+    }
+
+
+def scenario_updates(name: str, user_id: int, rating_post_ids: List[int]) -> List[dict]:
+    """Обновления одного сценария (FSM-сценарии - несколько подряд)"""
+    if name == 'start':
+        return [message_update(user_id, '/start')]
+    if name == 'catalog':
+        return [message_update(user_id, '/catalog')]
+    if name == 'search':
+        return [message_update(user_id, '/search'), message_update(user_id, random.choice(['маникюр', 'массаж', 'фото']))]
+    if name == 'vote':
+        return [callback_update(user_id, f'vote:{random.choice(rating_post_ids)}:{random.randint(-2, 2)}')]
+    if name == 'gorateme':
+        return [message_update(user_id, '/gorateme'), message_update(user_id, 'Bench Name')]
+    return [message_update(user_id, '/toppeople')]
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 2)
+
+
+def make_session_class():
+    from aiogram.client.session.base import BaseSession
+    from aiogram.types import Chat, Message, User
+
+    class RecordingSession(BaseSession):
+        """Сессия бота без сети: записывает вызовы и возвращает правдоподобные ответы"""
+
+        def __init__(self, latency_ms: float = 0.0):
+            super().__init__()
+            self.latency = latency_ms / 1000
+            self.calls: Counter = Counter()
+            self._message_ids = itertools.count(1)
+
+        async def make_request(self, bot, method, timeout=None):
+            self.calls[type(method).__name__] += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            returning = method.__returning__
+            if returning is Message:
+                chat_id = getattr(method, 'chat_id', 0)
+                return Message(
+                    message_id=next(self._message_ids),
+                    date=datetime.now(),
+                    chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type='private'),
+                    text=getattr(method, 'text', None),
+                )
+            if returning is User:
+                return User(id=bot.id, is_bot=True, first_name='TrixBench', username='trixbench_bot')
+            # bool и Union[Message, bool] (edit_*) - достаточно True
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b''
+
+        async def close(self):
+            pass
+
+    return RecordingSession
+
+
+async def seed(users: int, catalog_posts: int, rating_posts: int) -> List[int]:
+    """Схема и данные: пользователи, карточки каталога, одобренные рейтинговые посты"""
+    from sqlalchemy import insert, select
+    from DATABASE.base import Base, engine
+    from DATABASE.users import User
+    from DATABASE.catalog import CatalogPost
+    from DATABASE.games import RatingPost
+    from CORE.config import CATALOG_CATEGORIES
+
+    categories = list(CATALOG_CATEGORIES)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        for start in range(0, users, 5000):
+            await conn.execute(insert(User), [
+                {'id': 10_000_000 + i, 'uid': 100_000 + i, 'first_name': f'Bench{i}'}
+                for i in range(start, min(users, start + 5000))
+            ])
+        await conn.execute(insert(CatalogPost), [
+            {
+                'catalog_number': i + 1,
+                'user_id': 10_000_000 + i % users,
+                'category': categories[i % len(categories)],
+                'name': f'Услуга {i}',
+                'description': 'маникюр массаж фото',
+                'is_active': True,
+                'is_priority': i % 20 == 0,
+            }
+            for i in range(catalog_posts)
+        ])
+        await conn.execute(insert(RatingPost), [
+            {
+                'catalog_number': catalog_posts + i + 1,
+                'name': f'Person {i}',
+                'about': 'bench',
+                'gender': 'girl' if i % 2 else 'boy',
+                'author_user_id': 10_000_000 + i % users,
+                'status': 'approved',
+                'total_score': 0,
+                'vote_count': 0,
+            }
+            for i in range(rating_posts)
+        ])
+        result = await conn.execute(select(RatingPost.id))
+        return [row[0] for row in result.all()]
+
+
+async def run(args) -> dict:
+    from aiogram import Bot
+    from aiogram.types import Update
+    from CORE.dispatcher import setup_dispatcher
+    from DATABASE.base import engine
+    from SERVICES.utils.metrics import ApiTimingMiddleware, instrument_engine, update_metrics
+    from SERVICES.database.vote_pipeline import vote_pipeline
+
+    # Как в main.on_startup: запросы к БД считаются по обновлениям
+    instrument_engine(engine)
+
+    rating_post_ids = await seed(args.users, args.catalog_posts, args.rating_posts)
+
+    session = make_session_class()(latency_ms=args.api_latency_ms)
+    session.middleware(ApiTimingMiddleware())
+    bot = Bot(token=os.environ['BOT_TOKEN'], session=session)
+    dp = setup_dispatcher()
+
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][0] for name in names]
+    user_ids = [10_000_000 + i for i in range(args.users)]
+
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    processed = 0
+
+    async def virtual_user(name: str):
+        nonlocal processed
+        async with semaphore:
+            user_id = random.choice(user_ids)
+            for raw in scenario_updates(name, user_id, rating_post_ids):
+                update = Update.model_validate(raw, context={'bot': bot})
+                started = time.perf_counter()
+                await dp.feed_update(bot, update)
+                latencies[name].append((time.perf_counter() - started) * 1000)
+                processed += 1
+
+    # Прогрев: загрузка пулов, индексов и таблиц лидеров в память
+    await asyncio.gather(*(virtual_user(name) for name in names))
+    for values in latencies.values():
+        values.clear()
+    processed = 0
+    warm_queries = update_metrics.queries.summary()
+
+    plan = random.choices(names, weights=weights, k=args.updates)
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(name) for name in plan))
+    elapsed = time.perf_counter() - started
+    await vote_pipeline.flush()
+
+    queries = update_metrics.queries.summary()
+    scenarios = {}
+    for name in names:
+        action = SCENARIOS[name][1]
+        count, total = queries.get(action, (0, 0.0))
+        warm_count, warm_total = warm_queries.get(action, (0, 0.0))
+        per_update = (total - warm_total) / (count - warm_count) if count > warm_count else 0.0
+        scenarios[name] = {
+            'updates': len(latencies[name]),
+            'p50_ms': percentile(latencies[name], 0.50),
+            'p99_ms': percentile(latencies[name], 0.99),
+            'sql_per_update': round(per_update, 2),
+        }
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    await bot.session.close()
+    await engine.dispose()
+    return {
+        'database': engine.dialect.name,
+        'updates': processed,
+        'seconds': round(elapsed, 3),
+        'throughput_ups': round(processed / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': percentile(all_latencies, 0.50),
+        'p99_ms': percentile(all_latencies, 0.99),
+        'api_calls': dict(session.calls),
+        'scenarios': scenarios,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: Optional[float]) -> List[str]:
+    """Регрессии относительно базовой линии"""
+    problems = []
+    if tolerance is not None:
+        if result['throughput_ups'] < baseline['throughput_ups'] * (1 - tolerance):
+            problems.append(f"throughput {result['throughput_ups']} < {baseline['throughput_ups']} (-{tolerance:.0%})")
+        if result['p99_ms'] > baseline['p99_ms'] * (1 + tolerance):
+            problems.append(f"p99 {result['p99_ms']} мс > {baseline['p99_ms']} мс (+{tolerance:.0%})")
+    for name, base in baseline.get('scenarios', {}).items():
+        current = result['scenarios'].get(name)
+        # Число запросов детерминировано - допуск только на округление
+        if current and current['sql_per_update'] > base['sql_per_update'] + 0.5:
+            problems.append(f"{name}: SQL на обновление {current['sql_per_update']} > {base['sql_per_update']}")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест диспетчера синтетическими обновлениями")
+    parser.add_argument('--database-url', help="По умолчанию - временный файл SQLite")
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--catalog-posts', type=int, default=500)
+    parser.add_argument('--rating-posts', type=int, default=100)
+    parser.add_argument('--api-latency-ms', type=float, default=0.0, help="Имитация задержки Telegram API")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Сохранить результат в JSON")
+    parser.add_argument('--baseline', help="Сравнить с базовой линией (код 1 при регрессии)")
+    parser.add_argument('--save-baseline', help="Записать результат как новую базовую линию")
+    parser.add_argument('--tolerance', type=float, help="Допуск по пропускной способности и p99 (без него время не проверяется)")
+    args = parser.parse_args()
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error(f"базовая линия не найдена: {args.baseline} (создайте ее через --save-baseline)")
+
+    random.seed(args.seed)
+    # Настройки читаются при импорте - окружение задаем до импорта модулей бота
+    os.environ.setdefault('BOT_TOKEN', '123456:dispatcher-bench')
+    os.environ['DATABASE_URL'] = args.database_url or (
+        'sqlite+aiosqlite:///' + os.path.join(tempfile.mkdtemp(prefix='trixbot-bench-'), 'bench.db')
+    )
+    os.environ.setdefault('STATE_BACKEND', 'memory')
+    # Логи каждого обновления искажают замер
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = compare(result, json.load(f), args.tolerance)
+        if problems:
+            for problem in problems:
+                print(f"REGRESSION: {problem}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
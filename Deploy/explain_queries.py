@@ -0,0 +1,378 @@
+"""
+Разбор планов горячих запросов: EXPLAIN для каждого SQL-запроса, который
+выполняют CatalogService, RatingService, UserService и CooldownService
+
+Засевается временная БД (SQLite через aiosqlite или --database-url, схема -
+из моделей), методы сервисов вызываются как в боте, их запросы перехватываются
+(before_cursor_execute) и для каждого уникального запроса строится план:
+Postgres - EXPLAIN (FORMAT JSON), с --analyze для SELECT еще ANALYZE, BUFFERS;
+SQLite - EXPLAIN QUERY PLAN.
+
+    python -m Deploy.explain_queries
+    python -m Deploy.explain_queries --database-url postgresql+asyncpg://bench@localhost/bench_tmp --strict
+    python -m Deploy.explain_queries --database-url ... --no-seqscan --output RESULTS/query_plans.json
+
+Замечания - полный проход таблицы (Seq Scan, SCAN без индекса) и сортировка
+вместо чтения индекса по порядку; --strict возвращает код 1, если они есть.
+Запрос без замечаний помечается как index-only (только покрывающие индексы),
+top-N (LIMIT поверх упорядоченного индекса) или index.
+
+Схема пересоздается (drop_all + create_all), поэтому --database-url должен
+указывать на пустую одноразовую БД; непустая - только с --i-know-this-drops-everything.
+
+На маленькой БД Postgres законно выбирает Seq Scan: --no-seqscan (SET
+enable_seqscan = off) показывает, есть ли у запроса индексный путь вообще.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from Deploy.hotpath_bench import seed_users, seed_catalog
+
+ACCESS_FULL = 'full'
+ACCESS_INDEX = 'index'
+ACCESS_INDEX_ONLY = 'index-only'
+
+VERDICT_INDEX_ONLY = 'index-only'
+VERDICT_TOP_N = 'top-N'
+VERDICT_INDEX = 'index'
+VERDICT_NO_SCAN = 'no-scan'
+VERDICT_ACCEPTED = 'accepted'
+VERDICT_PROBLEM = 'problem'
+
+# Вызовы, чьи замечания ожидаемы (вызов -> причина)
+ACCEPTED_CALLS = {
+    'CatalogService.search_catalog': "ранжирование ts_rank требует сортировки найденных строк",
+    'UserService.get_total_users': "подсчет всех строк читает таблицу или индекс целиком",
+}
+
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+SQLITE_STEP = re.compile(
+    r'^(SCAN|SEARCH)(?: TABLE)? (\w+)(?: AS \w+)?'
+    r'(?: USING (?:(COVERING) )?(?:INDEX (\w+)|(?:INTEGER )?PRIMARY KEY))?'
+)
+
+USER_ID = 10_000_000
+
+
+class StatementCapture:
+    """Запросы, выполненные через engine, с подписью вызвавшего их метода"""
+
+    def __init__(self):
+        self.label: Optional[str] = None
+        # текст запроса -> {'parameters': первые параметры, 'calls': [методы]}
+        self.statements: Dict[str, Dict] = {}
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label is None or executemany:
+            return
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return
+        entry = self.statements.setdefault(statement, {'parameters': parameters, 'calls': []})
+        if self.label not in entry['calls']:
+            entry['calls'].append(self.label)
+
+
+def postgres_accesses(node: Dict, accesses: List[Tuple], sorts: List[str]):
+    """Обход узлов плана Postgres: чтения таблиц и сортировки"""
+    node_type = node['Node Type']
+    relation = node.get('Relation Name')
+    if node_type == 'Seq Scan':
+        accesses.append((ACCESS_FULL, relation, None))
+    elif node_type == 'Index Only Scan':
+        accesses.append((ACCESS_INDEX_ONLY, relation, node['Index Name']))
+    elif node_type == 'Index Scan':
+        accesses.append((ACCESS_INDEX, relation, node['Index Name']))
+    elif node_type == 'Bitmap Heap Scan':
+        indexes = [child.get('Index Name') for child in node.get('Plans', ()) if child.get('Index Name')]
+        accesses.append((ACCESS_INDEX, relation, ','.join(indexes) or None))
+    elif node_type in ('Sort', 'Incremental Sort'):
+        sorts.append(', '.join(node.get('Sort Key', ())))
+    for child in node.get('Plans', ()):
+        postgres_accesses(child, accesses, sorts)
+
+
+def sqlite_accesses(details: List[str], tables: Set[str], accesses: List[Tuple], sorts: List[str]):
+    """Разбор строк EXPLAIN QUERY PLAN (проходы CTE и VALUES - не чтения таблиц)"""
+    for detail in details:
+        if detail.startswith('USE TEMP B-TREE'):
+            sorts.append(detail[len('USE TEMP B-TREE FOR '):])
+            continue
+        match = SQLITE_STEP.match(detail)
+        if not match:
+            continue
+        step, relation, covering, index = match.groups()
+        if relation not in tables:
+            continue
+        if step == 'SCAN' and 'USING' not in detail:
+            accesses.append((ACCESS_FULL, relation, None))
+        elif covering:
+            accesses.append((ACCESS_INDEX_ONLY, relation, index))
+        else:
+            accesses.append((ACCESS_INDEX, relation, index or 'PRIMARY KEY'))
+
+
+def verdict(statement: str, calls: List[str], accesses: List[Tuple], sorts: List[str]) -> Tuple[str, List[str]]:
+    """Оценка плана и список замечаний"""
+    problems = [f"полный проход {relation}" for kind, relation, _ in accesses if kind == ACCESS_FULL]
+    problems += [f"сортировка {key}" for key in sorts]
+    if problems:
+        if all(call in ACCEPTED_CALLS for call in calls):
+            return VERDICT_ACCEPTED, problems
+        return VERDICT_PROBLEM, problems
+    if not accesses:
+        return VERDICT_NO_SCAN, []
+    if all(kind == ACCESS_INDEX_ONLY for kind, _, _ in accesses):
+        return VERDICT_INDEX_ONLY, []
+    if re.search(r'\bLIMIT\b', statement, re.IGNORECASE):
+        return VERDICT_TOP_N, []
+    return VERDICT_INDEX, []
+
+
+async def explain(conn, statement: str, parameters, tables: Set[str], analyze: bool) -> Dict:
+    accesses: List[Tuple] = []
+    sorts: List[str] = []
+    if conn.dialect.name == 'postgresql':
+        is_select = statement.lstrip().upper().startswith('SELECT')
+        options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze and is_select else 'FORMAT JSON'
+        raw = (await conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters)).scalar()
+        plan = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        postgres_accesses(plan[0]['Plan'], accesses, sorts)
+    else:
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        plan = [row[-1] for row in result.all()]
+        sqlite_accesses(plan, tables, accesses, sorts)
+    return {'plan': plan, 'accesses': accesses, 'sorts': sorts}
+
+
+async def seed_extras(catalog_size: int) -> int:
+    """Отзывы, кулдауны и заявка на модерации; возвращает id заявки"""
+    from sqlalchemy import delete, insert, select
+    from DATABASE.base import engine
+    from DATABASE.catalog import CatalogPost, CatalogReview
+    from DATABASE.games import RatingPost, Cooldown
+
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        await conn.execute(delete(CatalogReview))
+        await conn.execute(delete(Cooldown))
+        post_ids = (await conn.execute(select(CatalogPost.id).limit(500))).scalars().all()
+        await conn.execute(insert(CatalogReview), [
+            {
+                'catalog_post_id': post_id,
+                'user_id': USER_ID + i % 100,
+                'username': f'bench{i % 100}',
+                'review_text': 'Отличная услуга',
+                'rating': 1 + i % 5,
+                'approved': i % 3 != 0,
+            }
+            for i, post_id in enumerate(post_ids * 4)
+        ])
+        await conn.execute(insert(Cooldown), [
+            {
+                'user_id': USER_ID + i,
+                'command': 'gorateme' if i % 2 else 'review',
+                # Половина уже истекла - есть что вычищать
+                'expires_at': now + timedelta(hours=1 if i % 2 else -1),
+            }
+            for i in range(1000)
+        ])
+        return (await conn.execute(
+            insert(RatingPost).values(
+                catalog_number=catalog_size + 1,
+                name='Pending',
+                about='bench',
+                gender='girl',
+                author_user_id=USER_ID,
+                status='pending',
+            ).returning(RatingPost.id)
+        )).scalar_one()
+
+
+def service_calls(uid: int, rating_post_id: int, pending_post_id: int
+                  ) -> List[Tuple[str, Callable[..., Awaitable]]]:
+    """(метод, вызов(session)) - все пути, которые бот проходит через сервисы"""
+    from SERVICES.database.catalog_service import CatalogService
+    from SERVICES.database.rating_service import RatingService
+    from SERVICES.database.user_service import UserService
+    from SERVICES.database.vote_pipeline import vote_pipeline
+    from SERVICES.database.uid_allocator import uid_allocator
+    from SERVICES.database.catalog_numbers import catalog_numbers
+    from SERVICES.utils.cooldown import CooldownService
+    from CORE.config import CATALOG_CATEGORIES
+
+    async def pages(session, category=None):
+        # Первая страница, следующая и возврат назад - все три формы keyset-запроса
+        _, _, next_cursor, _ = await CatalogService.list_catalog_page(session, category=category)
+        if next_cursor:
+            _, _, _, prev_cursor = await CatalogService.list_catalog_page(session, cursor=next_cursor)
+            if prev_cursor:
+                await CatalogService.list_catalog_page(session, cursor=prev_cursor)
+
+    async def reserve(reservation, allocator):
+        async with reservation as number:
+            pass
+        allocator.pool.release(number)
+
+    async def vote(session):
+        await RatingService.vote_for_post(session, rating_post_id, USER_ID + 1, 1)
+        await vote_pipeline.flush()
+
+    return [
+        ('CatalogService.get_catalog_slots', lambda s: CatalogService.get_catalog_slots(s, USER_ID)),
+        ('CatalogService.search_catalog', lambda s: CatalogService.search_catalog(s, 'маникюр')),
+        ('CatalogService.list_catalog_page', pages),
+        ('CatalogService.list_catalog_page(category)', lambda s: pages(s, next(iter(CATALOG_CATEGORIES)))),
+        ('CatalogService.get_post_by_number', lambda s: CatalogService.get_post_by_number(s, 42)),
+        ('CatalogService.get_user_reviews', lambda s: CatalogService.get_user_reviews(s, USER_ID)),
+        ('CatalogService.reserve_catalog_number',
+         lambda s: reserve(CatalogService.reserve_catalog_number(s), catalog_numbers)),
+        ('RatingService.get_top_ratings', lambda s: RatingService.get_top_ratings(s)),
+        ('RatingService.get_top_ratings(gender)', lambda s: RatingService.get_top_ratings(s, gender='girl')),
+        ('RatingService.create_rating_post', lambda s: RatingService.create_rating_post(
+            s, USER_ID, 'bench', 'Explain', None, 'bench', 'boy', 'photo', 'file-id'
+        )),
+        ('RatingService.vote_for_post', vote),
+        ('RatingService.approve_rating_post',
+         lambda s: RatingService.approve_rating_post(s, pending_post_id, 'https://t.me/bench/1')),
+        ('UserService.get_or_create_user', lambda s: UserService.get_or_create_user(s, USER_ID)),
+        ('UserService.get_or_create_user(new)', lambda s: UserService.get_or_create_user(s, 1, 'explain')),
+        ('UserService.get_user_by_uid', lambda s: UserService.get_user_by_uid(s, uid)),
+        ('uid_allocator.reserve', lambda s: reserve(uid_allocator.reserve(s), uid_allocator)),
+        ('UserService.get_total_users', UserService.get_total_users),
+        ('CooldownService.check_cooldown', lambda s: CooldownService.check_cooldown(s, USER_ID, 'gorateme')),
+        ('CooldownService.set_cooldown', lambda s: CooldownService.set_cooldown(s, USER_ID, 'gorateme')),
+        ('CooldownService.purge_expired', CooldownService.purge_expired),
+    ]
+
+
+async def run(args) -> Dict:
+    from sqlalchemy import event, inspect, select
+    from DATABASE.base import Base, engine, async_session_maker
+    from DATABASE.users import User
+    from DATABASE.games import RatingPost
+    # Все модели в метаданных до create_all
+    from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+
+    # Стенд пересоздает схему: чужую БД с таблицами не трогаем без явного согласия
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+    if tables and not args.drop_everything:
+        await engine.dispose()
+        raise SystemExit(
+            f"В БД уже есть таблицы ({len(tables)}), стенд удалит их все. "
+            f"Укажите пустую БД или --i-know-this-drops-everything"
+        )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    await seed_users(args.users)
+    await seed_catalog(args.catalog, args.rating_posts)
+    pending_post_id = await seed_extras(args.catalog)
+
+    if engine.dialect.name == 'postgresql':
+        # Статистика планировщика и карта видимости (для index-only scan)
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level='AUTOCOMMIT')
+            await conn.exec_driver_sql('VACUUM ANALYZE')
+
+    async with async_session_maker() as session:
+        uid = await session.scalar(select(User.uid).where(User.id == USER_ID))
+        rating_post_id = await session.scalar(
+            select(RatingPost.id).where(RatingPost.status == 'approved').limit(1)
+        )
+
+    capture = StatementCapture()
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    failed = []
+    try:
+        for label, call in service_calls(uid, rating_post_id, pending_post_id):
+            capture.label = label
+            try:
+                async with async_session_maker() as session:
+                    await call(session)
+            except Exception as e:
+                failed.append(f"{label}: {e}")
+    finally:
+        capture.label = None
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+
+    statements = []
+    async with engine.connect() as conn:
+        if args.no_seqscan and engine.dialect.name == 'postgresql':
+            await conn.exec_driver_sql('SET enable_seqscan = off')
+        for statement, entry in capture.statements.items():
+            plan = await explain(conn, statement, entry['parameters'], set(Base.metadata.tables), args.analyze)
+            result, problems = verdict(statement, entry['calls'], plan['accesses'], plan['sorts'])
+            statements.append({
+                'calls': entry['calls'],
+                'statement': statement,
+                'verdict': result,
+                'problems': problems,
+                'reason': ACCEPTED_CALLS.get(entry['calls'][0]) if result == VERDICT_ACCEPTED else None,
+                'accesses': [list(access) for access in plan['accesses']],
+                'plan': plan['plan'],
+            })
+        # Откат: EXPLAIN ANALYZE не должен ничего оставить
+        await conn.rollback()
+
+    await engine.dispose()
+    return {'database': engine.dialect.name, 'failed_calls': failed, 'statements': statements}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="EXPLAIN для запросов сервисов БД")
+    parser.add_argument('--database-url', help="По умолчанию - временный файл SQLite")
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--catalog', type=int, default=5000, help="Карточек каталога и рейтинговых постов (до 9998)")
+    parser.add_argument('--rating-posts', type=int, default=200)
+    parser.add_argument('--analyze', action='store_true', help="EXPLAIN ANALYZE для SELECT (Postgres)")
+    parser.add_argument('--no-seqscan', action='store_true', help="SET enable_seqscan = off (Postgres)")
+    parser.add_argument('--strict', action='store_true', help="Код 1, если есть замечания")
+    parser.add_argument('--output', help="Сохранить планы в JSON")
+    parser.add_argument(
+        '--i-know-this-drops-everything', dest='drop_everything', action='store_true',
+        help="Разрешить запуск на непустой БД (все таблицы будут удалены)"
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault('BOT_TOKEN', '123456:explain-queries')
+    os.environ['DATABASE_URL'] = args.database_url or (
+        'sqlite+aiosqlite:///' + os.path.join(tempfile.mkdtemp(prefix='trixbot-explain-'), 'explain.db')
+    )
+
+    result = asyncio.run(run(args))
+    for row in result['statements']:
+        statement = ' '.join(row['statement'].split())
+        indexes = ', '.join(sorted({access[2] for access in row['accesses'] if access[2]}))
+        print(f"[{row['verdict']:<10}] {', '.join(row['calls'])}")
+        print(f"             {statement[:160]}")
+        if indexes:
+            print(f"             индексы: {indexes}")
+        for problem in row['problems']:
+            print(f"             ! {problem}")
+        if row['reason']:
+            print(f"             ({row['reason']})")
+    for failure in result['failed_calls']:
+        print(f"FAILED: {failure}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2, default=str)
+
+    problems = [row for row in result['statements'] if row['verdict'] == VERDICT_PROBLEM]
+    print(f"\nЗапросов: {len(result['statements'])}, с замечаниями: {len(problems)}")
+    return 1 if args.strict and (problems or result['failed_calls']) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
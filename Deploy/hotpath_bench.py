@@ -0,0 +1,296 @@
+"""
+Микробенчмарки горячих путей: выдача UID и номеров каталога, слоты каталога, поиск
+
+Для каждого размера данных засевается временная БД (SQLite через aiosqlite
+или --database-url), затем замеряются:
+- холодный вызов (загрузка пулов/индексов в память) и его пик памяти (tracemalloc);
+- теплые вызовы: среднее и p99 в микросекундах, байт выделено на вызов.
+
+    python -m Deploy.hotpath_bench
+    python -m Deploy.hotpath_bench --users 10000,100000,1000000 --catalog 1000,5000,9999
+    python -m Deploy.hotpath_bench --baseline Deploy/hotpath_baseline.json   # код 1 при регрессии
+    python -m Deploy.hotpath_bench --users 10000,100000 --catalog 1000,9999 \
+        --save-baseline Deploy/hotpath_baseline.json                          # обновить базовую линию
+
+Без файла базовой линии --baseline завершается ошибкой, а не пропускает сравнение.
+Регрессия - рост памяти: пик холодной загрузки и байт на теплый вызов (tracemalloc
+считает одинаково на любой машине). Время выводится в отчет, а сравнивается с базовой
+линией только с --timing-tolerance: на общих CI-раннерах оно шумит в разы.
+
+Пространство UID ограничено MAX_UID (99999 без зарезервированных), поэтому
+размеры пользователей выше емкости засеваются до полного исчерпания -
+это и есть замер стоимости отказа при исчерпании UID.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from Deploy.dispatcher_bench import percentile
+
+SEARCH_QUERIES = ['маникюр', 'массаж', 'фото', 'услуга 42', 'стриж', 'english']
+
+
+async def measure(
+    name: str,
+    cold: Callable[[], Awaitable],
+    warm: Callable[[], Awaitable],
+    iterations: int,
+    alloc_iterations: int
+) -> Dict:
+    """Холодный вызов с пиком памяти, затем теплые вызовы"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    await cold()
+    cold_ms = (time.perf_counter() - started) * 1000
+    _, cold_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await warm()
+        timings.append((time.perf_counter() - started) * 1_000_000)
+
+    # Аллокации отдельно: tracemalloc заметно искажает время
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(alloc_iterations):
+        await warm()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'path': name,
+        'cold_ms': round(cold_ms, 2),
+        'cold_peak_kb': round(cold_peak / 1024, 1),
+        'mean_us': round(sum(timings) / len(timings), 1),
+        'p99_us': percentile(timings, 0.99),
+        'alloc_bytes_per_call': round((peak - before) / alloc_iterations, 1),
+        'retained_bytes': max(0, after - before),
+    }
+
+
+async def seed_users(count: int) -> int:
+    """Пользователи с UID по порядку (не больше емкости пространства UID)"""
+    from sqlalchemy import delete, insert
+    from DATABASE.base import engine
+    from DATABASE.users import User
+    from CORE.config import settings
+
+    reserved = set(settings.RESERVED_UIDS)
+    uids = (uid for uid in range(settings.MIN_UID, settings.MAX_UID + 1) if uid not in reserved)
+    rows = []
+    for i, uid in zip(range(count), uids):
+        rows.append({'id': 10_000_000 + i, 'uid': uid, 'first_name': f'Bench{i}'})
+
+    async with engine.begin() as conn:
+        await conn.execute(delete(User))
+        for start in range(0, len(rows), 10_000):
+            await conn.execute(insert(User), rows[start:start + 10_000])
+    return len(rows)
+
+
+async def seed_catalog(count: int, rating_posts: int):
+    """Карточки каталога и рейтинговые посты, вместе занимающие count номеров"""
+    from sqlalchemy import delete, insert
+    from DATABASE.base import engine
+    from DATABASE.catalog import CatalogPost
+    from DATABASE.games import RatingPost
+    from CORE.config import CATALOG_CATEGORIES
+
+    categories = list(CATALOG_CATEGORIES)
+    rating_posts = min(rating_posts, count // 10)
+    catalog_posts = count - rating_posts
+
+    async with engine.begin() as conn:
+        await conn.execute(delete(RatingPost))
+        await conn.execute(delete(CatalogPost))
+        for start in range(0, catalog_posts, 5000):
+            await conn.execute(insert(CatalogPost), [
+                {
+                    'catalog_number': i + 1,
+                    'user_id': 10_000_000,
+                    'category': categories[i % len(categories)],
+                    'name': f'Услуга {i}',
+                    'description': ['маникюр и педикюр', 'массаж спины', 'фото и видео', 'стрижки'][i % 4],
+                    'is_active': True,
+                    'is_priority': i % 20 == 0,
+                }
+                for i in range(start, min(catalog_posts, start + 5000))
+            ])
+        if rating_posts:
+            await conn.execute(insert(RatingPost), [
+                {
+                    'catalog_number': catalog_posts + i + 1,
+                    'name': f'Person {i}',
+                    'about': 'bench',
+                    'gender': 'girl' if i % 2 else 'boy',
+                    'author_user_id': 10_000_000,
+                    'status': 'approved',
+                }
+                for i in range(rating_posts)
+            ])
+
+
+async def run(args) -> Dict:
+    from DATABASE.base import Base, engine, async_session_maker
+    from SERVICES.database.catalog_service import CatalogService
+    from SERVICES.database.uid_allocator import uid_allocator
+    from SERVICES.database.catalog_numbers import catalog_numbers
+    from SERVICES.database.slot_pool import slot_pools
+    from SERVICES.database.search_service import search_index
+    # Все модели в метаданных до create_all
+    from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    results: Dict[str, Dict] = {}
+
+    async def reserve(reservation, allocator):
+        # Резерв без вставки: номер сразу возвращаем в пул - заполненность
+        # не меняется между итерациями
+        try:
+            async with reservation as number:
+                pass
+            allocator.pool.release(number)
+        except ValueError:
+            pass  # пул исчерпан - замеряем стоимость отказа
+
+    for size in args.users:
+        seeded = await seed_users(size)
+        async with async_session_maker() as session:
+            results[f'reserve_uid/{size}'] = {
+                'seeded_users': seeded,
+                **await measure(
+                    'reserve_uid',
+                    cold=lambda: uid_allocator.reload(session),
+                    warm=lambda: reserve(uid_allocator.reserve(session), uid_allocator),
+                    iterations=args.iterations,
+                    alloc_iterations=args.alloc_iterations,
+                ),
+            }
+
+    await seed_users(min(args.users))
+    for size in args.catalog:
+        await seed_catalog(size, args.rating_posts)
+        async with async_session_maker() as session:
+            user_id = 10_000_000
+            results[f'reserve_catalog_number/{size}'] = await measure(
+                'reserve_catalog_number',
+                cold=lambda: catalog_numbers.reload(session),
+                warm=lambda: reserve(CatalogService.reserve_catalog_number(session), catalog_numbers),
+                iterations=args.iterations,
+                alloc_iterations=args.alloc_iterations,
+            )
+            results[f'get_catalog_slots/{size}'] = await measure(
+                'get_catalog_slots',
+                cold=lambda: slot_pools.reload(session),
+                warm=lambda: CatalogService.get_catalog_slots(session, user_id),
+                iterations=args.iterations,
+                alloc_iterations=args.alloc_iterations,
+            )
+            queries = iter(SEARCH_QUERIES * (args.iterations + args.alloc_iterations))
+            results[f'search_catalog/{size}'] = await measure(
+                'search_catalog',
+                cold=lambda: search_index.reload(session),
+                warm=lambda: CatalogService.search_catalog(session, next(queries)),
+                iterations=args.iterations,
+                alloc_iterations=args.alloc_iterations,
+            )
+
+    await engine.dispose()
+    return {'database': engine.dialect.name, 'results': results}
+
+
+# Метрика: минимум, от которого считается допуск (мелкие значения шумят)
+MEMORY_METRICS = {'cold_peak_kb': 64.0, 'alloc_bytes_per_call': 256.0}
+TIMING_METRICS = {'mean_us': 1.0, 'p99_us': 1.0, 'cold_ms': 1.0}
+
+
+def compare(
+    result: Dict,
+    baseline: Dict,
+    tolerance: float,
+    timing_tolerance: Optional[float] = None
+) -> List[str]:
+    """Регрессии по памяти, а с timing_tolerance - и по времени"""
+    checks = [(MEMORY_METRICS, tolerance)]
+    if timing_tolerance is not None:
+        checks.append((TIMING_METRICS, timing_tolerance))
+
+    problems = []
+    for key, base in baseline.get('results', {}).items():
+        current = result['results'].get(key)
+        if current is None:
+            continue
+        for metrics, allowed in checks:
+            for metric, floor in metrics.items():
+                limit = max(base[metric], floor) * (1 + allowed)
+                if current[metric] > limit:
+                    problems.append(f"{key} {metric}: {current[metric]} > {base[metric]} (+{allowed:.0%})")
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Микробенчмарки выдачи номеров, слотов и поиска")
+    parser.add_argument('--database-url', help="По умолчанию - временный файл SQLite")
+    parser.add_argument('--users', default='10000,100000,1000000', help="Размеры таблицы users через запятую")
+    parser.add_argument('--catalog', default='1000,5000,9999', help="Занятых номеров каталога через запятую")
+    parser.add_argument('--rating-posts', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=500)
+    parser.add_argument('--alloc-iterations', type=int, default=100)
+    parser.add_argument('--output', help="Сохранить результат в JSON")
+    parser.add_argument('--baseline', help="Сравнить с базовой линией (код 1 при регрессии)")
+    parser.add_argument('--save-baseline', help="Записать результат как новую базовую линию")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Допуск по памяти")
+    parser.add_argument('--timing-tolerance', type=float, help="Допуск по времени (без него время не проверяется)")
+    args = parser.parse_args()
+    if args.baseline and not os.path.exists(args.baseline):
+        parser.error(f"базовая линия не найдена: {args.baseline} (создайте ее через --save-baseline)")
+    args.users = [int(size) for size in args.users.split(',')]
+    args.catalog = [int(size) for size in args.catalog.split(',')]
+
+    os.environ.setdefault('BOT_TOKEN', '123456:hotpath-bench')
+    os.environ['DATABASE_URL'] = args.database_url or (
+        'sqlite+aiosqlite:///' + os.path.join(tempfile.mkdtemp(prefix='trixbot-hotpath-'), 'bench.db')
+    )
+    # Сервисы пишут DEBUG на каждый вызов - в замер это не входит
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+
+    result = asyncio.run(run(args))
+    for key, row in result['results'].items():
+        print(
+            f"{key:<34} cold {row['cold_ms']:>9.2f} мс / {row['cold_peak_kb']:>9.1f} КБ   "
+            f"warm {row['mean_us']:>9.1f} мкс (p99 {row['p99_us']:>9.1f})   "
+            f"{row['alloc_bytes_per_call']:>9.1f} Б/вызов"
+        )
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = compare(result, json.load(f), args.tolerance, args.timing_tolerance)
+        if problems:
+            for problem in problems:
+                print(f"REGRESSION: {problem}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Нагрузочный стенд webhook: POST синтетических обновлений и замер задержки
+
+Локально (сервер поднимается в процессе, обработчик без обращений к Telegram):
+    python -m Deploy.webhook_bench --updates 2000 --concurrency 50
+
+Против запущенного бота (RUN_MODE=webhook):
+    python -m Deploy.webhook_bench --url http://127.0.0.1:8080/webhook --secret $WEBHOOK_SECRET
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from loguru import logger
+
+from CORE.webhook import SECRET_HEADER, create_webhook_app
+
+BENCH_TOKEN = '123456:bench-token'
+BENCH_SECRET = 'bench-secret'
+
+
+def synthetic_update(update_id: int, text: str = '/bench') -> dict:
+    user_id = 100000 + update_id % 1000
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Bench'},
+            'text': text,
+        },
+    }
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda p: round(values[min(len(values) - 1, int(len(values) * p))], 2)
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'max': round(values[-1], 2)}
+
+
+async def post_updates(
+    url: str,
+    secret: str,
+    updates: int,
+    concurrency: int,
+    sent: Dict[int, float]
+) -> Dict[int, int]:
+    """Отправить обновления; вернуть счетчик HTTP-статусов"""
+    statuses: Dict[int, int] = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for update_id in range(1, updates + 1):
+        queue.put_nowait(update_id)
+
+    async with aiohttp.ClientSession(headers={SECRET_HEADER: secret}) as http:
+        async def worker():
+            while not queue.empty():
+                update_id = queue.get_nowait()
+                sent[update_id] = time.perf_counter()
+                async with http.post(url, json=synthetic_update(update_id)) as response:
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses
+
+
+async def run_local(args) -> dict:
+    """Сервер в процессе: задержка от отправки POST до завершения обработчика"""
+    sent: Dict[int, float] = {}
+    done: Dict[int, float] = {}
+    finished = asyncio.Event()
+
+    dp = Dispatcher()
+
+    @dp.message()
+    async def bench_handler(message: Message):
+        if args.handler_ms:
+            await asyncio.sleep(args.handler_ms / 1000)
+        done[message.message_id] = time.perf_counter()
+        if len(done) >= args.updates:
+            finished.set()
+
+    bot = Bot(token=BENCH_TOKEN)
+    app = create_webhook_app(
+        dp, bot,
+        secret=BENCH_SECRET,
+        path='/webhook',
+        max_concurrency=args.max_concurrency,
+        max_pending=args.max_pending
+    )
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', args.port)
+    await site.start()
+
+    try:
+        started = time.perf_counter()
+        statuses = await post_updates(
+            f'http://127.0.0.1:{args.port}/webhook', BENCH_SECRET,
+            args.updates, args.concurrency, sent
+        )
+        accepted = statuses.get(200, 0)
+        if accepted:
+            try:
+                await asyncio.wait_for(finished.wait(), timeout=args.timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Обработано {len(done)} из {accepted} принятых обновлений")
+        elapsed = time.perf_counter() - started
+
+        latencies = [(done[i] - sent[i]) * 1000 for i in done if i in sent]
+        return {
+            'statuses': statuses,
+            'processed': len(done),
+            'throughput_rps': round(len(done) / elapsed, 1) if elapsed else 0.0,
+            'end_to_end_ms': percentiles(latencies),
+            'server': app['gate'].get_metrics(),
+        }
+    finally:
+        await runner.cleanup()
+        await bot.session.close()
+
+
+async def run_remote(args) -> dict:
+    """Внешний сервер: задержка ответа и метрики из /healthz"""
+    sent: Dict[int, float] = {}
+    started = time.perf_counter()
+    statuses = await post_updates(args.url, args.secret, args.updates, args.concurrency, sent)
+    elapsed = time.perf_counter() - started
+
+    health_url = args.url.rsplit('/', 1)[0] + '/healthz'
+    server: Optional[dict] = None
+    async with aiohttp.ClientSession() as http:
+        async with http.get(health_url) as response:
+            if response.status == 200:
+                server = await response.json()
+    return {
+        'statuses': statuses,
+        'throughput_rps': round(args.updates / elapsed, 1) if elapsed else 0.0,
+        'server': server,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер задержки обработки обновлений через webhook")
+    parser.add_argument('--url', help="URL webhook запущенного бота (без него - локальный сервер)")
+    parser.add_argument('--secret', default='', help="Секрет webhook для --url")
+    parser.add_argument('--updates', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=20, help="Параллельных POST")
+    parser.add_argument('--port', type=int, default=8181)
+    parser.add_argument('--handler-ms', type=float, default=0.0, help="Имитация работы обработчика")
+    parser.add_argument('--max-concurrency', type=int, default=32)
+    parser.add_argument('--max-pending', type=int, default=1000)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    args = parser.parse_args()
+
+    result = asyncio.run(run_remote(args) if args.url else run_local(args))
+    for key, value in result.items():
+        logger.info(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from typing import Optional
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+
+def get_catalog_navigation(
+    current_page: int = 0,
+    total_pages: int = 1,
+    next_cursor: Optional[str] = None,
+    prev_cursor: Optional[str] = None
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура навигации по каталогу.
+    С курсорами (keyset-пагинация) общее число страниц не известно,
+    кнопки строятся по наличию курсоров.
+    """
+    keyboard = []
+    cursor_mode = next_cursor is not None or prev_cursor is not None
+    
+    # Кнопки навигации
+    nav_row = []
+    if cursor_mode:
+        if prev_cursor:
+            nav_row.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"catalog_page:{prev_cursor}"))
+        nav_row.append(InlineKeyboardButton(text=f"{current_page+1}", callback_data="catalog_current"))
+        if next_cursor:
+            nav_row.append(InlineKeyboardButton(text="Вперед ➡️", callback_data=f"catalog_page:{next_cursor}"))
+    else:
+        if current_page > 0:
+            nav_row.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"catalog_page:{current_page-1}"))
+        
+        nav_row.append(InlineKeyboardButton(text=f"{current_page+1}/{total_pages}", callback_data="catalog_current"))
+        
+        if current_page < total_pages - 1:
+            nav_row.append(InlineKeyboardButton(text="Вперед ➡️", callback_data=f"catalog_page:{current_page+1}"))
+    
+    if nav_row:
+        keyboard.append(nav_row)
+    
+    # Дополнительные действия
+    keyboard.append([
+        InlineKeyboardButton(text="🔍 Поиск", callback_data="catalog_search"),
+        InlineKeyboardButton(text="📂 Категории", callback_data="catalog_categories")
+    ])
+    
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_post_actions(catalog_number: int) -> InlineKeyboardMarkup:
+    """Клавиатура действий с карточкой"""
+    keyboard = [
+        [
+            InlineKeyboardButton(text="💬 Оставить отзыв", callback_data=f"review:{catalog_number}"),
+            InlineKeyboardButton(text="📊 Статистика", callback_data=f"stats:{catalog_number}")
+        ],
+        [
+            InlineKeyboardButton(text="🔗 Открыть пост", url=f"https://t.me/catalogtrix/{catalog_number}")
+        ]
+    ]
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_categories_keyboard() -> InlineKeyboardMarkup:
+    """Клавиатура категорий каталога"""
+    from CORE.config import CATALOG_CATEGORIES
+    
+    keyboard = []
+    
+    for category_name in CATALOG_CATEGORIES.keys():
+        keyboard.append([
+            InlineKeyboardButton(
+                text=category_name,
+                callback_data=f"category:{category_name}"
+            )
+        ])
+    
+    keyboard.append([
+        InlineKeyboardButton(text="🔙 Назад", callback_data="catalog_back")
+    ])
+    
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+def get_follow_keyboard(followed) -> InlineKeyboardMarkup:
+    """Клавиатура подписок на категории (✅ - подписан)"""
+    from CORE.config import CATALOG_CATEGORIES
+    
+    keyboard = []
+    
+    for index, category_name in enumerate(CATALOG_CATEGORIES.keys()):
+        mark = "✅" if category_name in followed else "➕"
+        keyboard.append([
+            InlineKeyboardButton(
+                text=f"{mark} {category_name}",
+                callback_data=f"follow:{index}"
+            )
+        ])
+    
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
@@ -0,0 +1,23 @@
+from typing import Dict, List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from DATABASE.games import RatingPost
+from SERVICES.database.user_service import UserService
+
+class AdminService:
+    """Сервис админ-панели"""
+    
+    @staticmethod
+    async def get_pending_moderation(session: AsyncSession, limit: int = 50) -> List[Dict[str, str]]:
+        """Заявки, ожидающие модерации (старые первыми)"""
+        result = await session.execute(
+            select(RatingPost.name)
+            .where(RatingPost.status == 'pending')
+            .order_by(RatingPost.created_at)
+            .limit(limit)
+        )
+        return [{'type': 'rating', 'name': name} for name in result.scalars()]
+    
+    @staticmethod
+    async def change_user_uid(session: AsyncSession, current_uid: int, new_uid: int) -> tuple[bool, str]:
+        return await UserService.change_user_uid(session, current_uid, new_uid)
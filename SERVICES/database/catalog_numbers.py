@@ -0,0 +1,16 @@
+from DATABASE.catalog import CatalogPost
+from DATABASE.games import RatingPost
+from CORE.config import settings
+from SERVICES.utils.number_pool import FreeNumberPool
+from SERVICES.database.number_allocator import NumberAllocator
+from SERVICES.database.seen_posts import seen_posts
+
+# Общий пул номеров 1-9999 для каталога и рейтинга.
+# Освобожденный номер снимается с карт просмотренного: его получит новая карточка
+catalog_numbers = NumberAllocator(
+    'catalog',
+    FreeNumberPool(1, settings.MAX_CATALOG_NUMBER),
+    on_release=seen_posts.forget
+)
+catalog_numbers.track(CatalogPost, 'catalog_number')
+catalog_numbers.track(RatingPost, 'catalog_number')
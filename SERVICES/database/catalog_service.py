@@ -1,10 +1,18 @@
 import random
-from typing import List, Optional
-from sqlalchemy import select, or_, func
+from typing import List, Optional, Tuple
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 from DATABASE.catalog import CatalogPost, CatalogReview
-from DATABASE.games import RatingPost
+from SERVICES.utils.counters import counter_buffer
+from SERVICES.utils.cursor import CatalogCursor, encode_cursor, decode_cursor, FORWARD, BACKWARD
+from SERVICES.database.catalog_numbers import catalog_numbers
+from SERVICES.database.search_service import SearchService
+from SERVICES.database.seen_posts import seen_posts
+from ANALYTICS.event_log import event_recorder, EVENT_CATALOG_VIEW
+from SERVICES.database.slot_pool import (
+    slot_pools, POOL_REGULAR, POOL_PRIORITY, POOL_TOPGIRLS, POOL_TOPBOYS
+)
 
 class CatalogService:
     """Сервис для работы с каталогом"""
@@ -17,86 +25,136 @@ class CatalogService:
         Slot 3: TopGirls/TopBoys
         Slot 4: Приоритетные/Реклама
         Slot 5: Специальный слот
+        Уже просмотренные карточки пропускаются по битовой карте пользователя.
         """
-        slots = []
+        await slot_pools.ensure_loaded(session)
+        seen = await seen_posts.get(session, user_id)
+        unseen = slot_pools.unseen(seen)
         
         # Slot 1-2: Обычные услуги
-        result = await session.execute(
-            select(CatalogPost)
-            .where(CatalogPost.is_active == True)
-            .where(CatalogPost.is_priority == False)
-            .where(CatalogPost.is_ad == False)
-            .order_by(func.random())
-            .limit(2)
-        )
-        slots.extend(result.scalars().all())
+        slot_ids = slot_pools.sample(POOL_REGULAR, 2, skip=unseen)
         
         # Slot 3: TopGirls или TopBoys (случайно)
-        gender = random.choice(['girl', 'boy'])
-        result = await session.execute(
-            select(RatingPost)
-            .where(RatingPost.status == 'approved')
-            .where(RatingPost.gender == gender)
-            .order_by(func.random())
-            .limit(1)
-        )
-        rating_post = result.scalar_one_or_none()
-        if rating_post:
+        gender = random.choice([POOL_TOPGIRLS, POOL_TOPBOYS])
+        rating_ids = slot_pools.sample(gender, 1)
+        if rating_ids:
             # Конвертируем в формат слота (опционально)
             pass
         
         # Slot 4: Приоритетные/Реклама
+        slot_ids.extend(slot_pools.sample(POOL_PRIORITY, 1, skip=unseen))
+        
+        # Slot 5: Обычный пост если нет специального
+        if len(slot_ids) < 5:
+            slot_ids.extend(slot_pools.sample_active(5 - len(slot_ids), exclude=slot_ids, skip=unseen))
+        
+        # Непросмотренных не хватило (выборка выше исчерпывающая) - добираем
+        # просмотренными; круг начинается заново, только когда новых не осталось вовсе
+        if len(slot_ids) < 4:
+            if not slot_ids:
+                seen_posts.reset(user_id)
+            slot_ids.extend(slot_pools.sample_active(4 - len(slot_ids), exclude=slot_ids))
+        
+        if not slot_ids:
+            return []
+        
+        # Строки целиком - одним запросом по выбранным id
         result = await session.execute(
             select(CatalogPost)
+            .where(CatalogPost.id.in_(slot_ids))
             .where(CatalogPost.is_active == True)
-            .where(or_(CatalogPost.is_priority == True, CatalogPost.is_ad == True))
-            .order_by(func.random())
-            .limit(1)
         )
-        priority = result.scalar_one_or_none()
-        if priority:
-            slots.append(priority)
+        posts_by_id = {post.id: post for post in result.scalars().all()}
         
-        # Slot 5: Обычный пост если нет специального
-        if len(slots) < 5:
-            result = await session.execute(
-                select(CatalogPost)
-                .where(CatalogPost.is_active == True)
-                .order_by(func.random())
-                .limit(5 - len(slots))
-            )
-            slots.extend(result.scalars().all())
+        # id, которых уже нет среди активных, убираем из пулов
+        for post_id in slot_ids:
+            if post_id not in posts_by_id:
+                slot_pools.discard_catalog_post(post_id)
+        
+        slots = [posts_by_id[post_id] for post_id in slot_ids if post_id in posts_by_id]
         
         # Рандомизируем порядок слотов
         random.shuffle(slots)
         
-        # Увеличиваем счетчик просмотров
+        # Увеличиваем счетчик просмотров (запись в БД - пакетом по расписанию)
+        counter_buffer.incr_views(post.id for post in slots)
+        seen_posts.mark(user_id, (post.catalog_number for post in slots))
         for post in slots:
-            post.views += 1
-        await session.commit()
+            event_recorder.record(EVENT_CATALOG_VIEW, user_id, post.id)
         
         logger.debug(f"Сгенерировано {len(slots)} слотов для пользователя {user_id}")
         return slots[:limit]
     
     @staticmethod
-    async def search_catalog(session: AsyncSession, query: str) -> List[CatalogPost]:
-        """Поиск по каталогу"""
-        search_pattern = f"%{query}%"
+    async def search_catalog(
+        session: AsyncSession,
+        query: str,
+        page: int = 0,
+        per_page: int = 10
+    ) -> List[CatalogPost]:
+        """Поиск по каталогу (ранжированный, постранично)"""
+        posts, _ = await SearchService.search(session, query, page=page, per_page=per_page)
+        return posts
+    
+    @staticmethod
+    async def list_catalog_page(
+        session: AsyncSession,
+        category: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 5
+    ) -> Tuple[List[CatalogPost], int, Optional[str], Optional[str]]:
+        """
+        Страница каталога по keyset-пагинации (category, created_at, id).
+        Любая страница стоит как первая - без OFFSET.
+        Возвращает (карточки, номер_страницы, курсор_вперед, курсор_назад)
+        """
+        position = decode_cursor(cursor) if cursor else None
+        if position:
+            category = position.category
+        direction = position.direction if position else FORWARD
+        page = position.page if position else 0
         
-        result = await session.execute(
-            select(CatalogPost)
-            .where(CatalogPost.is_active == True)
-            .where(
-                or_(
-                    CatalogPost.name.ilike(search_pattern),
-                    CatalogPost.description.ilike(search_pattern),
-                    CatalogPost.category.ilike(search_pattern)
-                )
-            )
-            .order_by(CatalogPost.created_at.desc())
-        )
+        query = select(CatalogPost).where(CatalogPost.is_active == True)
+        if category:
+            query = query.where(CatalogPost.category == category)
         
-        return result.scalars().all()
+        if position:
+            created_at = position.created_at
+            if session.bind.dialect.name != 'postgresql':
+                created_at = created_at.replace(tzinfo=None)
+            key = tuple_(CatalogPost.created_at, CatalogPost.id)
+            if direction == FORWARD:
+                query = query.where(key < tuple_(created_at, position.post_id))
+            else:
+                query = query.where(key > tuple_(created_at, position.post_id))
+        
+        if direction == FORWARD:
+            query = query.order_by(CatalogPost.created_at.desc(), CatalogPost.id.desc())
+        else:
+            query = query.order_by(CatalogPost.created_at.asc(), CatalogPost.id.asc())
+        
+        result = await session.execute(query.limit(limit + 1))
+        posts = list(result.scalars().all())
+        has_more = len(posts) > limit
+        posts = posts[:limit]
+        if direction == BACKWARD:
+            posts.reverse()
+        
+        if not posts:
+            return [], page, None, None
+        
+        def make_cursor(to: int, post: CatalogPost, to_page: int) -> str:
+            return encode_cursor(CatalogCursor(to, to_page, category, post.created_at, post.id))
+        
+        if direction == FORWARD:
+            next_cursor = make_cursor(FORWARD, posts[-1], page + 1) if has_more else None
+            prev_cursor = make_cursor(BACKWARD, posts[0], max(page - 1, 0)) if position else None
+        else:
+            next_cursor = make_cursor(FORWARD, posts[-1], page + 1)
+            # Перед первой страницей могли появиться новые карточки - номер не уходит ниже нуля
+            prev_cursor = make_cursor(BACKWARD, posts[0], max(page - 1, 0)) if has_more else None
+        
+        return posts, page, next_cursor, prev_cursor
     
     @staticmethod
     async def get_post_by_number(session: AsyncSession, catalog_number: int) -> Optional[CatalogPost]:
@@ -117,26 +175,13 @@ class CatalogService:
         return result.scalars().all()
     
     @staticmethod
-    async def generate_catalog_number(session: AsyncSession) -> int:
-        """Генерация уникального номера каталога (1-9999)"""
-        from CORE.config import settings
-        
-        # Получаем занятые номера
-        result = await session.execute(
-            select(CatalogPost.catalog_number)
-        )
-        used_numbers = {row[0] for row in result.all()}
-        
-        # Также проверяем рейтинговые посты
-        result = await session.execute(
-            select(RatingPost.catalog_number)
-        )
-        used_numbers.update({row[0] for row in result.all()})
-        
-        # Находим свободный номер
-        available = set(range(1, settings.MAX_CATALOG_NUMBER + 1)) - used_numbers
-        
-        if not available:
-            raise ValueError("Нет доступных номеров каталога!")
-        
-        return random.choice(list(available))
+    def reserve_catalog_number(session: AsyncSession):
+        """
+        Зарезервировать уникальный номер каталога (1-9999) до commit.
+        При ошибке номер вернется в пул:
+
+            async with CatalogService.reserve_catalog_number(session) as catalog_number:
+                session.add(CatalogPost(catalog_number=catalog_number, ...))
+                await session.commit()
+        """
+        return catalog_numbers.reserve(session)
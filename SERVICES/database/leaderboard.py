@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import html
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from loguru import logger
+from DATABASE.games import RatingPost
+
+BOARD_ALL = 'all'
+BOARD_BOYS = 'boy'
+BOARD_GIRLS = 'girl'
+BOARDS = (BOARD_ALL, BOARD_BOYS, BOARD_GIRLS)
+
+TOP_SIZE = 10
+MEDALS = ['🥇', '🥈', '🥉']
+
+
+class LeaderboardEntry:
+    """Рейтинговый пост в таблице лидеров"""
+
+    __slots__ = ('post_id', 'name', 'about', 'gender', 'score', 'votes')
+
+    def __init__(self, post_id: int, name: str, about: str, gender: str, score: int, votes: int):
+        self.post_id = post_id
+        self.name = name
+        self.about = about
+        self.gender = gender
+        self.score = score
+        self.votes = votes
+
+    @property
+    def rank_key(self) -> Tuple[int, int]:
+        # При равном счете выше более ранний пост
+        return self.score, -self.post_id
+
+
+class Leaderboards:
+    """
+    Таблицы лидеров /toppeople, /topboys, /topgirls в памяти.
+    Все одобренные посты (не более 9999) держатся в словаре, для каждой таблицы -
+    отсортированный топ-N, который обновляется инкрементально по голосам.
+    Готовый HTML кэшируется по версии таблицы.
+    Изменения постов из ORM применяются только после коммита.
+    """
+
+    def __init__(self, top_size: int = TOP_SIZE):
+        self.top_size = top_size
+        self.entries: Dict[int, LeaderboardEntry] = {}
+        self._top: Dict[str, Optional[List[int]]] = {board: None for board in BOARDS}
+        self.versions: Dict[str, int] = {board: 0 for board in BOARDS}
+        self._rendered: Dict[str, Tuple[int, Optional[str]]] = {}
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.reload(session)
+
+    async def reload(self, session: AsyncSession):
+        result = await session.execute(
+            select(
+                RatingPost.id, RatingPost.name, RatingPost.about, RatingPost.gender,
+                RatingPost.total_score, RatingPost.vote_count
+            ).where(RatingPost.status == 'approved')
+        )
+        self.entries = {
+            row[0]: LeaderboardEntry(*row)
+            for row in result.all()
+        }
+        for board in BOARDS:
+            self._invalidate(board)
+        self.loaded = True
+        logger.info(f"Таблицы лидеров загружены: {len(self.entries)} постов")
+
+    def _boards_of(self, entry: LeaderboardEntry) -> List[str]:
+        boards = [BOARD_ALL]
+        if entry.gender in (BOARD_BOYS, BOARD_GIRLS):
+            boards.append(entry.gender)
+        return boards
+
+    def _invalidate(self, board: str):
+        """Топ будет пересчитан целиком при следующем чтении"""
+        self._top[board] = None
+        self.versions[board] += 1
+
+    def _candidates(self, board: str):
+        if board == BOARD_ALL:
+            return self.entries.values()
+        return (entry for entry in self.entries.values() if entry.gender == board)
+
+    def _rebuild(self, board: str) -> List[int]:
+        top = heapq.nlargest(self.top_size, self._candidates(board), key=lambda e: e.rank_key)
+        self._top[board] = [entry.post_id for entry in top]
+        return self._top[board]
+
+    def _reposition(self, board: str, entry: LeaderboardEntry, score_grew: bool):
+        """Обновить топ после изменения счета одного поста"""
+        top = self._top[board]
+        if top is None:
+            return
+
+        if entry.post_id in top:
+            if not score_grew and len(top) == self.top_size:
+                # Пост мог опуститься ниже N-го места - нужен полный пересчет
+                self._invalidate(board)
+                return
+        else:
+            full = len(top) == self.top_size
+            if full and entry.rank_key <= self.entries[top[-1]].rank_key:
+                return  # изменение вне топа - таблица не меняется
+            top.append(entry.post_id)
+
+        top.sort(key=lambda post_id: self.entries[post_id].rank_key, reverse=True)
+        del top[self.top_size:]
+        self.versions[board] += 1
+
+    def apply_vote(self, post_id: int, delta: int, votes: int = 1):
+        """Учесть голос сразу, не дожидаясь записи в БД"""
+        entry = self.entries.get(post_id)
+        if entry is None:
+            return
+        entry.score += delta
+        entry.votes += votes
+        for board in self._boards_of(entry):
+            self._reposition(board, entry, score_grew=delta >= 0)
+
+    def upsert_post(self, card: LeaderboardEntry):
+        """Пост одобрен или изменен"""
+        entry = self.entries.get(card.post_id)
+        if entry is None:
+            entry = self.entries[card.post_id] = card
+            boards = set(self._boards_of(entry))
+        else:
+            # Счет в памяти не старше БД (голоса пишутся пакетами), берем только карточку.
+            # Смена пола переносит пост между таблицами - сбрасываем и старые
+            boards = set(self._boards_of(entry))
+            entry.name, entry.about, entry.gender = card.name, card.about, card.gender
+            boards.update(self._boards_of(entry))
+        for board in boards:
+            self._invalidate(board)
+
+    def remove_post(self, post_id: int):
+        entry = self.entries.pop(post_id, None)
+        if entry is not None:
+            for board in self._boards_of(entry):
+                self._invalidate(board)
+
+    def top(self, board: str) -> List[LeaderboardEntry]:
+        post_ids = self._top[board]
+        if post_ids is None:
+            post_ids = self._rebuild(board)
+        return [self.entries[post_id] for post_id in post_ids]
+
+    def render(self, board: str) -> Optional[str]:
+        """HTML таблицы (None - таблица пуста), кэш по версии"""
+        version = self.versions[board]
+        cached = self._rendered.get(board)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        entries = self.top(board)
+        text = _render_board(board, entries) if entries else None
+        self._rendered[board] = (self.versions[board], text)
+        return text
+
+    async def get_text(self, session: AsyncSession, board: str) -> Optional[str]:
+        await self.ensure_loaded(session)
+        return self.render(board)
+
+
+def _render_board(board: str, entries: List[LeaderboardEntry]) -> str:
+    lines = []
+    if board == BOARD_ALL:
+        lines.append("🏆 <b>ТОП-10 людей Будапешта</b>\n")
+        for i, entry in enumerate(entries):
+            medal = MEDALS[i] if i < 3 else f"{i+1}."
+            lines.append(
+                f"{medal} <b>{html.escape(entry.name)}</b>\n"
+                f"    О себе: {html.escape(entry.about)}\n"
+                f"    Рейтинг: {entry.score} ({entry.votes} голосов)\n"
+            )
+    else:
+        title = "🤵🏼‍♂️ <b>ТОП-10 парней</b>" if board == BOARD_BOYS else "👱🏻‍♀️ <b>ТОП-10 девушек</b>"
+        lines.append(f"{title}\n")
+        for i, entry in enumerate(entries):
+            medal = MEDALS[i] if i < 3 else f"{i+1}."
+            lines.append(f"{medal} <b>{html.escape(entry.name)}</b> - {entry.score} баллов")
+    return "\n".join(lines) + "\n"
+
+
+leaderboards = Leaderboards()
+
+
+# События flush копят изменения в session.info, таблицы и кэш HTML
+# меняются после коммита; при откате изменения отбрасываются
+
+_CHANGES_KEY = 'leaderboard_changes'
+
+
+def _defer(target: RatingPost, apply, *args):
+    session = inspect(target).session
+    if session is None:
+        return
+    session.info.setdefault(_CHANGES_KEY, []).append((apply, args))
+
+
+@event.listens_for(RatingPost, 'after_insert')
+@event.listens_for(RatingPost, 'after_update')
+def _on_rating_post_saved(mapper, connection, target: RatingPost):
+    if target.status == 'approved':
+        # Снимок карточки на момент flush: объект может измениться до коммита
+        _defer(target, leaderboards.upsert_post, LeaderboardEntry(
+            target.id, target.name, target.about, target.gender,
+            target.total_score or 0, target.vote_count or 0
+        ))
+    else:
+        _defer(target, leaderboards.remove_post, target.id)
+
+
+@event.listens_for(RatingPost, 'after_delete')
+def _on_rating_post_deleted(mapper, connection, target: RatingPost):
+    _defer(target, leaderboards.remove_post, target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session):
+    changes = session.info.pop(_CHANGES_KEY, ())
+    if leaderboards.loaded:
+        for apply, args in changes:
+            apply(*args)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _on_rollback(session, previous_transaction):
+    session.info.pop(_CHANGES_KEY, None)
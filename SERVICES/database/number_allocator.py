@@ -0,0 +1,129 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Iterable, List, Optional
+from sqlalchemy import select, union_all, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from loguru import logger
+from SERVICES.utils.number_pool import FreeNumberPool
+
+
+class NumberAllocator:
+    """
+    Пул уникальных номеров, привязанный к колонкам моделей.
+
+    Занятие номера применяется сразу при flush, освобождение - только после
+    commit, чтобы откат удаления не оставил в пуле номер существующей строки.
+    on_release получает номера, освобожденные закоммиченной транзакцией.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pool: FreeNumberPool,
+        on_release: Optional[Callable[[Iterable[int]], None]] = None
+    ):
+        self.name = name
+        self.pool = pool
+        self.on_release = on_release
+        self._columns: List = []
+        self._info_key = f"released_numbers:{name}"
+
+        event.listen(Session, 'after_commit', self._on_commit)
+        event.listen(Session, 'after_soft_rollback', self._on_rollback)
+
+    def track(self, model, attr: str):
+        """Следить за колонкой attr модели model"""
+        self._columns.append(getattr(model, attr))
+
+        def on_insert(mapper, connection, target):
+            number = getattr(target, attr)
+            if self.pool.loaded and number is not None:
+                self.pool.mark_used(number)
+
+        # Освобождение откладывается и до загрузки пула - его ждет on_release
+        def on_update(mapper, connection, target):
+            if not self.pool.loaded and self.on_release is None:
+                return
+            history = inspect(target).attrs[attr].history
+            if not history.has_changes():
+                return
+            for number in history.deleted:
+                if number is not None:
+                    self._defer_release(target, number)
+            for number in history.added:
+                if number is not None and self.pool.loaded:
+                    self.pool.mark_used(number)
+
+        def on_delete(mapper, connection, target):
+            number = getattr(target, attr)
+            if number is not None and (self.pool.loaded or self.on_release is not None):
+                self._defer_release(target, number)
+
+        event.listen(model, 'after_insert', on_insert)
+        event.listen(model, 'after_update', on_update)
+        event.listen(model, 'after_delete', on_delete)
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.pool.loaded:
+            return
+        async with self.pool.lock:
+            if not self.pool.loaded:
+                await self.reload(session)
+
+    async def reload(self, session: AsyncSession):
+        """Загрузить занятые номера из всех колонок одним запросом"""
+        selects = [select(column) for column in self._columns]
+        query = union_all(*selects) if len(selects) > 1 else selects[0]
+        result = await session.execute(query)
+        self.pool.load(row[0] for row in result.all())
+        logger.info(f"Пул номеров '{self.name}' загружен: свободно {self.pool.free_count}")
+
+    @asynccontextmanager
+    async def reserve(self, session: AsyncSession) -> AsyncIterator[int]:
+        """
+        Резервирование номера на время транзакции:
+
+            async with allocator.reserve(session) as number:
+                session.add(Model(number=number, ...))
+                await session.commit()
+        """
+        await self.ensure_loaded(session)
+        async with self.pool.reserve() as number:
+            yield number
+
+    @asynccontextmanager
+    async def claim(self, session: AsyncSession, number: int) -> AsyncIterator[bool]:
+        """
+        Занять конкретный номер на время транзакции (ручное назначение).
+        Отдает False, если номер уже занят или зарезервирован.
+        """
+        await self.ensure_loaded(session)
+        if not self.pool.is_free(number) and number not in self.pool.excluded:
+            yield False
+            return
+        claimed = self.pool.is_free(number)
+        if claimed:
+            self.pool.mark_used(number)
+        try:
+            yield True
+        except BaseException:
+            if claimed:
+                self.pool.release(number)
+            raise
+
+    def _defer_release(self, target, number: int):
+        session = inspect(target).session
+        if session is None:
+            return
+        session.info.setdefault(self._info_key, []).append(number)
+
+    def _on_commit(self, session):
+        released = session.info.pop(self._info_key, ())
+        if self.pool.loaded:
+            for number in released:
+                self.pool.release(number)
+        if released and self.on_release is not None:
+            self.on_release(released)
+
+    def _on_rollback(self, session, previous_transaction):
+        session.info.pop(self._info_key, None)
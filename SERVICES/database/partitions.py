@@ -0,0 +1,193 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from DATABASE.base import get_session
+from CORE.config import settings
+
+PERIOD_DAY = 'day'
+PERIOD_MONTH = 'month'
+
+
+class PartitionSpec(NamedTuple):
+    """Правила секций одной таблицы (RANGE по колонке времени)"""
+    table: str
+    period: str
+    # Сколько будущих секций держать созданными
+    premake: int
+    # Секции, закончившиеся раньше retention периодов назад, отсоединяются (None - хранить все)
+    retention: Optional[int]
+    # Отсоединенную секцию удалить (иначе остается отдельной таблицей-архивом)
+    drop_expired: bool
+    # Запрос, выполняемый в одной транзакции с DETACH ({partition} - имя секции):
+    # чистит зависимые данные, пока секция еще доступна
+    on_detach: Optional[str] = None
+
+
+def _floor(moment: date, period: str) -> date:
+    return moment.replace(day=1) if period == PERIOD_MONTH else moment
+
+
+def _shift(start: date, period: str, count: int) -> date:
+    if period == PERIOD_DAY:
+        return start + timedelta(days=count)
+    month = start.month - 1 + count
+    return date(start.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table: str, start: date, period: str) -> str:
+    return f"{table}_p{start:%Y%m}" if period == PERIOD_MONTH else f"{table}_p{start:%Y%m%d}"
+
+
+def _parse_start(table: str, name: str, period: str) -> Optional[date]:
+    suffix = name[len(table) + 2:] if name.startswith(f"{table}_p") else ''
+    try:
+        if period == PERIOD_MONTH and len(suffix) == 6:
+            return datetime.strptime(suffix, '%Y%m').date()
+        if period == PERIOD_DAY and len(suffix) == 8:
+            return datetime.strptime(suffix, '%Y%m%d').date()
+    except ValueError:
+        pass
+    return None
+
+
+class PartitionManager:
+    """
+    Обслуживание секционированных таблиц Postgres: заранее создает секции
+    на ближайшие периоды и отсоединяет (или удаляет) устаревшие - очистка
+    становится операцией над метаданными вместо пакетных DELETE.
+    Таблицы, которые еще не секционированы (SQLite, БД до миграции 0001), пропускаются.
+    """
+
+    def __init__(self, specs: List[PartitionSpec]):
+        self.specs = {spec.table: spec for spec in specs}
+        # Таблица -> секционирована ли (после первой проверки)
+        self._partitioned: Dict[str, bool] = {}
+
+        self.created_total = 0
+        self.detached_total = 0
+        self.last_run_at: Optional[datetime] = None
+
+    def is_partitioned(self, table: str) -> bool:
+        """Известно, что таблица секционирована (проверяется при maintain)"""
+        return self._partitioned.get(table, False)
+
+    @staticmethod
+    async def _check_partitioned(session: AsyncSession, table: str) -> bool:
+        partitioned = await session.scalar(
+            text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"),
+            {'table': table}
+        )
+        return bool(partitioned)
+
+    @staticmethod
+    async def _partitions(session: AsyncSession, table: str) -> List[str]:
+        result = await session.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = to_regclass(:table)"
+            ),
+            {'table': table}
+        )
+        return [row[0] for row in result.all()]
+
+    async def _execute_ddl(self, session: AsyncSession, *statements: str) -> bool:
+        # Каждая DDL-операция - отдельная транзакция: ошибка одной не мешает остальным
+        try:
+            for statement in statements:
+                await session.execute(text(statement))
+            await session.commit()
+            return True
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Ошибка обслуживания секций ({'; '.join(statements)}): {e}")
+            return False
+
+    async def maintain_table(self, session: AsyncSession, spec: PartitionSpec, today: date) -> dict:
+        existing = set(await self._partitions(session, spec.table))
+        current = _floor(today, spec.period)
+        created, detached = [], []
+
+        for offset in range(spec.premake + 1):
+            start = _shift(current, spec.period, offset)
+            name = partition_name(spec.table, start, spec.period)
+            if name in existing:
+                continue
+            end = _shift(start, spec.period, 1)
+            # Если строки этого диапазона уже попали в секцию по умолчанию,
+            # Postgres откажет - ошибка попадет в лог, остальные секции создадутся
+            if await self._execute_ddl(
+                session,
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {spec.table} "
+                f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+            ):
+                created.append(name)
+
+        if spec.retention is not None:
+            cutoff = _shift(current, spec.period, -spec.retention)
+            for name in sorted(existing):
+                start = _parse_start(spec.table, name, spec.period)
+                if start is None or _shift(start, spec.period, 1) > cutoff:
+                    continue
+                cleanup = [spec.on_detach.format(partition=name)] if spec.on_detach else []
+                if not await self._execute_ddl(
+                    session, *cleanup, f"ALTER TABLE {spec.table} DETACH PARTITION {name}"
+                ):
+                    continue
+                if spec.drop_expired:
+                    await self._execute_ddl(session, f"DROP TABLE IF EXISTS {name}")
+                detached.append(name)
+
+        self.created_total += len(created)
+        self.detached_total += len(detached)
+        if created or detached:
+            logger.info(
+                f"🗂 Секции {spec.table}: создано {len(created)}, "
+                f"{'удалено' if spec.drop_expired else 'отсоединено'} {len(detached)}"
+            )
+        return {'created': created, 'detached': detached}
+
+    async def maintain(self) -> Dict[str, dict]:
+        """Создать будущие секции и убрать устаревшие (задача планировщика)"""
+        report: Dict[str, dict] = {}
+        today = datetime.now(timezone.utc).date()
+
+        async for session in get_session():
+            if session.bind.dialect.name != 'postgresql':
+                return report
+            for table, spec in self.specs.items():
+                partitioned = await self._check_partitioned(session, table)
+                self._partitioned[table] = partitioned
+                if partitioned:
+                    report[table] = await self.maintain_table(session, spec, today)
+
+        self.last_run_at = datetime.now(timezone.utc)
+        return report
+
+    def get_metrics(self) -> dict:
+        return {
+            'partitioned_tables': sorted(t for t, partitioned in self._partitioned.items() if partitioned),
+            'created_total': self.created_total,
+            'detached_total': self.detached_total,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+
+partition_manager = PartitionManager([
+    # Голоса - история рейтинга: по умолчанию хранятся все месяцы.
+    # Отметки rating_vote_claims уходят вместе с секцией их голосов - индекс
+    # уникальности растет не дольше окна хранения
+    PartitionSpec(
+        table='rating_votes',
+        period=PERIOD_MONTH,
+        premake=3,
+        retention=settings.VOTE_RETENTION_MONTHS or None,
+        drop_expired=False,
+        on_detach=(
+            "DELETE FROM rating_vote_claims c USING {partition} v "
+            "WHERE c.rating_post_id = v.rating_post_id AND c.user_id = v.user_id"
+        ),
+    ),
+])
@@ -0,0 +1,320 @@
+import asyncio
+import bisect
+import math
+import re
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import select, event, func, inspect, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from loguru import logger
+from DATABASE.catalog import CatalogPost, catalog_search_vector, catalog_search_query
+from CORE.config import CATALOG_CATEGORIES
+
+# --- Нормализация и стемминг ---
+
+TOKEN_RE = re.compile(r"[\w-]+", re.UNICODE)
+CYRILLIC_RE = re.compile(r"[а-я]")
+
+RU_SUFFIXES = sorted([
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ться', 'ость',
+    'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую', 'юю',
+    'ов', 'ев', 'ах', 'ях', 'ам', 'ям', 'ом', 'ем', 'ию', 'ия', 'ье', 'ья', 'ью',
+    'ть', 'ся', 'сь', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й'
+], key=len, reverse=True)
+
+HU_SUFFIXES = sorted([
+    'nak', 'nek', 'ban', 'ben', 'ból', 'ből', 'ról', 'ről', 'tól', 'től', 'hoz', 'hez',
+    'höz', 'val', 'vel', 'ért', 'ság', 'ség', 'ba', 'be', 'ra', 're', 'on', 'en', 'ön',
+    'ok', 'ek', 'ök', 'ak', 'ák', 'ék', 'at', 'et', 'ot', 'öt', 't', 'k', 'a', 'e'
+], key=len, reverse=True)
+
+MIN_STEM = 3
+
+# Веса полей карточки
+FIELD_WEIGHTS = {'name': 3.0, 'category': 2.0, 'tags': 2.0, 'description': 1.0}
+
+
+def stem(token: str) -> str:
+    """Отсечь одно окончание (русское или венгерское по алфавиту слова)"""
+    suffixes = RU_SUFFIXES if CYRILLIC_RE.search(token) else HU_SUFFIXES
+    for suffix in suffixes:
+        if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Текст -> список основ слов"""
+    if not text:
+        return []
+    text = text.lower().replace('ё', 'е')
+    return [stem(token) for token in TOKEN_RE.findall(text) if len(token) > 1]
+
+
+def tags_text(tags) -> str:
+    """Теги хранятся как JSON-массив (иногда словарь)"""
+    if not tags:
+        return ''
+    if isinstance(tags, dict):
+        return ' '.join(f"{k} {v}" for k, v in tags.items())
+    if isinstance(tags, (list, tuple)):
+        return ' '.join(str(tag) for tag in tags)
+    return str(tags)
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Основы словаря категорий - для проверки стемминга и подсказок
+CATEGORY_STEMS: Dict[str, str] = {
+    word_stem: category
+    for category, subcategories in CATALOG_CATEGORIES.items()
+    for name in [category, *subcategories]
+    for word_stem in tokenize(name)
+}
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс по активным карточкам (для SQLite и тестов).
+    Основа слова -> {post_id: вес}, плюс триграммы основ для опечаток.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.doc_terms: Dict[int, Set[str]] = {}
+        self.sorted_terms: List[str] = []
+        self.trigram_terms: Dict[str, Set[str]] = defaultdict(set)
+        self.loaded = False
+        self.lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.loaded:
+            return
+        async with self.lock:
+            if not self.loaded:
+                await self.reload(session)
+
+    async def reload(self, session: AsyncSession):
+        result = await session.execute(
+            select(
+                CatalogPost.id, CatalogPost.name, CatalogPost.category,
+                CatalogPost.tags, CatalogPost.description
+            ).where(CatalogPost.is_active == True)
+        )
+        self.postings = defaultdict(dict)
+        self.doc_terms = {}
+        self.trigram_terms = defaultdict(set)
+        for post_id, name, category, tags, description in result.all():
+            self._add(post_id, name, category, tags, description)
+        self.sorted_terms = sorted(self.postings)
+        self.loaded = True
+        logger.info(f"Поисковый индекс построен: {len(self)} карточек, {len(self.postings)} основ")
+
+    def _add(self, post_id: int, name, category, tags, description):
+        terms: Set[str] = set()
+        fields = {'name': name, 'category': category, 'tags': tags_text(tags), 'description': description}
+        for field, value in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for term in tokenize(value):
+                postings = self.postings[term]
+                postings[post_id] = max(postings.get(post_id, 0.0), weight)
+                if term not in terms:
+                    terms.add(term)
+                    for gram in trigrams(term):
+                        self.trigram_terms[gram].add(term)
+        self.doc_terms[post_id] = terms
+
+    def upsert(self, post_id: int, is_active: bool, name: str, category: str, tags, description: Optional[str]):
+        self.remove(post_id)
+        if is_active:
+            self._add(post_id, name, category, tags, description)
+            for term in self.doc_terms[post_id]:
+                index = bisect.bisect_left(self.sorted_terms, term)
+                if index == len(self.sorted_terms) or self.sorted_terms[index] != term:
+                    self.sorted_terms.insert(index, term)
+
+    def remove(self, post_id: int):
+        for term in self.doc_terms.pop(post_id, ()):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(post_id, None)
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Точное совпадение, затем префиксы, затем похожие по триграммам"""
+        matches = []
+        if self.postings.get(term):
+            matches.append((term, 1.0))
+        if len(term) >= 4:
+            index = bisect.bisect_left(self.sorted_terms, term)
+            while index < len(self.sorted_terms) and self.sorted_terms[index].startswith(term):
+                candidate = self.sorted_terms[index]
+                if candidate != term and self.postings.get(candidate):
+                    matches.append((candidate, 0.6))
+                index += 1
+        if not matches and len(term) >= 4:
+            grams = trigrams(term)
+            counts: Dict[str, int] = defaultdict(int)
+            for gram in grams:
+                for candidate in self.trigram_terms.get(gram, ()):
+                    counts[candidate] += 1
+            for candidate, shared in counts.items():
+                similarity = shared / len(grams | trigrams(candidate))
+                if similarity >= 0.45 and self.postings.get(candidate):
+                    matches.append((candidate, similarity * 0.5))
+        return matches
+
+    def search(self, query: str) -> List[int]:
+        """id карточек по убыванию релевантности (TF-IDF по весам полей)"""
+        total_docs = max(len(self), 1)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            for matched, factor in self._expand(term):
+                postings = self.postings[matched]
+                idf = math.log(1 + total_docs / len(postings))
+                for post_id, weight in postings.items():
+                    scores[post_id] += weight * idf * factor
+        return [post_id for post_id, _ in sorted(scores.items(), key=lambda item: (-item[1], -item[0]))]
+
+
+search_index = InvertedIndex()
+
+
+# Индекс меняется только после коммита: события flush копят изменения
+# в session.info, откат их отбрасывает
+
+_CHANGES_KEY = 'search_index_changes'
+
+
+def _defer(target: CatalogPost, apply, *args):
+    session = inspect(target).session
+    if session is None:
+        return
+    session.info.setdefault(_CHANGES_KEY, []).append((apply, args))
+
+
+@event.listens_for(CatalogPost, 'after_insert')
+@event.listens_for(CatalogPost, 'after_update')
+def _on_catalog_post_saved(mapper, connection, target: CatalogPost):
+    _defer(
+        target, search_index.upsert,
+        target.id, target.is_active, target.name, target.category, target.tags, target.description
+    )
+
+
+@event.listens_for(CatalogPost, 'after_delete')
+def _on_catalog_post_deleted(mapper, connection, target: CatalogPost):
+    _defer(target, search_index.remove, target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session):
+    changes = session.info.pop(_CHANGES_KEY, ())
+    if search_index.loaded:
+        for apply, args in changes:
+            apply(*args)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _on_rollback(session, previous_transaction):
+    session.info.pop(_CHANGES_KEY, None)
+
+
+class SearchService:
+    """Поиск по каталогу: tsvector/pg_trgm в PostgreSQL, инвертированный индекс в остальных БД"""
+
+    # Метрики задержки
+    query_count = 0
+    total_ms = 0.0
+    last_ms = 0.0
+    max_ms = 0.0
+
+    @staticmethod
+    async def search(
+        session: AsyncSession,
+        query: str,
+        page: int = 0,
+        per_page: int = 10
+    ) -> Tuple[List[CatalogPost], bool]:
+        """
+        Ранжированный поиск с пагинацией.
+        Возвращает (карточки страницы, есть_следующая_страница)
+        """
+        query = (query or '').strip()
+        if not query:
+            return [], False
+
+        started = time.perf_counter()
+        offset = max(page, 0) * per_page
+
+        if session.bind.dialect.name == 'postgresql':
+            posts = await SearchService._search_postgres(session, query, offset, per_page + 1)
+        else:
+            posts = await SearchService._search_index(session, query, offset, per_page + 1)
+
+        SearchService._record_latency((time.perf_counter() - started) * 1000, query)
+        return posts[:per_page], len(posts) > per_page
+
+    @staticmethod
+    async def _search_postgres(session: AsyncSession, query: str, offset: int, limit: int) -> List[CatalogPost]:
+        vector = catalog_search_vector()
+        tsquery = catalog_search_query(query)
+        rank = func.ts_rank(vector, tsquery) + func.similarity(CatalogPost.name, query)
+
+        result = await session.execute(
+            select(CatalogPost)
+            .where(CatalogPost.is_active == True)
+            .where(or_(vector.op('@@')(tsquery), CatalogPost.name.op('%')(query)))
+            .order_by(rank.desc(), CatalogPost.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def _search_index(session: AsyncSession, query: str, offset: int, limit: int) -> List[CatalogPost]:
+        await search_index.ensure_loaded(session)
+        post_ids = search_index.search(query)[offset:offset + limit]
+        if not post_ids:
+            return []
+
+        result = await session.execute(
+            select(CatalogPost)
+            .where(CatalogPost.id.in_(post_ids))
+            .where(CatalogPost.is_active == True)
+        )
+        posts_by_id = {post.id: post for post in result.scalars().all()}
+        return [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+
+    @staticmethod
+    def _record_latency(elapsed_ms: float, query: str):
+        SearchService.query_count += 1
+        SearchService.total_ms += elapsed_ms
+        SearchService.last_ms = elapsed_ms
+        SearchService.max_ms = max(SearchService.max_ms, elapsed_ms)
+        logger.debug(f"Поиск '{query[:30]}' за {elapsed_ms:.1f} мс")
+
+    @staticmethod
+    def get_metrics() -> dict:
+        count = SearchService.query_count
+        return {
+            'query_count': count,
+            'avg_ms': round(SearchService.total_ms / count, 2) if count else 0.0,
+            'last_ms': round(SearchService.last_ms, 2),
+            'max_ms': round(SearchService.max_ms, 2),
+        }
+
+    @staticmethod
+    def suggest_category(query: str) -> Optional[str]:
+        """Категория каталога по словам запроса (маникюра -> Красота и уход)"""
+        for term in tokenize(query):
+            if term in CATEGORY_STEMS:
+                return CATEGORY_STEMS[term]
+        return None
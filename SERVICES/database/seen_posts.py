@@ -0,0 +1,207 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select, text, update, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from DATABASE.base import get_session
+from DATABASE.catalog import UserSession
+from CORE.config import settings
+from SERVICES.utils.seen_set import SeenSet
+
+# Строк в одном INSERT ... ON CONFLICT
+FLUSH_CHUNK_SIZE = 1000
+# Освобожденных номеров на один UPDATE карт (глубина вложенных set_bit)
+CLEAR_CHUNK_SIZE = 256
+
+
+class SeenPostsStore:
+    """
+    Просмотренные карточки каталога по пользователям.
+    Битовые карты по номерам каталога лежат в user_sessions.seen_bitmap,
+    в памяти - LRU-кэш карт; новые просмотры помечают карту грязной,
+    а запись в БД идет пакетным upsert по расписанию.
+    Освобожденный номер (карточка удалена или перенумерована) снимается со
+    всех карт, чтобы новая карточка с этим номером не считалась просмотренной.
+    """
+
+    def __init__(self, high: int = settings.MAX_CATALOG_NUMBER, max_cached_users: int = 20000):
+        self.high = high
+        self.max_cached_users = max_cached_users
+        self._sets: "OrderedDict[int, SeenSet]" = OrderedDict()
+        self._dirty: set = set()
+        # Освобожденные номера, еще не снятые с карт в БД
+        self._forgotten: set = set()
+        self._lock = asyncio.Lock()
+
+        self.last_flush_ms = 0.0
+
+    async def get(self, session: AsyncSession, user_id: int) -> SeenSet:
+        """Карта пользователя (из кэша или одним запросом к БД)"""
+        seen = self._sets.get(user_id)
+        if seen is not None:
+            self._sets.move_to_end(user_id)
+            return seen
+
+        blob = await session.scalar(
+            select(UserSession.seen_bitmap).where(UserSession.user_id == user_id)
+        )
+        # Пока шел запрос карту мог загрузить параллельный обработчик
+        seen = self._sets.get(user_id)
+        if seen is None:
+            seen = SeenSet(self.high, blob)
+            for number in self._forgotten:
+                seen.discard(number)
+            self._remember(user_id, seen)
+        return seen
+
+    def peek(self, user_id: int) -> Optional[SeenSet]:
+        """Карта из кэша без обращения к БД"""
+        return self._sets.get(user_id)
+
+    def _remember(self, user_id: int, seen: SeenSet):
+        self._sets[user_id] = seen
+        # Вытесняем только записанные в БД карты, грязные переносим в конец очереди.
+        # Дошли до новой карты - остальные грязные, кэш временно больше лимита
+        while len(self._sets) > self.max_cached_users:
+            oldest = next(iter(self._sets))
+            if oldest == user_id:
+                break
+            if oldest in self._dirty:
+                self._sets.move_to_end(oldest)
+            else:
+                self._sets.popitem(last=False)
+
+    def mark(self, user_id: int, numbers: Iterable[Optional[int]]):
+        """Отметить показанные номера (карта должна быть получена через get)"""
+        seen = self._sets.get(user_id)
+        if seen is not None and seen.update(numbers):
+            self._dirty.add(user_id)
+
+    def reset(self, user_id: int):
+        """Пользователь посмотрел все - начинаем круг заново"""
+        seen = self._sets.get(user_id)
+        if seen is not None and len(seen):
+            seen.clear()
+            self._dirty.add(user_id)
+
+    def forget(self, numbers: Iterable[int]):
+        """Номера освобождены - снять их со всех карт (в БД - при следующем flush)"""
+        numbers = [number for number in numbers if number is not None and 0 <= number <= self.high]
+        if not numbers:
+            return
+        for user_id, seen in self._sets.items():
+            if sum(1 for number in numbers if seen.discard(number)):
+                self._dirty.add(user_id)
+        self._forgotten.update(numbers)
+
+    @property
+    def depth(self) -> int:
+        return len(self._dirty)
+
+    @staticmethod
+    def _insert(session: AsyncSession):
+        dialect = session.bind.dialect.name
+        return postgresql.insert(UserSession) if dialect == 'postgresql' else sqlite.insert(UserSession)
+
+    async def _clear_bits(self, session: AsyncSession, numbers: List[int]):
+        """Снять номера со всех карт в БД (нумерация битов совпадает с get_bit/set_bit)"""
+        for start in range(0, len(numbers), CLEAR_CHUNK_SIZE):
+            chunk = numbers[start:start + CLEAR_CHUNK_SIZE]
+            if session.bind.dialect.name == 'postgresql':
+                await self._clear_bits_postgres(session, chunk)
+            else:
+                await self._clear_bits_other(session, chunk)
+
+    @staticmethod
+    async def _clear_bits_postgres(session: AsyncSession, numbers: List[int]):
+        # Один UPDATE на пачку: карта дополняется нулями до старшего номера,
+        # чтобы set_bit не выходил за границу, и обрезается обратно
+        names = [f'bit{i}' for i in range(len(numbers))]
+        params = dict(zip(names, numbers), bits=numbers, padding=bytes(max(numbers) // 8 + 1))
+        cleared = "seen_bitmap || CAST(:padding AS bytea)"
+        for name in names:
+            cleared = f"set_bit({cleared}, :{name}, 0)"
+        await session.execute(
+            text(
+                f"UPDATE user_sessions SET seen_bitmap = substring({cleared} FROM 1 FOR length(seen_bitmap)) "
+                "WHERE EXISTS (SELECT 1 FROM unnest(CAST(:bits AS integer[])) AS b(bit) "
+                "WHERE b.bit < length(seen_bitmap) * 8 AND get_bit(seen_bitmap, b.bit) = 1)"
+            ),
+            params
+        )
+
+    async def _clear_bits_other(self, session: AsyncSession, numbers: List[int]):
+        # Без битовых функций (SQLite) отбор по шестнадцатеричной цифре карты:
+        # читаются только строки, где отмечен хотя бы один из номеров
+        conditions = []
+        for number in numbers:
+            byte, bit = number >> 3, number & 7
+            position = 2 * byte + (2 if bit < 4 else 1)
+            mask = 1 << (bit & 3)
+            digits = [format(value, 'X') for value in range(16) if value & mask]
+            conditions.append(func.substr(func.hex(UserSession.seen_bitmap), position, 1).in_(digits))
+
+        result = await session.execute(
+            select(UserSession.id, UserSession.seen_bitmap).where(or_(*conditions))
+        )
+        rows = []
+        for row_id, blob in result.all():
+            seen = SeenSet(self.high, blob)
+            for number in numbers:
+                seen.discard(number)
+            rows.append({'id': row_id, 'seen_bitmap': seen.to_bytes()})
+        if rows:
+            # Пакетный UPDATE по первичному ключу
+            await session.execute(update(UserSession), rows)
+
+    async def flush(self) -> int:
+        """Снять освобожденные номера с карт в БД и записать измененные карты одним upsert"""
+        async with self._lock:
+            if not self._dirty and not self._forgotten:
+                return 0
+
+            dirty, self._dirty = self._dirty, set()
+            forgotten, self._forgotten = self._forgotten, set()
+            rows: List[Dict] = [
+                {'user_id': user_id, 'seen_bitmap': self._sets[user_id].to_bytes()}
+                for user_id in dirty if user_id in self._sets
+            ]
+            started = time.perf_counter()
+
+            try:
+                async for session in get_session():
+                    # Сначала снятие номеров, затем карты из памяти - в них номер уже снят
+                    # и мог быть отмечен заново для новой карточки
+                    if forgotten:
+                        await self._clear_bits(session, sorted(forgotten))
+                    for start in range(0, len(rows), FLUSH_CHUNK_SIZE):
+                        statement = self._insert(session).values(rows[start:start + FLUSH_CHUNK_SIZE])
+                        statement = statement.on_conflict_do_update(
+                            index_elements=['user_id'],
+                            set_={'seen_bitmap': statement.excluded.seen_bitmap}
+                        )
+                        await session.execute(statement)
+                    await session.commit()
+            except Exception as e:
+                self._dirty |= dirty
+                self._forgotten |= forgotten
+                logger.error(f"Ошибка записи просмотренных карточек, повтор позже: {e}")
+                return 0
+
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            logger.debug(f"Просмотры записаны для {len(rows)} пользователей за {self.last_flush_ms:.1f} мс")
+            return len(rows)
+
+    def get_metrics(self) -> dict:
+        return {
+            'cached_users': len(self._sets),
+            'dirty_users': self.depth,
+            'forgotten_numbers': len(self._forgotten),
+            'last_flush_ms': round(self.last_flush_ms, 2),
+        }
+
+
+seen_posts = SeenPostsStore()
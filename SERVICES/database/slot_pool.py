@@ -0,0 +1,279 @@
+import asyncio
+import random
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import select, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from loguru import logger
+from DATABASE.catalog import CatalogPost
+from DATABASE.games import RatingPost
+
+# Пулы слотов каталога
+POOL_REGULAR = 'regular'     # Slot 1-2: обычные услуги
+POOL_PRIORITY = 'priority'   # Slot 4: приоритетные/реклама
+POOL_TOPGIRLS = 'girl'       # Slot 3: TopGirls
+POOL_TOPBOYS = 'boy'         # Slot 3: TopBoys
+
+# Случайных попыток на слот до перехода к полному проходу
+SAMPLE_ATTEMPTS = 8
+
+
+class IdPool:
+    """Массив id с O(1) добавлением, удалением и случайной выборкой"""
+
+    __slots__ = ('ids', 'positions')
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self.ids: List[int] = []
+        self.positions: Dict[int, int] = {}
+        for item_id in ids:
+            self.add(item_id)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self.positions
+
+    def add(self, item_id: int):
+        if item_id in self.positions:
+            return
+        self.positions[item_id] = len(self.ids)
+        self.ids.append(item_id)
+
+    def discard(self, item_id: int):
+        """Удаление перестановкой последнего элемента на место удаляемого"""
+        pos = self.positions.pop(item_id, None)
+        if pos is None:
+            return
+        last = self.ids.pop()
+        if pos < len(self.ids):
+            self.ids[pos] = last
+            self.positions[last] = pos
+
+
+def sample_union(
+    pools: Sequence[IdPool],
+    k: int,
+    exclude: Iterable[int] = (),
+    skip: Optional[Callable[[int], bool]] = None
+) -> List[int]:
+    """
+    Выбрать k различных id из объединения пулов.
+    Каждый слот стоит O(1): случайный индекс по суммарной длине,
+    повтор только при попадании в exclude, skip или уже выбранный id.
+    Если случайные попытки кончились раньше (почти все пропускается skip),
+    добор идет полным проходом по пулам - короткий ответ значит,
+    что подходящих id больше нет.
+    """
+    exclude = set(exclude)
+    total = sum(len(pool) for pool in pools)
+    if k <= 0 or total == 0:
+        return []
+
+    # Маленький пул - проще отфильтровать целиком
+    if total <= k + len(exclude):
+        return _scan(pools, k, exclude, skip)
+
+    picked: List[int] = []
+    seen = set(exclude)
+    attempts = 0
+    while len(picked) < k and attempts < k * SAMPLE_ATTEMPTS:
+        attempts += 1
+        index = random.randrange(total)
+        for pool in pools:
+            if index < len(pool):
+                item_id = pool.ids[index]
+                break
+            index -= len(pool)
+        if item_id in seen:
+            continue
+        seen.add(item_id)
+        if skip and skip(item_id):
+            continue
+        picked.append(item_id)
+
+    if len(picked) < k:
+        picked.extend(_scan(pools, k - len(picked), exclude | set(picked), skip))
+    return picked
+
+
+def _scan(
+    pools: Sequence[IdPool],
+    k: int,
+    exclude: set,
+    skip: Optional[Callable[[int], bool]]
+) -> List[int]:
+    """Полный проход: k случайных из всех подходящих id"""
+    candidates = [
+        i for pool in pools for i in pool.ids
+        if i not in exclude and not (skip and skip(i))
+    ]
+    return random.sample(candidates, min(k, len(candidates)))
+
+
+class SlotPoolEngine:
+    """
+    Предрасчитанные пулы id для слотов каталога.
+    Загружаются один раз из БД и поддерживаются инкрементально через
+    события ORM при создании, изменении и удалении постов (после коммита).
+    """
+
+    def __init__(self):
+        self.pools: Dict[str, IdPool] = {
+            POOL_REGULAR: IdPool(),
+            POOL_PRIORITY: IdPool(),
+            POOL_TOPGIRLS: IdPool(),
+            POOL_TOPBOYS: IdPool(),
+        }
+        # id карточки -> номер каталога (для карт просмотренного)
+        self.numbers: Dict[int, int] = {}
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, session: AsyncSession):
+        """Загрузить пулы при первом обращении"""
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.reload(session)
+
+    async def reload(self, session: AsyncSession):
+        """Полная перезагрузка пулов (только id и флаги, без строк целиком)"""
+        pools = {name: IdPool() for name in self.pools}
+        numbers: Dict[int, int] = {}
+
+        result = await session.execute(
+            select(CatalogPost.id, CatalogPost.catalog_number, CatalogPost.is_priority, CatalogPost.is_ad)
+            .where(CatalogPost.is_active == True)
+        )
+        for post_id, catalog_number, is_priority, is_ad in result.all():
+            pools[POOL_PRIORITY if is_priority or is_ad else POOL_REGULAR].add(post_id)
+            numbers[post_id] = catalog_number
+
+        result = await session.execute(
+            select(RatingPost.id, RatingPost.gender)
+            .where(RatingPost.status == 'approved')
+        )
+        for post_id, gender in result.all():
+            if gender in (POOL_TOPGIRLS, POOL_TOPBOYS):
+                pools[gender].add(post_id)
+
+        self.pools = pools
+        self.numbers = numbers
+        self.loaded = True
+        logger.info(f"Пулы слотов каталога загружены: {self.stats()}")
+
+    def sync_catalog_post(
+        self,
+        post_id: int,
+        is_active: bool,
+        is_priority: bool,
+        is_ad: bool,
+        catalog_number: Optional[int] = None
+    ):
+        """Обновить положение карточки каталога в пулах"""
+        self.pools[POOL_REGULAR].discard(post_id)
+        self.pools[POOL_PRIORITY].discard(post_id)
+        self.numbers.pop(post_id, None)
+        if is_active:
+            self.pools[POOL_PRIORITY if is_priority or is_ad else POOL_REGULAR].add(post_id)
+            if catalog_number is not None:
+                self.numbers[post_id] = catalog_number
+
+    def discard_catalog_post(self, post_id: int):
+        self.sync_catalog_post(post_id, False, False, False)
+
+    def sync_rating_post(self, post_id: int, status: Optional[str], gender: Optional[str]):
+        """Обновить положение рейтингового поста в пулах TopGirls/TopBoys"""
+        self.pools[POOL_TOPGIRLS].discard(post_id)
+        self.pools[POOL_TOPBOYS].discard(post_id)
+        if status == 'approved' and gender in (POOL_TOPGIRLS, POOL_TOPBOYS):
+            self.pools[gender].add(post_id)
+
+    def discard_rating_post(self, post_id: int):
+        self.sync_rating_post(post_id, None, None)
+
+    def sample(
+        self,
+        pool: str,
+        k: int,
+        exclude: Iterable[int] = (),
+        skip: Optional[Callable[[int], bool]] = None
+    ) -> List[int]:
+        """Случайные id из одного пула"""
+        return sample_union([self.pools[pool]], k, exclude, skip)
+
+    def sample_active(
+        self,
+        k: int,
+        exclude: Iterable[int] = (),
+        skip: Optional[Callable[[int], bool]] = None
+    ) -> List[int]:
+        """Случайные id из всех активных карточек каталога"""
+        return sample_union([self.pools[POOL_REGULAR], self.pools[POOL_PRIORITY]], k, exclude, skip)
+
+    def unseen(self, seen) -> Callable[[int], bool]:
+        """Предикат skip: карточка уже есть в карте просмотренного seen"""
+        numbers = self.numbers
+        return lambda post_id: numbers.get(post_id) in seen
+
+    def stats(self) -> Dict[str, int]:
+        return {name: len(pool) for name, pool in self.pools.items()}
+
+
+slot_pools = SlotPoolEngine()
+
+
+# Инкрементальное обновление пулов.
+# События flush только запоминают изменения в session.info; в пулы они
+# попадают после коммита, при откате отбрасываются.
+
+_CHANGES_KEY = 'slot_pool_changes'
+
+
+def _defer(target, apply: Callable, *args):
+    session = inspect(target).session
+    if session is None:
+        return
+    session.info.setdefault(_CHANGES_KEY, []).append((apply, args))
+
+
+@event.listens_for(CatalogPost, 'after_insert')
+@event.listens_for(CatalogPost, 'after_update')
+def _on_catalog_post_saved(mapper, connection, target: CatalogPost):
+    _defer(
+        target, slot_pools.sync_catalog_post,
+        target.id, target.is_active, target.is_priority, target.is_ad, target.catalog_number
+    )
+
+
+@event.listens_for(CatalogPost, 'after_delete')
+def _on_catalog_post_deleted(mapper, connection, target: CatalogPost):
+    _defer(target, slot_pools.discard_catalog_post, target.id)
+
+
+@event.listens_for(RatingPost, 'after_insert')
+@event.listens_for(RatingPost, 'after_update')
+def _on_rating_post_saved(mapper, connection, target: RatingPost):
+    _defer(target, slot_pools.sync_rating_post, target.id, target.status, target.gender)
+
+
+@event.listens_for(RatingPost, 'after_delete')
+def _on_rating_post_deleted(mapper, connection, target: RatingPost):
+    _defer(target, slot_pools.discard_rating_post, target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session):
+    changes = session.info.pop(_CHANGES_KEY, ())
+    # Незагруженные пулы прочитают зафиксированное состояние из БД сами
+    if slot_pools.loaded:
+        for apply, args in changes:
+            apply(*args)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _on_rollback(session, previous_transaction):
+    session.info.pop(_CHANGES_KEY, None)
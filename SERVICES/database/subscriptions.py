@@ -0,0 +1,291 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Set
+from sqlalchemy import select, delete, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from loguru import logger
+from DATABASE.base import async_session_maker
+from DATABASE.catalog import CatalogPost, Subscription, UserSession
+from SERVICES.notification.send_queue import outbound_queue
+from SERVICES.database.seen_posts import seen_posts
+from SERVICES.utils.seen_set import SeenSet
+
+SUBSCRIPTION_CATEGORY = 'category'
+# Подписчиков на один запрос к user_sessions
+DEDUPE_CHUNK_SIZE = 1000
+LATENCY_WINDOW = 256
+
+
+class SubscriptionIndex:
+    """
+    Индекс подписок в памяти: категория -> id подписчиков.
+    Загружается один раз, дальше обновляется событиями ORM по subscriptions
+    (после коммита).
+    """
+
+    def __init__(self):
+        self._followers: Dict[str, Set[int]] = {}
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.reload(session)
+
+    async def reload(self, session: AsyncSession):
+        result = await session.execute(
+            select(Subscription.subscription_value, Subscription.user_id)
+            .where(Subscription.subscription_type == SUBSCRIPTION_CATEGORY)
+        )
+        followers: Dict[str, Set[int]] = {}
+        for category, user_id in result.all():
+            followers.setdefault(category, set()).add(user_id)
+        self._followers = followers
+        self.loaded = True
+        logger.info(f"Индекс подписок загружен: {sum(len(s) for s in followers.values())} подписок")
+
+    def add(self, category: str, user_id: int):
+        self._followers.setdefault(category, set()).add(user_id)
+
+    def discard(self, category: str, user_id: int):
+        followers = self._followers.get(category)
+        if followers is not None:
+            followers.discard(user_id)
+            if not followers:
+                del self._followers[category]
+
+    def followers(self, category: str) -> Set[int]:
+        return self._followers.get(category, set())
+
+    def categories_of(self, user_id: int) -> List[str]:
+        return [category for category, users in self._followers.items() if user_id in users]
+
+
+subscription_index = SubscriptionIndex()
+
+
+class SubscriptionService:
+    """Подписки пользователей на категории каталога"""
+
+    @staticmethod
+    async def get_user_categories(session: AsyncSession, user_id: int) -> List[str]:
+        await subscription_index.ensure_loaded(session)
+        return subscription_index.categories_of(user_id)
+
+    @staticmethod
+    async def toggle(session: AsyncSession, user_id: int, category: str) -> bool:
+        """Подписать или отписать; True - пользователь теперь подписан"""
+        await subscription_index.ensure_loaded(session)
+
+        if user_id in subscription_index.followers(category):
+            await session.execute(
+                delete(Subscription).where(
+                    Subscription.user_id == user_id,
+                    Subscription.subscription_type == SUBSCRIPTION_CATEGORY,
+                    Subscription.subscription_value == category
+                )
+            )
+            await session.commit()
+            subscription_index.discard(category, user_id)
+            return False
+
+        session.add(Subscription(
+            user_id=user_id,
+            subscription_type=SUBSCRIPTION_CATEGORY,
+            subscription_value=category
+        ))
+        await session.commit()
+        return True
+
+
+class PublishedPost(NamedTuple):
+    post_id: int
+    catalog_number: int
+    category: str
+    name: str
+    author_id: Optional[int]
+    published_at: float
+
+
+class CategoryFanout:
+    """
+    Рассылка подписчикам категории о новой карточке.
+    Публикация только ставит задание в очередь (после commit), фоновая задача
+    берет подписчиков из индекса, отсеивает уже видевших пост по
+    картам просмотренного (user_sessions.seen_bitmap) и отдает сообщения
+    в исходящую очередь.
+    """
+
+    def __init__(self):
+        self._queue: "asyncio.Queue[PublishedPost]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+        self.published_total = 0
+        self.notified_total = 0
+        self.deduped_total = 0
+
+    def publish(self, post: PublishedPost):
+        self._queue.put_nowait(post)
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _run(self):
+        while True:
+            post = await self._queue.get()
+            try:
+                await self._fan_out(post)
+            except Exception as e:
+                logger.exception(f"Ошибка рассылки подписчикам карточки #{post.catalog_number}: {e}")
+
+    async def _fan_out(self, post: PublishedPost):
+        async with async_session_maker() as session:
+            await subscription_index.ensure_loaded(session)
+            recipients = sorted(subscription_index.followers(post.category) - {post.author_id})
+
+            notified = 0
+            for start in range(0, len(recipients), DEDUPE_CHUNK_SIZE):
+                chunk = recipients[start:start + DEDUPE_CHUNK_SIZE]
+                seen = await self._seen_by(session, chunk, post.catalog_number)
+                self.deduped_total += len(seen)
+                for user_id in chunk:
+                    if user_id not in seen:
+                        outbound_queue.enqueue(user_id, _notification_text(post))
+                        notified += 1
+
+        elapsed_ms = (time.monotonic() - post.published_at) * 1000
+        self._latencies.append(elapsed_ms)
+        self.published_total += 1
+        self.notified_total += notified
+        logger.info(
+            f"Карточка #{post.catalog_number} ({post.category}): {notified} подписчиков "
+            f"из {len(recipients)}, разослано за {elapsed_ms:.1f} мс"
+        )
+
+    @staticmethod
+    async def _seen_by(session: AsyncSession, user_ids: List[int], catalog_number: int) -> Set[int]:
+        """Кто уже видел карточку: кэш карт, для остальных - один запрос"""
+        seen: Set[int] = set()
+        missing: List[int] = []
+        for user_id in user_ids:
+            cached = seen_posts.peek(user_id)
+            if cached is None:
+                missing.append(user_id)
+            elif catalog_number in cached:
+                seen.add(user_id)
+
+        if missing:
+            result = await session.execute(
+                select(UserSession.user_id, UserSession.seen_bitmap)
+                .where(UserSession.user_id.in_(missing), UserSession.seen_bitmap.isnot(None))
+            )
+            for user_id, blob in result.all():
+                if catalog_number in SeenSet(seen_posts.high, blob):
+                    seen.add(user_id)
+        return seen
+
+    def get_metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            'queued': self._queue.qsize(),
+            'published_total': self.published_total,
+            'notified_total': self.notified_total,
+            'deduped_total': self.deduped_total,
+            'fanout_p50_ms': round(latencies[len(latencies) // 2], 2) if latencies else 0.0,
+            'fanout_max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        }
+
+
+category_fanout = CategoryFanout()
+
+
+def _notification_text(post: PublishedPost) -> str:
+    return (
+        f"🔔 <b>Новая карточка в категории «{post.category}»</b>\n\n"
+        f"<b>{post.name}</b>\n"
+        f"#{post.catalog_number}\n\n"
+        f"Отписаться: /categoryfollow"
+    )
+
+
+_PUBLISHED_KEY = 'published_catalog_posts'
+_SUBSCRIPTION_CHANGES_KEY = 'subscription_index_changes'
+
+
+def _defer_subscription(target: Subscription, apply):
+    session = inspect(target).session
+    if session is None:
+        return
+    session.info.setdefault(_SUBSCRIPTION_CHANGES_KEY, []).append(
+        (apply, target.subscription_value, target.user_id)
+    )
+
+
+@event.listens_for(Subscription, 'after_insert')
+def _on_subscription_added(mapper, connection, target: Subscription):
+    if target.subscription_type == SUBSCRIPTION_CATEGORY:
+        _defer_subscription(target, subscription_index.add)
+
+
+@event.listens_for(Subscription, 'after_delete')
+def _on_subscription_deleted(mapper, connection, target: Subscription):
+    if target.subscription_type == SUBSCRIPTION_CATEGORY:
+        _defer_subscription(target, subscription_index.discard)
+
+
+def _defer_publish(target: CatalogPost):
+    session = inspect(target).session
+    if session is None:
+        return
+    session.info.setdefault(_PUBLISHED_KEY, []).append(PublishedPost(
+        target.id, target.catalog_number, target.category, target.name,
+        target.user_id, time.monotonic()
+    ))
+
+
+@event.listens_for(CatalogPost, 'after_insert')
+def _on_catalog_post_inserted(mapper, connection, target: CatalogPost):
+    if target.is_active is not False:
+        _defer_publish(target)
+
+
+@event.listens_for(CatalogPost, 'after_update')
+def _on_catalog_post_updated(mapper, connection, target: CatalogPost):
+    history = inspect(target).attrs.is_active.history
+    if target.is_active and history.has_changes():
+        _defer_publish(target)
+
+
+@event.listens_for(Session, 'after_commit')
+def _on_commit(session):
+    # Индекс подписок - до рассылки, чтобы она видела подписки той же транзакции
+    changes = session.info.pop(_SUBSCRIPTION_CHANGES_KEY, ())
+    if subscription_index.loaded:
+        for apply, category, user_id in changes:
+            apply(category, user_id)
+    # Рассылка только для зафиксированных публикаций
+    for post in session.info.pop(_PUBLISHED_KEY, ()):
+        category_fanout.publish(post)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _on_rollback(session, previous_transaction):
+    session.info.pop(_SUBSCRIPTION_CHANGES_KEY, None)
+    session.info.pop(_PUBLISHED_KEY, None)
@@ -0,0 +1,11 @@
+from DATABASE.users import User
+from CORE.config import settings
+from SERVICES.utils.number_pool import FreeNumberPool
+from SERVICES.database.number_allocator import NumberAllocator
+
+# Пул UID пользователей (зарезервированные UID не выдаются автоматически)
+uid_allocator = NumberAllocator(
+    'uid',
+    FreeNumberPool(settings.MIN_UID, settings.MAX_UID, excluded=settings.RESERVED_UIDS)
+)
+uid_allocator.track(User, 'uid')
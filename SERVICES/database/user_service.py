@@ -1,26 +1,12 @@
-import random
 from typing import Optional
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from loguru import logger
 from DATABASE.users import User
 from CORE.config import settings
+from SERVICES.database.uid_allocator import uid_allocator
 
 class UserService:
-    @staticmethod
-    async def generate_unique_uid(session: AsyncSession) -> int:
-        available_uids = set(range(settings.MIN_UID, settings.MAX_UID + 1))
-        available_uids -= set(settings.RESERVED_UIDS)
-        
-        result = await session.execute(select(User.uid))
-        used_uids = {row[0] for row in result.all()}
-        available_uids -= used_uids
-        
-        if not available_uids:
-            raise ValueError("Нет доступных UID!")
-        
-        return random.choice(list(available_uids))
-    
     @staticmethod
     async def get_or_create_user(session: AsyncSession, user_id: int, username: Optional[str] = None,
                                  first_name: Optional[str] = None, last_name: Optional[str] = None,
@@ -29,18 +15,20 @@ class UserService:
         user = result.scalar_one_or_none()
         
         if user:
-            user.username = username
-            user.first_name = first_name
-            user.last_name = last_name
-            user.language_code = language_code
-            await session.commit()
-            logger.debug(f"Обновлен пользователь {user_id}")
+            profile = {'username': username, 'first_name': first_name,
+                       'last_name': last_name, 'language_code': language_code}
+            changed = {field: value for field, value in profile.items() if getattr(user, field) != value}
+            if changed:
+                for field, value in changed.items():
+                    setattr(user, field, value)
+                await session.commit()
+                logger.debug(f"Обновлен пользователь {user_id}: {', '.join(changed)}")
         else:
-            uid = await UserService.generate_unique_uid(session)
-            user = User(id=user_id, uid=uid, username=username, first_name=first_name,
-                       last_name=last_name, language_code=language_code)
-            session.add(user)
-            await session.commit()
+            async with uid_allocator.reserve(session) as uid:
+                user = User(id=user_id, uid=uid, username=username, first_name=first_name,
+                           last_name=last_name, language_code=language_code)
+                session.add(user)
+                await session.commit()
             await session.refresh(user)
             logger.info(f"✅ Создан пользователь {user_id} с UID: {uid}")
         
@@ -69,9 +57,12 @@ class UserService:
         if existing_user:
             return False, f"UID {new_uid} уже занят пользователем @{existing_user.username}"
         
-        old_uid = user.uid
-        user.uid = new_uid
-        await session.commit()
+        async with uid_allocator.claim(session, new_uid) as claimed:
+            if not claimed:
+                return False, f"UID {new_uid} уже занят"
+            old_uid = user.uid
+            user.uid = new_uid
+            await session.commit()
         
         logger.info(f"✅ UID изменен: {old_uid} -> {new_uid} для @{user.username}")
         return True, f"✅ UID успешно изменен с {old_uid} на {new_uid}"
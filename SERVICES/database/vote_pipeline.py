@@ -0,0 +1,164 @@
+import asyncio
+import time
+from typing import Dict, List, Tuple
+from sqlalchemy import BigInteger, Integer, exists, insert, literal, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from DATABASE.base import get_session
+from DATABASE.games import RatingPost, RatingVote, RatingVoteClaim
+from CORE.config import settings
+from SERVICES.utils.bulk_update import build_values_update
+from SERVICES.database.leaderboard import leaderboards
+from ANALYTICS.daily_rollups import daily_rollups, STAT_VOTES
+from ANALYTICS.event_log import event_recorder, EVENT_VOTE
+
+
+class VotePipeline:
+    """
+    Прием голосов одним запросом:
+    WITH claim AS (INSERT INTO rating_vote_claims ... ON CONFLICT DO NOTHING RETURNING ...)
+    INSERT INTO rating_votes SELECT ... FROM claim
+    (уникальность держит rating_vote_claims - секционированная rating_votes не может).
+    SQLite не поддерживает изменяющие CTE - там те же два запроса в одной транзакции.
+    Отметка ставится только для существующего поста (WHERE EXISTS), поэтому
+    отсутствие поста не зависит от проверки внешних ключей в СУБД.
+    Дельты total_score/vote_count копятся в памяти и применяются пакетным
+    атомарным UPDATE (total_score = total_score + x) - без потерянных обновлений
+    при одновременных голосах за один пост.
+    """
+
+    def __init__(self):
+        # rating_post_id -> [дельта счета, дельта числа голосов]
+        self._deltas: Dict[int, List[int]] = {}
+        self._lock = asyncio.Lock()
+
+        self.accepted_total = 0
+        self.duplicates_total = 0
+        self.last_flush_ms = 0.0
+
+    @staticmethod
+    def _insert(session: AsyncSession, model):
+        dialect = session.bind.dialect.name
+        return postgresql.insert(model) if dialect == 'postgresql' else sqlite.insert(model)
+
+    async def submit(
+        self,
+        session: AsyncSession,
+        rating_post_id: int,
+        user_id: int,
+        vote_value: int
+    ) -> Tuple[bool, str]:
+        """Принять голос (один запрос; на SQLite - два в одной транзакции)"""
+        if vote_value < settings.MIN_VOTE or vote_value > settings.MAX_VOTE:
+            return False, f"Голос должен быть от {settings.MIN_VOTE} до {settings.MAX_VOTE}"
+
+        claim = (
+            self._insert(session, RatingVoteClaim)
+            .from_select(
+                ['rating_post_id', 'user_id'],
+                select(literal(rating_post_id, Integer), literal(user_id, BigInteger))
+                .where(exists().where(RatingPost.id == rating_post_id))
+            )
+            .on_conflict_do_nothing(index_elements=['rating_post_id', 'user_id'])
+            .returning(RatingVoteClaim.rating_post_id, RatingVoteClaim.user_id)
+        )
+
+        try:
+            if session.bind.dialect.name == 'postgresql':
+                claimed_cte = claim.cte('claim')
+                vote = (
+                    insert(RatingVote)
+                    .from_select(
+                        ['rating_post_id', 'user_id', 'vote_value'],
+                        select(claimed_cte.c.rating_post_id, claimed_cte.c.user_id, literal(vote_value, Integer))
+                    )
+                    .returning(RatingVote.rating_post_id)
+                )
+                claimed = (await session.execute(vote)).scalar_one_or_none()
+            else:
+                claimed = (await session.execute(claim)).first()
+                if claimed is not None:
+                    await session.execute(
+                        insert(RatingVote)
+                        .values(rating_post_id=rating_post_id, user_id=user_id, vote_value=vote_value)
+                    )
+            await session.commit()
+        except IntegrityError:
+            # Нарушение внешнего ключа (Postgres) - поста или пользователя нет
+            await session.rollback()
+            return False, "Пост не найден"
+
+        if claimed is None:
+            # Ничего не вставлено: повторный голос или поста нет (редкий путь, отдельный запрос)
+            post_exists = await session.scalar(select(exists().where(RatingPost.id == rating_post_id)))
+            if not post_exists:
+                return False, "Пост не найден"
+            self.duplicates_total += 1
+            return False, "Вы уже голосовали за этот пост"
+
+        self.accepted_total += 1
+        deltas = self._deltas.get(rating_post_id)
+        if deltas is None:
+            self._deltas[rating_post_id] = [vote_value, 1]
+        else:
+            deltas[0] += vote_value
+            deltas[1] += 1
+        leaderboards.apply_vote(rating_post_id, vote_value)
+        daily_rollups.incr(STAT_VOTES)
+        event_recorder.record(EVENT_VOTE, user_id, rating_post_id, vote_value)
+
+        logger.info(f"Пользователь {user_id} проголосовал {vote_value} за пост {rating_post_id}")
+        return True, "Голос учтен!"
+
+    @property
+    def depth(self) -> int:
+        return len(self._deltas)
+
+    async def flush(self) -> int:
+        """Применить накопленные дельты рейтинга одним пакетом"""
+        async with self._lock:
+            if not self._deltas:
+                return 0
+
+            pending, self._deltas = self._deltas, {}
+            started = time.perf_counter()
+
+            try:
+                async for session in get_session():
+                    statements = build_values_update(
+                        table='rating_posts',
+                        key='id',
+                        columns={'id': 'INTEGER', 'score': 'INTEGER', 'votes': 'INTEGER'},
+                        set_clauses={
+                            'total_score': 't.total_score + v.score',
+                            'vote_count': 't.vote_count + v.votes',
+                        },
+                        rows=[(post_id, score, votes) for post_id, (score, votes) in pending.items()]
+                    )
+                    for statement, params in statements:
+                        await session.execute(statement, params)
+                    await session.commit()
+            except Exception as e:
+                for post_id, (score, votes) in pending.items():
+                    current = self._deltas.setdefault(post_id, [0, 0])
+                    current[0] += score
+                    current[1] += votes
+                logger.error(f"Ошибка применения голосов, дельты возвращены в буфер: {e}")
+                return 0
+
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            logger.debug(f"Голоса применены к {len(pending)} постам за {self.last_flush_ms:.1f} мс")
+            return len(pending)
+
+    def get_metrics(self) -> dict:
+        return {
+            'pending_posts': self.depth,
+            'accepted_total': self.accepted_total,
+            'duplicates_total': self.duplicates_total,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+        }
+
+
+vote_pipeline = VotePipeline()
@@ -2,9 +2,13 @@ from aiogram import Bot
 from loguru import logger
 from CORE.config import settings
 from typing import Optional
+from SERVICES.notification.send_queue import outbound_queue
 
 class AdminNotifier:
-    """Сервис для отправки уведомлений админам"""
+    """
+    Сервис для отправки уведомлений админам.
+    Сообщения ставятся в исходящую очередь и не задерживают обработчик.
+    """
     
     @staticmethod
     async def notify_new_rating_post(bot: Bot, post_id: int, username: str):
@@ -16,11 +20,8 @@ class AdminNotifier:
             f"Требуется модерация!"
         )
         
-        try:
-            await bot.send_message(settings.ZAYAVKI_ID, message)
-            logger.info(f"Отправлено уведомление о заявке {post_id}")
-        except Exception as e:
-            logger.error(f"Ошибка отправки уведомления админам: {e}")
+        outbound_queue.enqueue(settings.ZAYAVKI_ID, message)
+        logger.info(f"Уведомление о заявке {post_id} поставлено в очередь")
     
     @staticmethod
     async def notify_new_catalog_post(bot: Bot, catalog_number: int, category: str):
@@ -32,10 +33,7 @@ class AdminNotifier:
             f"Требуется модерация!"
         )
         
-        try:
-            await bot.send_message(settings.ZAYAVKI_ID, message)
-        except Exception as e:
-            logger.error(f"Ошибка отправки уведомления: {e}")
+        outbound_queue.enqueue(settings.ZAYAVKI_ID, message)
     
     @staticmethod
     async def notify_error(bot: Bot, error_text: str, context: Optional[str] = None):
@@ -48,15 +46,9 @@ class AdminNotifier:
         if context:
             message += f"\nКонтекст: {context}"
         
-        try:
-            await bot.send_message(settings.erranncom_ID, message)
-        except Exception as e:
-            logger.error(f"Не удалось отправить уведомление об ошибке: {e}")
+        outbound_queue.enqueue(settings.ERRANNCOM_ID, message)
     
     @staticmethod
     async def send_stats_notification(bot: Bot, stats_text: str):
         """Отправка статистики"""
-        try:
-            await bot.send_message(settings.statification_ID, stats_text)
-        except Exception as e:
-            logger.error(f"Ошибка отправки статистики: {e}")
+        outbound_queue.enqueue(settings.STATIFICATION_ID, stats_text)
@@ -0,0 +1,266 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter, TelegramForbiddenError, TelegramAPIError
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from DATABASE.base import async_session_maker
+from DATABASE.users import User
+from DATABASE.broadcasts import Broadcast
+from CORE.config import settings
+from SERVICES.notification.send_queue import outbound_queue
+from SERVICES.utils.rate_limiter import TokenBucket
+
+# Получателей на одну порцию серверного курсора (и на одну контрольную точку)
+CHUNK_SIZE = 500
+WORKERS = 16
+# Доля рассылки в общем лимите бота (30/с, ведро outbound_queue):
+# остаток достается уведомлениям и ответам пользователям
+SEND_RATE = 25.0
+REPORT_INTERVAL = 60
+MAX_RETRIES = 3
+
+
+def _recipients(after_user_id: int):
+    return (
+        select(User.id)
+        .where(
+            User.id > after_user_id,
+            User.is_banned.is_(False),
+            User.is_blocked.is_(False)
+        )
+        .order_by(User.id)
+    )
+
+
+class _Run:
+    """Состояние одной выполняемой рассылки"""
+
+    def __init__(self, broadcast: Broadcast):
+        self.id = broadcast.id
+        self.text = broadcast.text
+        self.total = broadcast.total
+        self.last_user_id = broadcast.last_user_id
+        self.sent = broadcast.sent
+        self.failed = broadcast.failed
+        self.blocked = broadcast.blocked
+        self.started = time.monotonic()
+        self.done_at_start = broadcast.sent + broadcast.failed + broadcast.blocked
+        self.reported = self.started
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+    def progress_text(self, title: str) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        rate = (self.processed - self.done_at_start) / elapsed
+        left = max(self.total - self.processed, 0)
+        eta = f"{int(left / rate // 60)} мин {int(left / rate % 60)} с" if rate > 0 else "—"
+        return (
+            f"📣 <b>{title} #{self.id}</b>\n\n"
+            f"Обработано: {self.processed}/{self.total}\n"
+            f"✅ Доставлено: {self.sent}\n"
+            f"🚫 Заблокировали бота: {self.blocked}\n"
+            f"❌ Ошибок: {self.failed}\n"
+            f"⚡ Скорость: {rate:.1f} сообщ./с\n"
+            f"⏳ Осталось: {eta}"
+        )
+
+
+class BroadcastEngine:
+    """
+    Рассылка всем пользователям.
+    Получатели читаются из users серверным курсором порциями по id,
+    отправка идет пулом воркеров: токен берется и из ведра рассылки,
+    и из глобального ведра outbound_queue, так что вместе они не превышают 30/с.
+    После каждой порции прогресс сохраняется в broadcasts, поэтому
+    после перезапуска рассылка продолжается с места остановки.
+    """
+
+    def __init__(self, workers: int = WORKERS, rate: float = SEND_RATE):
+        self.workers = workers
+        self._bucket = TokenBucket(rate, rate, time.monotonic())
+        self._bucket_lock = asyncio.Lock()
+        self._runs: Dict[int, _Run] = {}
+        self._bot: Optional[Bot] = None
+
+    async def _acquire(self):
+        """Дождаться токена ведра рассылки и глобального ведра бота"""
+        shared = outbound_queue.global_bucket
+        async with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                wait = max(self._bucket.wait_time(now), shared.wait_time(now))
+                if not wait:
+                    self._bucket.consume(now)
+                    shared.consume(now)
+                    return
+                await asyncio.sleep(wait)
+
+    async def start(self, session: AsyncSession, bot: Bot, text: str, admin_id: int) -> Broadcast:
+        """Создать рассылку и запустить ее"""
+        total = await session.scalar(select(func.count()).select_from(_recipients(0).subquery()))
+        broadcast = Broadcast(text=text, created_by=admin_id, total=total or 0)
+        session.add(broadcast)
+        await session.commit()
+
+        self._launch(bot, broadcast)
+        logger.info(f"Рассылка #{broadcast.id} запущена: {broadcast.total} получателей")
+        return broadcast
+
+    async def resume(self, bot: Bot) -> int:
+        """Продолжить незавершенные рассылки (при запуске бота)"""
+        async with async_session_maker() as session:
+            result = await session.scalars(select(Broadcast).where(Broadcast.status == 'running'))
+            broadcasts = result.all()
+        for broadcast in broadcasts:
+            self._launch(bot, broadcast)
+            logger.info(f"Рассылка #{broadcast.id} продолжена с пользователя {broadcast.last_user_id}")
+        return len(broadcasts)
+
+    async def cancel(self, broadcast_id: int) -> bool:
+        run = self._runs.get(broadcast_id)
+        if run is None:
+            return False
+        run.task.cancel()
+        try:
+            await run.task
+        except asyncio.CancelledError:
+            pass
+        await self._finish(run, 'cancelled')
+        return True
+
+    async def stop(self):
+        """Остановить рассылки при выключении бота (статус остается running)"""
+        runs = list(self._runs.values())
+        for run in runs:
+            run.task.cancel()
+        for run in runs:
+            try:
+                await run.task
+            except asyncio.CancelledError:
+                pass
+
+    def active(self) -> List[int]:
+        return list(self._runs)
+
+    def _launch(self, bot: Bot, broadcast: Broadcast):
+        run = _Run(broadcast)
+        run.task = asyncio.create_task(self._run(bot, run))
+        self._runs[run.id] = run
+
+    async def _run(self, bot: Bot, run: _Run):
+        try:
+            async with async_session_maker() as session:
+                result = await session.stream_scalars(
+                    _recipients(run.last_user_id).execution_options(yield_per=CHUNK_SIZE)
+                )
+                async for chunk in result.partitions(CHUNK_SIZE):
+                    await self._send_chunk(bot, run, chunk)
+                    self._report_if_due(run)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception(f"Рассылка #{run.id} прервана ошибкой: {e}")
+            self._runs.pop(run.id, None)
+            return
+        await self._finish(run, 'done')
+
+    async def _send_chunk(self, bot: Bot, run: _Run, user_ids: List[int]):
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, user_id in enumerate(user_ids):
+            queue.put_nowait((index, user_id))
+        done = bytearray(len(user_ids))
+        blocked: List[int] = []
+
+        async def worker():
+            while not queue.empty():
+                index, user_id = queue.get_nowait()
+                status = await self._deliver(bot, user_id, run.text)
+                if status == 'sent':
+                    run.sent += 1
+                elif status == 'blocked':
+                    run.blocked += 1
+                    blocked.append(user_id)
+                else:
+                    run.failed += 1
+                done[index] = 1
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.workers, len(user_ids)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            # Контрольная точка - по непрерывному префиксу обработанных
+            prefix = done.find(0)
+            prefix = len(user_ids) if prefix == -1 else prefix
+            if prefix:
+                run.last_user_id = user_ids[prefix - 1]
+            await asyncio.shield(self._checkpoint(run, blocked))
+
+    async def _deliver(self, bot: Bot, user_id: int, text: str) -> str:
+        for _ in range(MAX_RETRIES):
+            await self._acquire()
+            try:
+                await bot.send_message(user_id, text)
+                return 'sent'
+            except TelegramRetryAfter as e:
+                # Флуд-лимит общий: притормаживаем всех воркеров
+                async with self._bucket_lock:
+                    await asyncio.sleep(e.retry_after)
+            except TelegramForbiddenError:
+                return 'blocked'
+            except TelegramAPIError as e:
+                logger.debug(f"Рассылка: не доставлено {user_id}: {e}")
+                return 'failed'
+        return 'failed'
+
+    async def _checkpoint(self, run: _Run, blocked: List[int]):
+        async with async_session_maker() as session:
+            if blocked:
+                await session.execute(
+                    update(User).where(User.id.in_(blocked)).values(is_blocked=True)
+                )
+            await session.execute(
+                update(Broadcast)
+                .where(Broadcast.id == run.id)
+                .values(
+                    last_user_id=run.last_user_id,
+                    sent=run.sent,
+                    failed=run.failed,
+                    blocked=run.blocked
+                )
+            )
+            await session.commit()
+
+    def _report_if_due(self, run: _Run):
+        now = time.monotonic()
+        if now - run.reported >= REPORT_INTERVAL:
+            run.reported = now
+            outbound_queue.enqueue(settings.STATIFICATION_ID, run.progress_text("Рассылка"))
+
+    async def _finish(self, run: _Run, status: str):
+        self._runs.pop(run.id, None)
+        async with async_session_maker() as session:
+            await session.execute(
+                update(Broadcast)
+                .where(Broadcast.id == run.id)
+                .values(status=status, finished_at=datetime.utcnow())
+            )
+            await session.commit()
+
+        title = "Рассылка завершена" if status == 'done' else "Рассылка отменена"
+        outbound_queue.enqueue(settings.STATIFICATION_ID, run.progress_text(title))
+        logger.info(f"Рассылка #{run.id}: {status}, доставлено {run.sent}/{run.total}")
+
+    def get_metrics(self) -> Dict[int, Tuple[int, int]]:
+        return {run_id: (run.processed, run.total) for run_id, run in self._runs.items()}
+
+
+broadcast_engine = BroadcastEngine()
@@ -0,0 +1,308 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramRetryAfter,
+    TelegramNetworkError,
+    TelegramServerError,
+    TelegramAPIError,
+)
+from loguru import logger
+from CORE.config import settings
+from SERVICES.utils.rate_limiter import TokenBucket
+
+# Лимиты Telegram: ~30 сообщений/с всего, 20 сообщений/мин в одну группу, ~1/с в личный чат
+GLOBAL_RATE = 30.0
+GROUP_RATE = 20 / 60
+GROUP_BURST = 20
+PRIVATE_RATE = 1.0
+PRIVATE_BURST = 3
+
+MAX_MESSAGE_LENGTH = 4096
+COALESCE_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+MAX_ATTEMPTS = 5
+
+
+class OutboundMessage:
+    __slots__ = ('chat_id', 'text', 'attempts')
+
+    def __init__(self, chat_id: int, text: str, attempts: int = 0):
+        self.chat_id = chat_id
+        self.text = text
+        self.attempts = attempts
+
+
+class _ChatLane:
+    """Очередь одного чата со своим ведром токенов"""
+
+    __slots__ = ('messages', 'bucket', 'not_before', 'busy')
+
+    def __init__(self, chat_id: int, now: float):
+        if chat_id < 0:
+            self.bucket = TokenBucket(GROUP_RATE, GROUP_BURST, now)
+        else:
+            self.bucket = TokenBucket(PRIVATE_RATE, PRIVATE_BURST, now)
+        self.messages: Deque[OutboundMessage] = deque()
+        self.not_before = 0.0
+        self.busy = False
+
+
+class OutboundQueue:
+    """
+    Исходящая очередь сообщений бота.
+    Обработчики только ставят сообщение в очередь; фоновая задача отправляет
+    их с глобальным и поканальным ведрами токенов, соблюдает retry_after
+    и склеивает накопившиеся уведомления в один чат в одно сообщение.
+    Неотправленное при остановке бота пишется в спул на диске (вместе с числом
+    попыток) и отправляется повторно; исчерпавшие MAX_ATTEMPTS сообщения
+    уходят в файл недоставленных (<спул>.dead) и больше не повторяются.
+    Опустевшие очереди чатов удаляются, как только их ведро снова полное.
+    """
+
+    def __init__(
+        self,
+        spool_path: str = 'logs/outbound_spool.jsonl',
+        max_parallel: int = 8,
+        clock=time.monotonic
+    ):
+        self.spool_path = spool_path
+        self.clock = clock
+        self._bot: Optional[Bot] = None
+        # Общий лимит бота: из этого же ведра берет токены рассылка
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_RATE, clock())
+        self._lanes: Dict[int, _ChatLane] = {}
+        self._order: Deque[int] = deque()
+        # Чаты, очередь которых опустела после отправки (кандидаты на удаление)
+        self._idle: Deque[int] = deque()
+        self._wakeup = asyncio.Event()
+        self._parallel = asyncio.Semaphore(max_parallel)
+        self._sending: set = set()
+        self._worker: Optional[asyncio.Task] = None
+
+        self.sent_total = 0
+        self.coalesced_total = 0
+        self.retry_after_total = 0
+        self.spooled_total = 0
+        self.dropped_total = 0
+
+    @property
+    def depth(self) -> int:
+        return sum(len(lane.messages) for lane in self._lanes.values())
+
+    def enqueue(self, chat_id: int, text: str, attempts: int = 0):
+        """Поставить сообщение в очередь (не блокирует)"""
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = _ChatLane(chat_id, self.clock())
+        if not lane.messages and not lane.busy:
+            self._order.append(chat_id)
+        lane.messages.append(OutboundMessage(chat_id, text, attempts))
+        self._wakeup.set()
+
+    def start(self, bot: Bot):
+        if self._worker is not None:
+            return
+        self._bot = bot
+        self.load_spool()
+        self._worker = asyncio.create_task(self._run())
+        logger.info("✅ Очередь исходящих сообщений запущена")
+
+    async def stop(self, timeout: float = 5.0):
+        """Дослать очередь за timeout секунд, остаток - в спул"""
+        if self._worker is None:
+            return
+        deadline = self.clock() + timeout
+        while (self.depth or self._sending) and self.clock() < deadline:
+            await asyncio.sleep(0.1)
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        leftover = [message for lane in self._lanes.values() for message in lane.messages]
+        self._lanes.clear()
+        self._order.clear()
+        self._idle.clear()
+        if leftover:
+            self._spool(leftover)
+            logger.warning(f"В спул записано неотправленных сообщений: {len(leftover)}")
+
+    def _take_batch(self, lane: _ChatLane) -> List[OutboundMessage]:
+        """Склеить подряд идущие сообщения в одно, не длиннее лимита Telegram"""
+        batch = [lane.messages.popleft()]
+        length = len(batch[0].text)
+        while lane.messages:
+            extra = len(COALESCE_SEPARATOR) + len(lane.messages[0].text)
+            if length + extra > MAX_MESSAGE_LENGTH:
+                break
+            batch.append(lane.messages.popleft())
+            length += extra
+        return batch
+
+    def _next_ready(self, now: float):
+        """Первый по кругу чат, который можно отправить сейчас, и время ожидания иначе"""
+        wait = None
+        for _ in range(len(self._order)):
+            chat_id = self._order.popleft()
+            lane = self._lanes[chat_id]
+            delay = max(lane.not_before - now, lane.bucket.wait_time(now))
+            if delay <= 0:
+                return chat_id, 0.0
+            self._order.append(chat_id)
+            wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    async def _run(self):
+        while True:
+            now = self.clock()
+            global_wait = self.global_bucket.wait_time(now)
+            if global_wait:
+                await asyncio.sleep(global_wait)
+                continue
+
+            chat_id, wait = self._next_ready(now)
+            if chat_id is None:
+                self._prune_idle(now)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            lane = self._lanes[chat_id]
+            self.global_bucket.consume(now)
+            lane.bucket.consume(now)
+            lane.busy = True
+            batch = self._take_batch(lane)
+
+            await self._parallel.acquire()
+            task = asyncio.create_task(self._send(lane, batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, lane: _ChatLane, batch: List[OutboundMessage]):
+        chat_id = batch[0].chat_id
+        text = COALESCE_SEPARATOR.join(message.text for message in batch)
+        try:
+            await self._bot.send_message(chat_id, text)
+            self.sent_total += 1
+            self.coalesced_total += len(batch) - 1
+        except TelegramRetryAfter as e:
+            self.retry_after_total += 1
+            lane.not_before = self.clock() + e.retry_after
+            lane.messages.extendleft(reversed(batch))
+            logger.warning(f"Flood limit для чата {chat_id}, пауза {e.retry_after} с")
+        except (TelegramNetworkError, TelegramServerError) as e:
+            for message in batch:
+                message.attempts += 1
+            retry = [message for message in batch if message.attempts < MAX_ATTEMPTS]
+            exhausted = [message for message in batch if message.attempts >= MAX_ATTEMPTS]
+            if exhausted:
+                self._dead_letter(exhausted)
+            lane.not_before = self.clock() + min(60, 2 ** batch[0].attempts)
+            lane.messages.extendleft(reversed(retry))
+            logger.warning(f"Ошибка отправки в чат {chat_id}, повтор позже: {e}")
+        except TelegramAPIError as e:
+            # Неверный запрос, бот заблокирован и т.п. - повтор не поможет
+            self.dropped_total += len(batch)
+            logger.error(f"Сообщение в чат {chat_id} отброшено: {e}")
+        finally:
+            lane.busy = False
+            self._parallel.release()
+            if lane.messages:
+                self._order.append(chat_id)
+            else:
+                self._idle.append(chat_id)
+            self._wakeup.set()
+
+    def _prune_idle(self, now: float):
+        """Удалить пустые очереди чатов, чьи ведра уже полные (иначе лимит чата сбросился бы)"""
+        for _ in range(len(self._idle)):
+            chat_id = self._idle.popleft()
+            lane = self._lanes.get(chat_id)
+            if lane is None or lane.messages or lane.busy:
+                continue
+            if lane.not_before <= now and lane.bucket.idle_full(now):
+                del self._lanes[chat_id]
+            else:
+                self._idle.append(chat_id)
+
+    @staticmethod
+    def _write(path: str, messages: List[OutboundMessage]):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as spool:
+            for message in messages:
+                spool.write(json.dumps(
+                    {'chat_id': message.chat_id, 'text': message.text, 'attempts': message.attempts},
+                    ensure_ascii=False
+                ) + '\n')
+
+    def _spool(self, messages: List[OutboundMessage]):
+        self._write(self.spool_path, messages)
+        self.spooled_total += len(messages)
+
+    def _dead_letter(self, messages: List[OutboundMessage]):
+        self._write(self.spool_path + '.dead', messages)
+        self.dropped_total += len(messages)
+        logger.error(f"Исчерпаны попытки отправки, в недоставленные: {len(messages)}")
+
+    def load_spool(self) -> int:
+        """
+        Вернуть сообщения из спула в очередь (задача планировщика и запуск).
+        Оставшийся от прерванной загрузки .processing читается первым.
+        """
+        processing = self.spool_path + '.processing'
+        if os.path.exists(self.spool_path):
+            if os.path.exists(processing):
+                with open(self.spool_path, encoding='utf-8') as spool, \
+                        open(processing, 'a', encoding='utf-8') as target:
+                    target.write(spool.read())
+                os.remove(self.spool_path)
+            else:
+                os.replace(self.spool_path, processing)
+        elif not os.path.exists(processing):
+            return 0
+
+        loaded = 0
+        exhausted: List[OutboundMessage] = []
+        with open(processing, encoding='utf-8') as spool:
+            for line in spool:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                attempts = item.get('attempts', 0)
+                if attempts >= MAX_ATTEMPTS:
+                    exhausted.append(OutboundMessage(item['chat_id'], item['text'], attempts))
+                    continue
+                self.enqueue(item['chat_id'], item['text'], attempts)
+                loaded += 1
+        if exhausted:
+            self._dead_letter(exhausted)
+        os.remove(processing)
+
+        if loaded:
+            logger.info(f"Из спула возвращено сообщений: {loaded}")
+        return loaded
+
+    def get_metrics(self) -> dict:
+        return {
+            'depth': self.depth,
+            'chats': len(self._lanes),
+            'sent_total': self.sent_total,
+            'coalesced_total': self.coalesced_total,
+            'retry_after_total': self.retry_after_total,
+            'spooled_total': self.spooled_total,
+            'dropped_total': self.dropped_total,
+        }
+
+
+outbound_queue = OutboundQueue(spool_path=settings.OUTBOUND_SPOOL_PATH)
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from sqlalchemy import DateTime
+from DATABASE.base import get_session
+from SERVICES.utils.bulk_update import build_values_update
+
+# (username, first_name, last_name, language_code)
+Profile = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+class ActivityTracker:
+    """
+    Учет активности пользователей без записи в БД на каждое сообщение.
+    Профили известных пользователей держатся в LRU-кэше, а дельты
+    message_count и last_activity пишутся пакетом по расписанию.
+    """
+
+    def __init__(self, max_cached_users: int = 50000):
+        self.max_cached_users = max_cached_users
+        self._profiles: "OrderedDict[int, Profile]" = OrderedDict()
+        self._pending: Dict[int, List] = {}
+        self._lock = asyncio.Lock()
+
+        self.last_flush_ms = 0.0
+        self.flushed_users_total = 0
+
+    def is_current(self, user_id: int, profile: Profile) -> bool:
+        """Пользователь уже есть в БД и его профиль не менялся"""
+        cached = self._profiles.get(user_id)
+        if cached is None or cached != profile:
+            return False
+        self._profiles.move_to_end(user_id)
+        return True
+
+    def remember(self, user_id: int, profile: Profile):
+        """Запомнить профиль, записанный в БД"""
+        self._profiles[user_id] = profile
+        self._profiles.move_to_end(user_id)
+        while len(self._profiles) > self.max_cached_users:
+            self._profiles.popitem(last=False)
+
+    def touch(self, user_id: int):
+        """Учесть сообщение пользователя"""
+        now = datetime.now(timezone.utc)
+        pending = self._pending.get(user_id)
+        if pending is None:
+            self._pending[user_id] = [1, now]
+        else:
+            pending[0] += 1
+            pending[1] = now
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    async def flush(self) -> int:
+        """Записать накопленную активность одним пакетом"""
+        async with self._lock:
+            if not self._pending:
+                return 0
+
+            pending, self._pending = self._pending, {}
+            started = time.perf_counter()
+
+            try:
+                async for session in get_session():
+                    dialect = session.bind.dialect
+                    if dialect.name == 'sqlite':
+                        # В SQLite нет GREATEST и TIMESTAMPTZ: дата хранится строкой
+                        # в формате SQLAlchemy, двухаргументный MAX сравнивает строки
+                        ts_type, latest = 'TEXT', 'MAX(t.last_activity, v.last_activity)'
+                        to_db = DateTime().dialect_impl(dialect).bind_processor(dialect)
+                    else:
+                        ts_type, latest = 'TIMESTAMPTZ', 'GREATEST(t.last_activity, v.last_activity)'
+                        to_db = None
+
+                    statements = build_values_update(
+                        table='users',
+                        key='id',
+                        columns={'id': 'BIGINT', 'message_count': 'INTEGER', 'last_activity': ts_type},
+                        set_clauses={
+                            'message_count': 't.message_count + v.message_count',
+                            'last_activity': latest,
+                        },
+                        rows=[
+                            (user_id, count, to_db(ts) if to_db else ts)
+                            for user_id, (count, ts) in pending.items()
+                        ]
+                    )
+                    for statement, params in statements:
+                        await session.execute(statement, params)
+                    await session.commit()
+            except Exception as e:
+                for user_id, (count, ts) in pending.items():
+                    current = self._pending.setdefault(user_id, [0, ts])
+                    current[0] += count
+                    current[1] = max(current[1], ts)
+                logger.error(f"Ошибка записи активности пользователей: {e}")
+                return 0
+
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+            self.flushed_users_total += len(pending)
+            logger.debug(f"Активность записана: {len(pending)} пользователей за {self.last_flush_ms:.1f} мс")
+            return len(pending)
+
+    def get_metrics(self) -> dict:
+        return {
+            'cached_users': len(self._profiles),
+            'pending_users': self.depth,
+            'flushed_users_total': self.flushed_users_total,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+        }
+
+
+activity_tracker = ActivityTracker()
@@ -0,0 +1,53 @@
+from typing import Any, Dict, List, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.sql.elements import TextClause
+
+# asyncpg ограничивает число параметров в одном запросе (32767)
+MAX_ROWS_PER_STATEMENT = 1000
+
+
+def build_values_update(
+    table: str,
+    key: str,
+    columns: Dict[str, str],
+    set_clauses: Dict[str, str],
+    rows: Sequence[Sequence[Any]]
+) -> List[Tuple[TextClause, Dict[str, Any]]]:
+    """
+    Собрать пакетный UPDATE ... FROM (VALUES ...).
+    VALUES вынесен в CTE с именами колонок: псевдоним v(a, b) у подзапроса
+    SQLite не понимает, а WITH v(a, b) AS (VALUES ...) работает в обеих БД.
+
+    columns - колонки VALUES (первая - ключ) и их SQL-типы,
+    set_clauses - выражения SET, где t - обновляемая таблица, v - VALUES.
+    Пример: {'views': 't.views + v.views'}
+    """
+    names = list(columns)
+    statements = []
+
+    for offset in range(0, len(rows), MAX_ROWS_PER_STATEMENT):
+        chunk = rows[offset:offset + MAX_ROWS_PER_STATEMENT]
+        params: Dict[str, Any] = {}
+        values_sql = []
+
+        for i, row in enumerate(chunk):
+            placeholders = []
+            for j, name in enumerate(names):
+                param = f"p{i}_{j}"
+                params[param] = row[j]
+                # Типы задаем в первой строке - по ней Postgres выводит типы колонок VALUES
+                if i == 0:
+                    placeholders.append(f"CAST(:{param} AS {columns[name]})")
+                else:
+                    placeholders.append(f":{param}")
+            values_sql.append(f"({', '.join(placeholders)})")
+
+        set_sql = ", ".join(f"{column} = {expr}" for column, expr in set_clauses.items())
+        sql = (
+            f"WITH v({', '.join(names)}) AS (VALUES {', '.join(values_sql)}) "
+            f"UPDATE {table} AS t SET {set_sql} "
+            f"FROM v WHERE t.{key} = v.{names[0]}"
+        )
+        statements.append((text(sql), params))
+
+    return statements
@@ -1,13 +1,98 @@
-from datetime import datetime, timedelta
-from typing import Tuple
-from sqlalchemy import select, delete
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
 from DATABASE.games import Cooldown
 from CORE.config import settings
+from CORE.storage import get_state_client
+
+# Сколько истекших строк удалять за один DELETE
+PURGE_BATCH_SIZE = 5000
+
+def cooldown_key(user_id: int, command: str) -> str:
+    return f"trixbot:cooldown:{user_id}:{command}"
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class CooldownEngine:
+    """
+    Индекс активных кулдаунов в памяти.
+    Словарь (user_id, command) -> момент истечения для проверок без I/O
+    и min-куча по моменту истечения для вычистки устаревших записей.
+    Таблица cooldowns остается источником истины после перезапуска.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._expires: Dict[Tuple[int, str], float] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+    async def ensure_loaded(self, session: AsyncSession):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self.reload(session)
+
+    async def reload(self, session: AsyncSession):
+        """Загрузить только активные кулдауны"""
+        result = await session.execute(
+            select(Cooldown.user_id, Cooldown.command, Cooldown.expires_at)
+            .where(Cooldown.expires_at > datetime.utcnow())
+        )
+        self._expires = {}
+        self._heap = []
+        for user_id, command, expires_at in result.all():
+            self.set(user_id, command, _epoch(expires_at))
+        self.loaded = True
+        logger.info(f"Кулдауны загружены: {len(self)} активных")
+
+    def set(self, user_id: int, command: str, expires: float):
+        self._expires[(user_id, command)] = expires
+        heapq.heappush(self._heap, (expires, user_id, command))
+
+    def remaining(self, user_id: int, command: str) -> int:
+        """Секунд до конца кулдауна (0 - кулдауна нет)"""
+        expires = self._expires.get((user_id, command))
+        if expires is None:
+            return 0
+        left = int(expires - self.clock())
+        if left <= 0:
+            del self._expires[(user_id, command)]
+            return 0
+        return left
+
+    def prune(self) -> int:
+        """Убрать истекшие записи с вершины кучи"""
+        now = self.clock()
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires, user_id, command = heapq.heappop(self._heap)
+            # В куче могут остаться устаревшие дубли после повторной установки
+            if self._expires.get((user_id, command)) == expires:
+                del self._expires[(user_id, command)]
+                removed += 1
+        return removed
+
+
+cooldown_engine = CooldownEngine()
 
 class CooldownService:
     """Сервис управления кулдаунами"""
-    
+
     @staticmethod
     async def check_cooldown(
         session: AsyncSession,
@@ -18,34 +103,21 @@ class CooldownService:
         Проверить кулдаун команды
         Возвращает (можно_использовать, секунд_осталось)
         """
-        # Удаляем истекшие кулдауны
-        await session.execute(
-            delete(Cooldown).where(Cooldown.expires_at < datetime.utcnow())
-        )
-        await session.commit()
-        
-        # Проверяем текущий кулдаун
-        result = await session.execute(
-            select(Cooldown).where(
-                Cooldown.user_id == user_id,
-                Cooldown.command == command
-            )
-        )
-        cooldown = result.scalar_one_or_none()
-        
-        if not cooldown:
-            return True, 0
-        
-        time_left = int((cooldown.expires_at - datetime.utcnow()).total_seconds())
-        
-        if time_left <= 0:
-            # Кулдаун истек, удаляем
-            await session.delete(cooldown)
-            await session.commit()
-            return True, 0
-        
-        return False, time_left
-    
+        await cooldown_engine.ensure_loaded(session)
+
+        time_left = cooldown_engine.remaining(user_id, command)
+        if time_left > 0:
+            return False, time_left
+
+        # Кулдауны, поставленные другими воркерами, видны через Redis
+        if settings.STATE_BACKEND == 'redis':
+            time_left = await get_state_client().ttl(cooldown_key(user_id, command))
+            if time_left > 0:
+                cooldown_engine.set(user_id, command, cooldown_engine.clock() + time_left)
+                return False, time_left
+
+        return True, 0
+
     @staticmethod
     async def set_cooldown(
         session: AsyncSession,
@@ -59,20 +131,44 @@ class CooldownService:
             'review': settings.REVIEW_COOLDOWN
         }
         duration = duration_map.get(command, 3600)  # По умолчанию 1 час
-        
-        # Удаляем старый кулдаун если есть
+        expires_at = datetime.utcnow() + timedelta(seconds=duration)
+
+        # Один upsert по unique_user_cooldown: одновременные вызовы не создают дублей
+        dialect_insert = postgresql.insert if session.bind.dialect.name == 'postgresql' else sqlite.insert
+        upsert = dialect_insert(Cooldown).values(user_id=user_id, command=command, expires_at=expires_at)
         await session.execute(
-            delete(Cooldown).where(
-                Cooldown.user_id == user_id,
-                Cooldown.command == command
+            upsert.on_conflict_do_update(
+                index_elements=['user_id', 'command'],
+                set_={'expires_at': upsert.excluded.expires_at, 'updated_at': func.now()}
             )
         )
-        
-        # Создаем новый
-        cooldown = Cooldown(
-            user_id=user_id,
-            command=command,
-            expires_at=datetime.utcnow() + timedelta(seconds=duration)
-        )
-        session.add(cooldown)
         await session.commit()
+
+        cooldown_engine.set(user_id, command, _epoch(expires_at))
+        if settings.STATE_BACKEND == 'redis':
+            await get_state_client().set(cooldown_key(user_id, command), 1, ex=duration)
+
+    @staticmethod
+    async def purge_expired(session: AsyncSession) -> int:
+        """Пакетное удаление истекших кулдаунов (задача планировщика)"""
+        cooldown_engine.prune()
+
+        total = 0
+        while True:
+            expired_ids = (
+                select(Cooldown.id)
+                .where(Cooldown.expires_at < datetime.utcnow())
+                .limit(PURGE_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            result = await session.execute(
+                delete(Cooldown).where(Cooldown.id.in_(expired_ids))
+            )
+            await session.commit()
+            total += result.rowcount
+            if result.rowcount < PURGE_BATCH_SIZE:
+                break
+
+        if total:
+            logger.info(f"Удалено истекших кулдаунов: {total}")
+        return total
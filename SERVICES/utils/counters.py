@@ -0,0 +1,119 @@
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List
+from loguru import logger
+from DATABASE.base import get_session
+from SERVICES.utils.bulk_update import build_values_update
+
+# Таблицы и счетчики, которые пишутся через буфер
+COUNTER_COLUMNS: Dict[str, List[str]] = {
+    'catalog_posts': ['views', 'clicks'],
+    'special_slots': ['total_shows'],
+}
+
+
+class CounterBuffer:
+    """
+    Буфер дельт счетчиков с отложенной записью (write-behind).
+    Горячий путь только увеличивает числа в памяти, запись в БД -
+    одним пакетным UPDATE на таблицу по расписанию.
+    """
+
+    def __init__(self):
+        self._deltas: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        self._lock = asyncio.Lock()
+
+        # Метрики
+        self.flush_count = 0
+        self.flush_failures = 0
+        self.flushed_rows_total = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def incr(self, table: str, row_id: int, column: str, amount: int = 1):
+        """Добавить дельту к счетчику строки"""
+        columns = COUNTER_COLUMNS[table]
+        deltas = self._deltas[table].get(row_id)
+        if deltas is None:
+            deltas = self._deltas[table][row_id] = [0] * len(columns)
+        deltas[columns.index(column)] += amount
+
+    def incr_views(self, post_ids: Iterable[int]):
+        for post_id in post_ids:
+            self.incr('catalog_posts', post_id, 'views')
+
+    def incr_click(self, post_id: int):
+        self.incr('catalog_posts', post_id, 'clicks')
+
+    def incr_special_slot_show(self, slot_id: int):
+        self.incr('special_slots', slot_id, 'total_shows')
+
+    @property
+    def depth(self) -> int:
+        """Количество строк, ожидающих записи"""
+        return sum(len(rows) for rows in self._deltas.values())
+
+    async def flush(self) -> int:
+        """Записать накопленные дельты в БД, вернуть число обновленных строк"""
+        async with self._lock:
+            if not self.depth:
+                return 0
+
+            pending, self._deltas = self._deltas, defaultdict(dict)
+            started = time.perf_counter()
+            rows_written = 0
+
+            try:
+                async for session in get_session():
+                    for table, rows in pending.items():
+                        columns = COUNTER_COLUMNS[table]
+                        statements = build_values_update(
+                            table=table,
+                            key='id',
+                            columns={'id': 'INTEGER', **{c: 'INTEGER' for c in columns}},
+                            set_clauses={c: f"t.{c} + v.{c}" for c in columns},
+                            rows=[(row_id, *deltas) for row_id, deltas in rows.items()]
+                        )
+                        for statement, params in statements:
+                            await session.execute(statement, params)
+                        rows_written += len(rows)
+                    await session.commit()
+            except Exception as e:
+                self.flush_failures += 1
+                self._merge_back(pending)
+                logger.error(f"Ошибка записи счетчиков, дельты возвращены в буфер: {e}")
+                return 0
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flush_count += 1
+            self.flushed_rows_total += rows_written
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+
+            logger.debug(f"Счетчики записаны: {rows_written} строк за {elapsed_ms:.1f} мс")
+            return rows_written
+
+    def _merge_back(self, pending: Dict[str, Dict[int, List[int]]]):
+        """Вернуть незаписанные дельты в буфер, не потеряв новые"""
+        for table, rows in pending.items():
+            for row_id, deltas in rows.items():
+                current = self._deltas[table].get(row_id)
+                if current is None:
+                    self._deltas[table][row_id] = deltas
+                else:
+                    for i, value in enumerate(deltas):
+                        current[i] += value
+
+    def get_metrics(self) -> dict:
+        return {
+            'buffer_depth': self.depth,
+            'flush_count': self.flush_count,
+            'flush_failures': self.flush_failures,
+            'flushed_rows_total': self.flushed_rows_total,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'max_flush_ms': round(self.max_flush_ms, 2),
+        }
+
+
+counter_buffer = CounterBuffer()
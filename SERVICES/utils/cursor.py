@@ -0,0 +1,83 @@
+import base64
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+from CORE.config import CATALOG_CATEGORIES
+
+# Telegram ограничивает callback_data 64 байтами
+MAX_CALLBACK_DATA = 64
+
+# Направление листания
+FORWARD = 0
+BACKWARD = 1
+
+NO_CATEGORY = 0xFFFF
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# флаги, номер страницы, категория, created_at (мкс), id
+_CURSOR_FORMAT = struct.Struct('>BHHqI')
+
+# Категории и подкатегории кодируются индексом в этом списке
+CATEGORY_VOCABULARY: List[str] = [
+    name
+    for category, subcategories in CATALOG_CATEGORIES.items()
+    for name in [category, *subcategories]
+]
+_CATEGORY_INDEX = {name: i for i, name in enumerate(CATEGORY_VOCABULARY)}
+
+
+class CatalogCursor(NamedTuple):
+    """Позиция keyset-пагинации каталога"""
+    direction: int
+    page: int
+    category: Optional[str]
+    created_at: datetime
+    post_id: int
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def encode_cursor(cursor: CatalogCursor) -> str:
+    """Курсор -> короткая строка для callback_data (23 символа)"""
+    if cursor.category is None:
+        category_index = NO_CATEGORY
+    elif cursor.category in _CATEGORY_INDEX:
+        category_index = _CATEGORY_INDEX[cursor.category]
+    else:
+        raise ValueError(f"Категория не поддерживается курсором: {cursor.category}")
+
+    try:
+        raw = _CURSOR_FORMAT.pack(
+            cursor.direction,
+            min(cursor.page, 0xFFFF),
+            category_index,
+            _to_micros(cursor.created_at),
+            cursor.post_id
+        )
+    except struct.error as e:
+        raise ValueError(f"Курсор не кодируется: {e}")
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token: str) -> CatalogCursor:
+    """Строка из callback_data -> курсор (ValueError при повреждении)"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, page, category_index, micros, post_id = _CURSOR_FORMAT.unpack(raw)
+    except (ValueError, struct.error) as e:
+        raise ValueError(f"Некорректный курсор: {e}")
+
+    if direction not in (FORWARD, BACKWARD):
+        raise ValueError("Некорректное направление курсора")
+    if category_index == NO_CATEGORY:
+        category = None
+    elif category_index < len(CATEGORY_VOCABULARY):
+        category = CATEGORY_VOCABULARY[category_index]
+    else:
+        raise ValueError("Некорректная категория курсора")
+
+    return CatalogCursor(direction, page, category, EPOCH + timedelta(microseconds=micros), post_id)
@@ -0,0 +1,201 @@
+"""
+Инструментирование обработки обновлений
+
+На каждое обновление заводится UpdateStats в contextvar: события движка
+SQLAlchemy добавляют туда число запросов и время БД, middleware сессии
+бота - время вызовов Telegram API. По завершении обновления значения
+попадают в гистограммы с меткой действия (/catalog, vote:, ...),
+которые отдаются в формате Prometheus на /metrics.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from aiohttp import web
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from loguru import logger
+from sqlalchemy import event
+
+from CORE.config import settings
+
+# Сколько разных значений метки action допускается (остальные - 'other')
+MAX_ACTIONS = 200
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+class UpdateStats:
+    """Затраты одного обновления"""
+
+    __slots__ = ('queries', 'db_seconds', 'api_calls', 'api_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.api_calls = 0
+        self.api_seconds = 0.0
+
+
+current_stats: ContextVar[Optional[UpdateStats]] = ContextVar('current_stats', default=None)
+
+
+class Histogram:
+    """Гистограмма Prometheus с одной меткой"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], label: str = 'action'):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label = label
+        # значение метки -> (счетчики по корзинам, сумма, количество)
+        self._series: Dict[str, list] = {}
+
+    def observe(self, label_value: str, value: float):
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def summary(self) -> Dict[str, Tuple[int, float]]:
+        """Количество и сумма наблюдений по значениям метки"""
+        return {label_value: (series[2], series[1]) for label_value, series in self._series.items()}
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_value, (counts, total, count) in sorted(self._series.items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+        return "\n".join(lines)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class UpdateMetrics:
+    """Гистограммы по действиям и журнал медленных обновлений"""
+
+    def __init__(self, slow_update_ms: float = 0.0):
+        self.slow_update_ms = slow_update_ms
+        self.duration = Histogram(
+            'trixbot_update_duration_seconds', 'Total update handling time', SECONDS_BUCKETS)
+        self.db_time = Histogram(
+            'trixbot_update_db_seconds', 'Time spent in SQL statements per update', SECONDS_BUCKETS)
+        self.api_time = Histogram(
+            'trixbot_update_api_seconds', 'Time spent in Telegram API calls per update', SECONDS_BUCKETS)
+        self.queries = Histogram(
+            'trixbot_update_queries', 'SQL statements per update', QUERY_BUCKETS)
+        self._actions: set = set()
+        # Запросы вне обработки обновлений (планировщик, фоновые задачи)
+        self.background_queries = 0
+        self.background_db_seconds = 0.0
+
+    def _label(self, action: str) -> str:
+        if action in self._actions:
+            return action
+        if len(self._actions) >= MAX_ACTIONS:
+            return 'other'
+        self._actions.add(action)
+        return action
+
+    def begin(self) -> Tuple[UpdateStats, object]:
+        stats = UpdateStats()
+        return stats, current_stats.set(stats)
+
+    def end(self, action: str, stats: UpdateStats, token, elapsed: float):
+        current_stats.reset(token)
+        label = self._label(action)
+        self.duration.observe(label, elapsed)
+        self.db_time.observe(label, stats.db_seconds)
+        self.api_time.observe(label, stats.api_seconds)
+        self.queries.observe(label, stats.queries)
+
+        if self.slow_update_ms and elapsed * 1000 >= self.slow_update_ms:
+            logger.warning(
+                f"🐢 Медленное обновление {action}: {elapsed * 1000:.0f} мс, "
+                f"SQL {stats.queries} запр./{stats.db_seconds * 1000:.0f} мс, "
+                f"API {stats.api_calls} выз./{stats.api_seconds * 1000:.0f} мс"
+            )
+
+    def render(self) -> str:
+        parts = [h.render() for h in (self.duration, self.db_time, self.api_time, self.queries)]
+        parts.append(
+            "# HELP trixbot_background_queries_total SQL statements outside update handling\n"
+            "# TYPE trixbot_background_queries_total counter\n"
+            f"trixbot_background_queries_total {self.background_queries}\n"
+            "# HELP trixbot_background_db_seconds_total SQL time outside update handling\n"
+            "# TYPE trixbot_background_db_seconds_total counter\n"
+            f"trixbot_background_db_seconds_total {self.background_db_seconds:.6f}"
+        )
+        return "\n".join(parts) + "\n"
+
+
+update_metrics = UpdateMetrics(slow_update_ms=settings.SLOW_UPDATE_MS)
+
+
+def instrument_engine(engine):
+    """Подсчет запросов и времени БД через события движка (AsyncEngine или Engine)"""
+    sync_engine = getattr(engine, 'sync_engine', engine)
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+        stats = current_stats.get()
+        if stats is None:
+            update_metrics.background_queries += 1
+            update_metrics.background_db_seconds += elapsed
+        else:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def _on_error(context):
+        started = context.connection.info.get('query_started') if context.connection else None
+        if started:
+            started.pop()
+
+
+class ApiTimingMiddleware(BaseRequestMiddleware):
+    """Время вызовов Telegram API для текущего обновления"""
+
+    async def __call__(self, make_request, bot, method):
+        stats = current_stats.get()
+        if stats is None:
+            return await make_request(bot, method)
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            stats.api_calls += 1
+            stats.api_seconds += time.perf_counter() - started
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=update_metrics.render(), content_type='text/plain')
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Отдельный HTTP-сервер с /metrics (режим polling)"""
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 Метрики: http://{host}:{port}/metrics")
+    return runner
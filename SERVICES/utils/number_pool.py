@@ -0,0 +1,128 @@
+import asyncio
+import random
+from array import array
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, Set
+
+
+class FreeNumberPool:
+    """
+    Пул свободных номеров в диапазоне [low, high].
+
+    Битовая карта хранит занятые номера (1 бит на номер), компактный
+    массив - кандидатов для случайной выборки за O(1). Номер, занятый
+    в обход allocate(), из массива не удаляется сразу: он отбрасывается
+    при выборке по биту в карте, а массив периодически уплотняется.
+    """
+
+    def __init__(self, low: int, high: int, excluded: Iterable[int] = ()):
+        self.low = low
+        self.high = high
+        self.excluded = frozenset(n for n in excluded if low <= n <= high)
+        self._typecode = 'H' if high < 2 ** 16 else 'I'
+        self._taken = bytearray((high - low) // 8 + 1)
+        self._free = array(self._typecode)
+        self._reserved: Set[int] = set()
+        self.free_count = 0
+        self.loaded = False
+        self.lock = asyncio.Lock()
+
+    # --- битовая карта ---
+
+    def _test(self, number: int) -> bool:
+        offset = number - self.low
+        return bool(self._taken[offset >> 3] & (1 << (offset & 7)))
+
+    def _set(self, number: int):
+        offset = number - self.low
+        self._taken[offset >> 3] |= 1 << (offset & 7)
+
+    def _clear(self, number: int):
+        offset = number - self.low
+        self._taken[offset >> 3] &= ~(1 << (offset & 7)) & 0xFF
+
+    def _in_range(self, number: int) -> bool:
+        return self.low <= number <= self.high
+
+    # --- загрузка ---
+
+    def load(self, used: Iterable[int]):
+        """Построить пул по списку занятых номеров"""
+        self._taken = bytearray((self.high - self.low) // 8 + 1)
+        for number in self.excluded:
+            self._set(number)
+        for number in used:
+            if number is not None and self._in_range(number):
+                self._set(number)
+        # Незавершенные резервирования переживают перезагрузку
+        for number in self._reserved:
+            self._set(number)
+
+        self._free = array(
+            self._typecode,
+            (n for n in range(self.low, self.high + 1) if not self._test(n))
+        )
+        self.free_count = len(self._free)
+        self.loaded = True
+
+    def _compact(self):
+        """Убрать из массива кандидатов номера, занятые в обход allocate()"""
+        self._free = array(self._typecode, (n for n in set(self._free) if not self._test(n)))
+
+    # --- операции ---
+
+    def is_free(self, number: int) -> bool:
+        return self._in_range(number) and not self._test(number)
+
+    def allocate(self) -> int:
+        """Случайный свободный номер за O(1) (амортизированно)"""
+        free = self._free
+        while free:
+            index = random.randrange(len(free))
+            number = free[index]
+            free[index] = free[-1]
+            free.pop()
+            if not self._test(number):
+                self._set(number)
+                self.free_count -= 1
+                return number
+        raise ValueError("Нет свободных номеров")
+
+    def mark_used(self, number: int):
+        """Отметить номер занятым (вставка в обход allocate)"""
+        if not self._in_range(number) or self._test(number):
+            return
+        self._set(number)
+        self.free_count -= 1
+        if len(self._free) > 2 * self.free_count + 64:
+            self._compact()
+
+    def release(self, number: int):
+        """Вернуть номер в пул (удаление или откат)"""
+        self._reserved.discard(number)
+        if not self._in_range(number) or number in self.excluded or not self._test(number):
+            return
+        self._clear(number)
+        self._free.append(number)
+        self.free_count += 1
+
+    def swap(self, old: int, new: int):
+        """Заменить занятый номер на другой (смена номера вручную)"""
+        self.mark_used(new)
+        self.release(old)
+
+    @asynccontextmanager
+    async def reserve(self) -> AsyncIterator[int]:
+        """
+        Зарезервировать номер на время транзакции.
+        Если блок завершился исключением (в т.ч. на commit),
+        номер возвращается в пул.
+        """
+        number = self.allocate()
+        self._reserved.add(number)
+        try:
+            yield number
+        except BaseException:
+            self.release(number)
+            raise
+        self._reserved.discard(number)
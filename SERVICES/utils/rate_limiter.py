@@ -0,0 +1,211 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from loguru import logger
+
+
+class RateRule(NamedTuple):
+    """Скорость пополнения (токенов в секунду) и емкость ведра"""
+    rate: float
+    burst: float
+
+
+# Лимиты по командам и префиксам callback_data
+DEFAULT_RULE = RateRule(rate=2.0, burst=4)
+DEFAULT_RULES: Dict[str, RateRule] = {
+    '/catalog': RateRule(rate=1 / 3, burst=2),
+    '/search': RateRule(rate=1.0, burst=3),
+    'vote:': RateRule(rate=1.0, burst=3),
+    'catalog_page:': RateRule(rate=2.0, burst=5),
+}
+
+
+class TokenBucket:
+    """Ведро токенов на монотонных часах"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def consume(self, now: float, amount: float = 1.0) -> float:
+        """Списать токены; вернуть 0 при успехе или сколько секунд ждать"""
+        self._refill(now)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def wait_time(self, now: float, amount: float = 1.0) -> float:
+        """Сколько секунд ждать до появления токенов (без списания)"""
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def idle_full(self, now: float) -> bool:
+        """Ведро уже полное - его можно забыть без потери точности"""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class RateRules:
+    """Правила ограничителя: по точному действию или самому длинному префиксу"""
+
+    def __init__(self, rules: Optional[Dict[str, RateRule]] = None, default: RateRule = DEFAULT_RULE):
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.default = default
+        self.rejected_total = 0
+
+    def rule_for(self, action: str) -> Tuple[str, RateRule]:
+        """Правило для действия: точное совпадение или самый длинный префикс"""
+        if action in self.rules:
+            return action, self.rules[action]
+        best = None
+        for prefix in self.rules:
+            if action.startswith(prefix) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        if best is not None:
+            return best, self.rules[best]
+        return '*', self.default
+
+
+class TokenBucketLimiter(RateRules):
+    """
+    Ограничитель частоты по пользователям и действиям в памяти процесса
+    (STATE_BACKEND=memory, один воркер).
+    Ведра лежат в OrderedDict по времени последнего обращения: простаивающие
+    дольше ttl (и заведомо полные) вытесняются с головы, размер ограничен max_keys.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[Dict[str, RateRule]] = None,
+        default: RateRule = DEFAULT_RULE,
+        ttl: float = 600.0,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        super().__init__(rules, default)
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[Tuple[int, str], TokenBucket]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def hit(self, user_id: int, action: str = '*') -> float:
+        """Учесть действие; вернуть 0 если разрешено, иначе секунды до разрешения"""
+        now = self.clock()
+        name, rule = self.rule_for(action)
+        key = (user_id, name)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rule.rate, rule.burst, now)
+        else:
+            self._buckets.move_to_end(key)
+
+        wait = bucket.consume(now)
+        if wait:
+            self.rejected_total += 1
+        self._evict(now)
+        return wait
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        while buckets:
+            key, oldest = next(iter(buckets.items()))
+            expired = now - oldest.updated > self.ttl and oldest.idle_full(now)
+            if not expired and len(buckets) <= self.max_keys:
+                break
+            buckets.popitem(last=False)
+
+    async def throttle(self, user_id: int, action: str = '*') -> float:
+        """То же, что hit - общий интерфейс с SharedTokenBucketLimiter"""
+        return self.hit(user_id, action)
+
+
+# Ведро в хеше {tokens, updated}; время - часы Redis (TIME), общие для всех воркеров.
+# Возвращает миллисекунды до разрешения (0 - разрешено). Ключ живет, пока ведро
+# не наполнится заново: после этого оно неотличимо от нового.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+if now > updated then
+    tokens = math.min(burst, tokens + (now - updated) * rate)
+    updated = now
+end
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(updated))
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return wait
+"""
+
+
+def bucket_ttl_ms(rule: RateRule) -> int:
+    """Время, за которое пустое ведро наполняется полностью"""
+    return math.ceil(rule.burst / rule.rate * 1000)
+
+
+class SharedTokenBucketLimiter(RateRules):
+    """
+    Ограничитель частоты с ведрами в бэкенде общего состояния (STATE_BACKEND
+    redis/local): у пользователя один бюджет на все воркеры. Пополнение и
+    списание - один атомарный скрипт на обращение.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        rules: Optional[Dict[str, RateRule]] = None,
+        default: RateRule = DEFAULT_RULE,
+        prefix: str = 'trixbot:throttle'
+    ):
+        super().__init__(rules, default)
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self.errors_total = 0
+
+    async def throttle(self, user_id: int, action: str = '*') -> float:
+        """Учесть действие; вернуть 0 если разрешено, иначе секунды до разрешения"""
+        name, rule = self.rule_for(action)
+        try:
+            wait_ms = await self._script(
+                keys=[f"{self.prefix}:{user_id}:{name}"],
+                args=[rule.rate, rule.burst, bucket_ttl_ms(rule)]
+            )
+        except Exception as e:
+            # Недоступный бэкенд не должен останавливать бота - пропускаем без лимита
+            self.errors_total += 1
+            logger.warning(f"Ограничитель частоты недоступен: {e}")
+            return 0.0
+        if wait_ms:
+            self.rejected_total += 1
+        return int(wait_ms) / 1000
+
+
+def action_of(text: Optional[str]) -> str:
+    """Ключ действия для сообщения: команда без @username или 'message'"""
+    if text and text.startswith('/'):
+        return text.split(maxsplit=1)[0].split('@', 1)[0].lower()
+    return 'message'
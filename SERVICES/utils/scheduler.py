@@ -1,20 +1,52 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import timedelta
 from loguru import logger
 from CORE.bot import bot
+from CORE.config import settings
 from DATABASE.base import get_session
 from ANALYTICS.stats_collector import StatsCollector
+from ANALYTICS.daily_rollups import daily_rollups, utc_today
+from ANALYTICS.event_log import event_recorder
+from ANALYTICS.event_export import event_exporter
 from SERVICES.notification.admin_notifier import AdminNotifier
+from SERVICES.database.slot_pool import slot_pools
+from SERVICES.utils.counters import counter_buffer
+from SERVICES.utils.activity_tracker import activity_tracker
+from SERVICES.database.seen_posts import seen_posts
+from SERVICES.utils.cooldown import CooldownService
+from SERVICES.database.partitions import partition_manager
+from SERVICES.database.vote_pipeline import vote_pipeline
+from SERVICES.database.leaderboard import leaderboards
+from SERVICES.notification.send_queue import outbound_queue
 
 scheduler = AsyncIOScheduler()
 
 async def send_daily_stats():
-    """Отправка ежедневной статистики админам"""
+    """Отправка ежедневной статистики админам (за завершившийся день)"""
     logger.info("📊 Отправка ежедневной статистики")
     
     async for session in get_session():
-        stats_text = await StatsCollector.get_stats_text(session)
-        await AdminNotifier.send_stats_notification(bot, stats_text)
+        stats = await StatsCollector.collect_daily_stats(session, utc_today() - timedelta(days=1))
+        await StatsCollector.save_daily_summary(session, stats)
+        await AdminNotifier.send_stats_notification(bot, StatsCollector.format_stats(stats))
+
+async def refresh_slot_pools():
+    """Периодическая сверка пулов слотов каталога с БД"""
+    async for session in get_session():
+        await slot_pools.reload(session)
+
+async def purge_expired_cooldowns():
+    """Пакетная очистка истекших кулдаунов"""
+    async for session in get_session():
+        await CooldownService.purge_expired(session)
+
+async def refresh_leaderboards():
+    """Сверка таблиц лидеров с БД (голоса других воркеров)"""
+    await vote_pipeline.flush()
+    async for session in get_session():
+        await leaderboards.reload(session)
 
 def setup_scheduler():
     """Настройка планировщика задач"""
@@ -26,8 +58,103 @@ def setup_scheduler():
         replace_existing=True
     )
     
+    # Сверка пулов слотов каталога (страховка от расхождений)
+    scheduler.add_job(
+        refresh_slot_pools,
+        trigger=IntervalTrigger(minutes=15),
+        id='refresh_slot_pools',
+        replace_existing=True
+    )
+    
+    # Пакетная запись счетчиков просмотров/кликов
+    scheduler.add_job(
+        counter_buffer.flush,
+        trigger=IntervalTrigger(seconds=settings.COUNTER_FLUSH_INTERVAL),
+        id='flush_counters',
+        replace_existing=True
+    )
+    
+    # Пакетная запись активности пользователей
+    scheduler.add_job(
+        activity_tracker.flush,
+        trigger=IntervalTrigger(seconds=settings.ACTIVITY_FLUSH_INTERVAL),
+        id='flush_activity',
+        replace_existing=True
+    )
+    
+    # Пакетная запись просмотренных карточек
+    scheduler.add_job(
+        seen_posts.flush,
+        trigger=IntervalTrigger(seconds=settings.SEEN_FLUSH_INTERVAL),
+        id='flush_seen_posts',
+        replace_existing=True
+    )
+    
+    # Пакетное применение голосов к рейтингу
+    scheduler.add_job(
+        vote_pipeline.flush,
+        trigger=IntervalTrigger(seconds=settings.VOTE_FLUSH_INTERVAL),
+        id='flush_votes',
+        replace_existing=True
+    )
+    
+    # Пакетная запись дневной статистики
+    scheduler.add_job(
+        daily_rollups.flush,
+        trigger=IntervalTrigger(seconds=settings.STATS_FLUSH_INTERVAL),
+        id='flush_daily_stats',
+        replace_existing=True
+    )
+    
+    # Пакетная запись журнала событий
+    scheduler.add_job(
+        event_recorder.flush,
+        trigger=IntervalTrigger(seconds=settings.EVENT_FLUSH_INTERVAL),
+        id='flush_events',
+        replace_existing=True
+    )
+    
+    # Выгрузка журнала событий за прошедшие дни (UTC)
+    scheduler.add_job(
+        event_exporter.export_pending,
+        trigger=CronTrigger(hour=0, minute=15, timezone='UTC'),
+        id='export_events',
+        replace_existing=True
+    )
+    
+    # Сверка таблиц лидеров
+    scheduler.add_job(
+        refresh_leaderboards,
+        trigger=IntervalTrigger(minutes=1),
+        id='refresh_leaderboards',
+        replace_existing=True
+    )
+    
+    # Повторная отправка сообщений из спула
+    scheduler.add_job(
+        outbound_queue.load_spool,
+        trigger=IntervalTrigger(minutes=5),
+        id='retry_outbound_spool',
+        replace_existing=True
+    )
+    
+    # Очистка истекших кулдаунов
+    scheduler.add_job(
+        purge_expired_cooldowns,
+        trigger=IntervalTrigger(minutes=10),
+        id='purge_cooldowns',
+        replace_existing=True
+    )
+    
+    # Секции rating_votes: будущие создаются, устаревшие убираются
+    scheduler.add_job(
+        partition_manager.maintain,
+        trigger=IntervalTrigger(hours=1),
+        id='maintain_partitions',
+        replace_existing=True
+    )
+    
     # TODO: Добавить другие задачи
-    # - Очистка истекших кулдаунов
     # - Автопосты в каналы
     # - Резервное копирование
     
@@ -0,0 +1,65 @@
+from typing import Iterable, Iterator, Optional
+
+
+class SeenSet:
+    """
+    Множество просмотренных номеров каталога в виде битовой карты.
+    1 бит на номер: диапазон 1-9999 занимает 1250 байт, проверка и
+    добавление - O(1), сериализация - сами байты карты.
+    """
+
+    __slots__ = ('high', '_bits', 'count')
+
+    def __init__(self, high: int, data: Optional[bytes] = None):
+        self.high = high
+        size = high // 8 + 1
+        self._bits = bytearray(size)
+        if data:
+            # Карта могла быть сохранена при другом high - берем общую часть
+            self._bits[:min(size, len(data))] = data[:size]
+        self.count = int.from_bytes(self._bits, 'little').bit_count()
+
+    def __contains__(self, number: Optional[int]) -> bool:
+        if number is None or not 0 <= number <= self.high:
+            return False
+        return bool(self._bits[number >> 3] & (1 << (number & 7)))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[int]:
+        for index, byte in enumerate(self._bits):
+            while byte:
+                low = byte & -byte
+                yield (index << 3) + low.bit_length() - 1
+                byte ^= low
+
+    def add(self, number: Optional[int]) -> bool:
+        """Добавить номер; True - номер не был отмечен"""
+        if number is None or not 0 <= number <= self.high:
+            return False
+        mask = 1 << (number & 7)
+        if self._bits[number >> 3] & mask:
+            return False
+        self._bits[number >> 3] |= mask
+        self.count += 1
+        return True
+
+    def discard(self, number: Optional[int]) -> bool:
+        """Снять отметку; True - номер был отмечен"""
+        if number not in self:
+            return False
+        self._bits[number >> 3] &= ~(1 << (number & 7)) & 0xFF
+        self.count -= 1
+        return True
+
+    def update(self, numbers: Iterable[Optional[int]]) -> int:
+        return sum(1 for number in numbers if self.add(number))
+
+    def clear(self):
+        self._bits = bytearray(len(self._bits))
+        self.count = 0
+
+    def to_bytes(self) -> bytes:
+        """Байты карты без нулевого хвоста"""
+        return bytes(self._bits).rstrip(b'\0')
@@ -0,0 +1,77 @@
+from aiogram import Router, F
+from aiogram.types import CallbackQuery
+from loguru import logger
+from KEYBOARDS.inline.catalog_keyboards import get_catalog_navigation, get_follow_keyboard
+
+router = Router(name='catalog_callbacks')
+
+def format_catalog_page(posts, page: int) -> str:
+    """Текст страницы каталога"""
+    text = f"📂 <b>Каталог услуг Будапешта</b>\n\nСтраница {page + 1}\n\n"
+    for post in posts:
+        text += f"<b>{post.name}</b>\n"
+        text += f"   Категория: {post.category}\n"
+        text += f"   #{post.catalog_number}\n\n"
+    return text
+
+async def show_catalog_page(callback: CallbackQuery, category: str = None, cursor: str = None):
+    """Показать страницу каталога (keyset-пагинация)"""
+    from DATABASE.base import get_session
+    from SERVICES.database.catalog_service import CatalogService
+
+    async for session in get_session():
+        try:
+            posts, page, next_cursor, prev_cursor = await CatalogService.list_catalog_page(
+                session, category=category, cursor=cursor
+            )
+        except ValueError as e:
+            logger.warning(f"Некорректная страница каталога от {callback.from_user.id}: {e}")
+            await callback.answer("⚠️ Страница устарела, откройте /catalog заново", show_alert=True)
+            return
+
+        if not posts:
+            await callback.answer("📂 Здесь пока пусто", show_alert=True)
+            return
+
+        await callback.message.edit_text(
+            format_catalog_page(posts, page),
+            reply_markup=get_catalog_navigation(
+                current_page=page,
+                next_cursor=next_cursor,
+                prev_cursor=prev_cursor
+            )
+        )
+        await callback.answer()
+
+@router.callback_query(F.data.startswith("catalog_page:"))
+async def process_catalog_page(callback: CallbackQuery):
+    """Листание каталога по курсору"""
+    cursor = callback.data.split(":", 1)[1]
+    await show_catalog_page(callback, cursor=cursor)
+
+@router.callback_query(F.data.startswith("category:"))
+async def process_category(callback: CallbackQuery):
+    """Первая страница выбранной категории"""
+    category = callback.data.split(":", 1)[1]
+    await show_catalog_page(callback, category=category)
+
+@router.callback_query(F.data.startswith("follow:"))
+async def process_follow(callback: CallbackQuery):
+    """Подписка/отписка на категорию"""
+    from CORE.config import CATALOG_CATEGORIES
+    from DATABASE.base import get_session
+    from SERVICES.database.subscriptions import SubscriptionService
+
+    categories = list(CATALOG_CATEGORIES.keys())
+    index = callback.data.split(":", 1)[1]
+    if not index.isdigit() or int(index) >= len(categories):
+        await callback.answer("⚠️ Неизвестная категория", show_alert=True)
+        return
+    category = categories[int(index)]
+
+    async for session in get_session():
+        subscribed = await SubscriptionService.toggle(session, callback.from_user.id, category)
+        followed = await SubscriptionService.get_user_categories(session, callback.from_user.id)
+
+        await callback.message.edit_reply_markup(reply_markup=get_follow_keyboard(followed))
+        await callback.answer("🔔 Подписка оформлена" if subscribed else "🔕 Подписка отменена")
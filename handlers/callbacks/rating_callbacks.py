@@ -1,7 +1,7 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
-from CORE.states import RatingCreationStates
+from CORE.states import RatingStates
 
 router = Router(name='rating_callbacks')
 
@@ -11,7 +11,7 @@ async def process_gender_callback(callback: CallbackQuery, state: FSMContext):
     gender = callback.data.split(":")[1]
     
     await state.update_data(gender=gender)
-    await state.set_state(RatingCreationStates.waiting_for_media)
+    await state.set_state(RatingStates.waiting_for_media)
     
     await callback.message.answer(
         "⭐ Шаг 5/5: Отправьте фото или видео\n\n"
@@ -7,12 +7,13 @@ from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from loguru import logger
 
-from core.config import settings
-from core.states import AdminStates
-from services.admin_service import AdminService
-from services.stats_service import StatsService
-from database.base import get_session
-from keyboards.inline import get_admin_menu
+from CORE.config import settings
+from CORE.states import AdminStates
+from SERVICES.database.admin_service import AdminService
+from ANALYTICS.stats_collector import StatsCollector
+from DATABASE.base import get_session
+from KEYBOARDS.menus.main_menu import get_admin_menu
+from SERVICES.notification.broadcast import broadcast_engine
 
 router = Router(name='admin_commands')
 
@@ -49,20 +50,7 @@ async def cmd_stats(message: Message):
         return
     
     async for session in get_session():
-        stats = await StatsService.get_full_statistics(session)
-        
-        text = (
-            "📊 <b>Статистика бота</b>\n\n"
-            f"👥 Всего пользователей: {stats['total_users']}\n"
-            f"📂 Карточек в каталоге: {stats['catalog_posts']}\n"
-            f"⭐ Рейтинговых постов: {stats['rating_posts']}\n"
-            f"💬 Отзывов: {stats['reviews']}\n"
-            f"🕐 Активных кулдаунов: {stats['active_cooldowns']}\n\n"
-            f"📈 За сегодня:\n"
-            f"• Новых пользователей: {stats['new_users_today']}\n"
-            f"• Новых карточек: {stats['new_posts_today']}\n"
-        )
-        
+        text = await StatsCollector.get_stats_text(session)
         await message.answer(text)
 
 
@@ -138,3 +126,56 @@ async def cmd_changeuid(message: Message):
         
         if success:
             logger.info(f"Admin {message.from_user.id} changed UID: {current_uid} -> {new_uid}")
+
+
+@router.message(Command("broadcast"))
+async def cmd_broadcast(message: Message):
+    """Команда /broadcast - рассылка всем пользователям"""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ У вас нет прав администратора")
+        return
+    
+    parts = message.html_text.split(maxsplit=1)
+    if len(parts) < 2:
+        active = broadcast_engine.active()
+        await message.answer(
+            "📣 <b>Рассылка</b>\n\n"
+            "Используйте: /broadcast &lt;текст&gt;\n"
+            "Остановить: /broadcast_stop &lt;id&gt;\n\n"
+            f"Активные рассылки: {', '.join(f'#{i}' for i in active) if active else 'нет'}"
+        )
+        return
+    
+    async for session in get_session():
+        broadcast = await broadcast_engine.start(
+            session=session,
+            bot=message.bot,
+            text=parts[1],
+            admin_id=message.from_user.id
+        )
+        
+        await message.answer(
+            f"📣 Рассылка #{broadcast.id} запущена\n"
+            f"Получателей: {broadcast.total}\n\n"
+            f"Прогресс будет приходить в чат статистики"
+        )
+        logger.info(f"Admin {message.from_user.id} started broadcast #{broadcast.id}")
+
+
+@router.message(Command("broadcast_stop"))
+async def cmd_broadcast_stop(message: Message):
+    """Команда /broadcast_stop - остановить рассылку"""
+    if not is_admin(message.from_user.id):
+        await message.answer("❌ У вас нет прав администратора")
+        return
+    
+    args = message.text.split()
+    if len(args) != 2 or not args[1].lstrip('#').isdigit():
+        await message.answer("❌ Используйте: /broadcast_stop &lt;id&gt;")
+        return
+    
+    broadcast_id = int(args[1].lstrip('#'))
+    if await broadcast_engine.cancel(broadcast_id):
+        await message.answer(f"🛑 Рассылка #{broadcast_id} остановлена")
+    else:
+        await message.answer(f"❌ Рассылка #{broadcast_id} не выполняется")
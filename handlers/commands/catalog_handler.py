@@ -7,10 +7,11 @@ from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from loguru import logger
 
-from core.states import SearchStates, ReviewStates
-from services.catalog_service import CatalogService
-from keyboards.inline import get_catalog_navigation
-from database.base import get_session
+from CORE.states import SearchStates, ReviewStates
+from SERVICES.database.catalog_service import CatalogService
+from KEYBOARDS.inline.catalog_keyboards import get_catalog_navigation, get_follow_keyboard
+from SERVICES.database.subscriptions import SubscriptionService
+from DATABASE.base import get_session
 
 router = Router(name='catalog_commands')
 
@@ -39,13 +40,13 @@ async def cmd_catalog(message: Message):
         
         # Формируем текст из слотов
         for i, slot in enumerate(slots, 1):
-            text += f"{i}. <b>{slot['name']}</b>\n"
-            text += f"   Категория: {slot['category']}\n"
-            text += f"   #{slot['catalog_number']}\n\n"
+            text += f"{i}. <b>{slot.name}</b>\n"
+            text += f"   Категория: {slot.category}\n"
+            text += f"   #{slot.catalog_number}\n\n"
         
         await message.answer(
             text,
-            reply_markup=get_catalog_navigation(page=0)
+            reply_markup=get_catalog_navigation()
         )
 
 
@@ -94,3 +95,20 @@ async def cmd_my_reviews(message: Message):
             text += f"Текст: {review.review_text[:100]}...\n\n"
         
         await message.answer(text)
+
+
+@router.message(Command("categoryfollow"))
+async def cmd_category_follow(message: Message):
+    """Команда /categoryfollow - подписки на категории"""
+    async for session in get_session():
+        followed = await SubscriptionService.get_user_categories(
+            session=session,
+            user_id=message.from_user.id
+        )
+        
+        await message.answer(
+            "🔔 <b>Подписки на категории</b>\n\n"
+            "Бот пришлет уведомление о новой карточке в выбранных категориях.\n"
+            "Нажмите на категорию, чтобы подписаться или отписаться.",
+            reply_markup=get_follow_keyboard(followed)
+        )
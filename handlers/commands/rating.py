@@ -7,11 +7,11 @@ from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from loguru import logger
 
-from core.states import RatingStates
-from services.rating_service import RatingService
-from services.cooldown_service import CooldownService
-from database.base import get_session
-from keyboards.inline import get_gender_keyboard
+from CORE.states import RatingStates
+from SERVICES.database.rating_service import RatingService
+from SERVICES.utils.cooldown import CooldownService
+from DATABASE.base import get_session
+from KEYBOARDS.inline.rating_keyboards import get_gender_keyboard
 
 router = Router(name='rating_commands')
 
@@ -7,11 +7,11 @@ from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from loguru import logger
 
-from core.states import RatingStates
-from services.rating_service import RatingService
-from services.cooldown_service import CooldownService
-from database.base import get_session
-from keyboards.inline import get_gender_keyboard
+from CORE.states import RatingStates
+from SERVICES.database.leaderboard import leaderboards, BOARD_ALL, BOARD_BOYS, BOARD_GIRLS
+from SERVICES.utils.cooldown import CooldownService
+from DATABASE.base import get_session
+from KEYBOARDS.inline.rating_keyboards import get_gender_keyboard
 
 router = Router(name='rating_commands')
 
@@ -51,24 +51,12 @@ async def cmd_gorateme(message: Message, state: FSMContext):
 async def cmd_toppeople(message: Message):
     """Команда /toppeople - топ всех"""
     async for session in get_session():
-        posts = await RatingService.get_top_ratings(
-            session=session,
-            limit=10
-        )
+        text = await leaderboards.get_text(session, BOARD_ALL)
         
-        if not posts:
+        if not text:
             await message.answer("🏆 Рейтинг пока пуст")
             return
         
-        text = "🏆 <b>ТОП-10 людей Будапешта</b>\n\n"
-        medals = ['🥇', '🥈', '🥉']
-        
-        for i, post in enumerate(posts):
-            medal = medals[i] if i < 3 else f"{i+1}."
-            text += f"{medal} <b>{post.name}</b>\n"
-            text += f"    О себе: {post.about}\n"
-            text += f"    Рейтинг: {post.total_score} ({post.vote_count} голосов)\n\n"
-        
         await message.answer(text)
 
 
@@ -76,23 +64,12 @@ async def cmd_toppeople(message: Message):
 async def cmd_topboys(message: Message):
     """Команда /topboys - топ парней"""
     async for session in get_session():
-        posts = await RatingService.get_top_ratings(
-            session=session,
-            gender='boy',
-            limit=10
-        )
+        text = await leaderboards.get_text(session, BOARD_BOYS)
         
-        if not posts:
+        if not text:
             await message.answer("🤵🏼‍♂️ Рейтинг TopBoys пока пуст")
             return
         
-        text = "🤵🏼‍♂️ <b>ТОП-10 парней</b>\n\n"
-        medals = ['🥇', '🥈', '🥉']
-        
-        for i, post in enumerate(posts):
-            medal = medals[i] if i < 3 else f"{i+1}."
-            text += f"{medal} <b>{post.name}</b> - {post.total_score} баллов\n"
-        
         await message.answer(text)
 
 
@@ -100,21 +77,10 @@ async def cmd_topboys(message: Message):
 async def cmd_topgirls(message: Message):
     """Команда /topgirls - топ девушек"""
     async for session in get_session():
-        posts = await RatingService.get_top_ratings(
-            session=session,
-            gender='girl',
-            limit=10
-        )
+        text = await leaderboards.get_text(session, BOARD_GIRLS)
         
-        if not posts:
+        if not text:
             await message.answer("👱🏻‍♀️ Рейтинг TopGirls пока пуст")
             return
         
-        text = "👱🏻‍♀️ <b>ТОП-10 девушек</b>\n\n"
-        medals = ['🥇', '🥈', '🥉']
-        
-        for i, post in enumerate(posts):
-            medal = medals[i] if i < 3 else f"{i+1}."
-            text += f"{medal} <b>{post.name}</b> - {post.total_score} баллов\n"
-        
         await message.answer(text)
@@ -6,9 +6,9 @@ from aiogram.filters import CommandStart
 from aiogram.types import Message
 from loguru import logger
 
-from database.base import get_session
-from services.user_service import UserService
-from keyboards.reply import get_main_menu
+from DATABASE.base import get_session
+from SERVICES.database.user_service import UserService
+from KEYBOARDS.menus.main_menu import get_main_menu
 
 router = Router(name='start_command')
 
@@ -45,5 +45,5 @@ async def cmd_start(message: Message):
         
         await message.answer(
             welcome_text,
-            reply_markup=get_main_menu(is_admin=db_user.is_admin)
+            reply_markup=get_main_menu()
         )
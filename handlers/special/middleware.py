@@ -1,8 +1,11 @@
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, Optional
 from aiogram import BaseMiddleware
-from aiogram.types import Message, TelegramObject
+import time
+from aiogram.types import Message, CallbackQuery, TelegramObject, Update
 from loguru import logger
-from datetime import datetime
+from SERVICES.utils.rate_limiter import RateRules, action_of
+from SERVICES.utils.metrics import UpdateMetrics, update_metrics
+from ANALYTICS.event_log import EventRecorder, event_recorder, EVENT_CLICK, EVENT_COMMAND
 
 class LoggingMiddleware(BaseMiddleware):
     """Middleware для логирования всех сообщений"""
@@ -22,11 +25,13 @@ class LoggingMiddleware(BaseMiddleware):
         return await handler(event, data)
 
 class ThrottlingMiddleware(BaseMiddleware):
-    """Middleware для защиты от флуда"""
+    """Middleware для защиты от флуда (сообщения и callback-кнопки)"""
     
-    def __init__(self, rate_limit: float = 0.5):
-        self.rate_limit = rate_limit
-        self.user_last_message: Dict[int, datetime] = {}
+    def __init__(self, limiter: Optional[RateRules] = None):
+        from CORE.storage import create_rate_limiter
+        
+        # memory - ведра в процессе, redis/local - общие для всех воркеров
+        self.limiter = limiter or create_rate_limiter()
     
     async def __call__(
         self,
@@ -36,17 +41,17 @@ class ThrottlingMiddleware(BaseMiddleware):
     ) -> Any:
         if isinstance(event, Message):
             user_id = event.from_user.id
-            now = datetime.now()
-            
-            if user_id in self.user_last_message:
-                time_passed = (now - self.user_last_message[user_id]).total_seconds()
-                
-                if time_passed < self.rate_limit:
-                    logger.warning(f"⚠️ Throttling user {user_id}")
-                    await event.answer("⏰ Не так быстро! Подождите немного.")
-                    return
-            
-            self.user_last_message[user_id] = now
+            if await self.limiter.throttle(user_id, action_of(event.text)):
+                logger.warning(f"⚠️ Throttling user {user_id}")
+                await event.answer("⏰ Не так быстро! Подождите немного.")
+                return
+        
+        elif isinstance(event, CallbackQuery):
+            user_id = event.from_user.id
+            if await self.limiter.throttle(user_id, event.data or 'callback'):
+                logger.warning(f"⚠️ Throttling callback from user {user_id}")
+                await event.answer("⏰ Не так быстро! Подождите немного.")
+                return
         
         return await handler(event, data)
 
@@ -62,20 +67,76 @@ class UserTrackingMiddleware(BaseMiddleware):
         if isinstance(event, Message):
             from DATABASE.base import get_session
             from SERVICES.database.user_service import UserService
+            from SERVICES.utils.activity_tracker import activity_tracker
+            
+            user = event.from_user
+            profile = (user.username, user.first_name, user.last_name, user.language_code)
+            
+            # В БД идем только за новыми пользователями и при смене профиля
+            if not activity_tracker.is_current(user.id, profile):
+                async for session in get_session():
+                    await UserService.get_or_create_user(
+                        session=session,
+                        user_id=user.id,
+                        username=user.username,
+                        first_name=user.first_name,
+                        last_name=user.last_name,
+                        language_code=user.language_code
+                    )
+                activity_tracker.remember(user.id, profile)
             
-            async for session in get_session():
-                user = await UserService.get_or_create_user(
-                    session=session,
-                    user_id=event.from_user.id,
-                    username=event.from_user.username,
-                    first_name=event.from_user.first_name,
-                    last_name=event.from_user.last_name,
-                    language_code=event.from_user.language_code
-                )
-                
-                # Обновляем активность
-                user.last_activity = datetime.utcnow()
-                user.message_count += 1
-                await session.commit()
+            # Активность копится в памяти и пишется пакетом
+            activity_tracker.touch(user.id)
+        
+        return await handler(event, data)
+
+class MetricsMiddleware(BaseMiddleware):
+    """Внешний middleware обновлений: запросы, время БД/API и общая задержка по действию"""
+    
+    def __init__(self, metrics: Optional[UpdateMetrics] = None):
+        self.metrics = metrics or update_metrics
+    
+    @staticmethod
+    def action(update: Update) -> str:
+        """Метка действия: команда, префикс callback_data или тип обновления"""
+        if update.message is not None:
+            return action_of(update.message.text)
+        if update.callback_query is not None:
+            data = update.callback_query.data or ''
+            return data.split(':', 1)[0] + ':' if ':' in data else data or 'callback'
+        return update.event_type
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        stats, token = self.metrics.begin()
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.metrics.end(self.action(event), stats, token, time.perf_counter() - started)
+
+class EventLogMiddleware(BaseMiddleware):
+    """Внешний middleware обновлений: команды и нажатия кнопок в журнал событий"""
+    
+    def __init__(self, recorder: Optional[EventRecorder] = None):
+        self.recorder = recorder or event_recorder
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        message = event.message
+        if message is not None and message.text and message.text.startswith('/') and message.from_user:
+            self.recorder.record(EVENT_COMMAND, message.from_user.id, action=action_of(message.text))
+        elif event.callback_query is not None:
+            self.recorder.record(
+                EVENT_CLICK, event.callback_query.from_user.id, action=MetricsMiddleware.action(event)
+            )
         
         return await handler(event, data)
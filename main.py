@@ -6,10 +6,25 @@ import asyncio
 import logging
 from loguru import logger
 
-from core.bot import bot
-from core.dispatcher import setup_dispatcher
-from database.base import init_db
-from services.scheduler import setup_scheduler, shutdown_scheduler
+from CORE.bot import bot
+from CORE.dispatcher import setup_dispatcher
+from DATABASE.base import init_db, engine
+from SERVICES.utils.scheduler import setup_scheduler, shutdown_scheduler
+from SERVICES.utils.counters import counter_buffer
+from SERVICES.utils.activity_tracker import activity_tracker
+from SERVICES.database.seen_posts import seen_posts
+from SERVICES.database.vote_pipeline import vote_pipeline
+from CORE.storage import close_state_backend
+from SERVICES.utils.metrics import start_metrics_server, instrument_engine
+from CORE.config import settings
+from CORE.webhook import run_webhook
+from SERVICES.notification.send_queue import outbound_queue
+from SERVICES.notification.broadcast import broadcast_engine
+from SERVICES.database.subscriptions import category_fanout
+from ANALYTICS.daily_rollups import daily_rollups
+from ANALYTICS.event_log import event_recorder
+from SERVICES.database.partitions import partition_manager
+from DATABASE.base import get_session
 
 
 # Настройка логирования
@@ -21,15 +36,32 @@ async def on_startup():
     """Действия при запуске бота"""
     logger.info("🚀 Запуск TrixBot...")
     
+    # Подсчет запросов и времени БД по обновлениям
+    instrument_engine(engine)
+    
     # Инициализация базы данных
     success = await init_db()
     if not success:
         logger.error("❌ Не удалось инициализировать базу данных")
         return False
     
+    # Секции на ближайшие периоды до приема обновлений
+    await partition_manager.maintain()
+    
+    # Дневная статистика: первичное заполнение до приема обновлений
+    async for session in get_session():
+        await daily_rollups.ensure_backfilled(session)
+    
     # Настройка планировщика задач
     setup_scheduler()
     
+    # Очередь исходящих сообщений
+    outbound_queue.start(bot)
+    category_fanout.start()
+    
+    # Продолжение прерванных рассылок
+    await broadcast_engine.resume(bot)
+    
     # Получение информации о боте
     bot_info = await bot.get_me()
     logger.success(f"✅ Бот запущен: @{bot_info.username} (ID: {bot_info.id})")
@@ -44,6 +76,26 @@ async def on_shutdown():
     # Остановка планировщика
     shutdown_scheduler()
     
+    # Финальная запись буферизованных счетчиков и активности
+    await counter_buffer.flush()
+    await activity_tracker.flush()
+    await seen_posts.flush()
+    await vote_pipeline.flush()
+    await daily_rollups.flush()
+    await event_recorder.flush()
+    
+    # Остановка рассылок (прогресс сохранен, продолжатся при запуске)
+    await broadcast_engine.stop()
+    
+    # Остановка рассылки подписчикам
+    await category_fanout.stop()
+    
+    # Досылка исходящих сообщений (остаток уходит в спул)
+    await outbound_queue.stop()
+    
+    # Закрытие бэкенда общего состояния
+    await close_state_backend()
+    
     # Закрытие сессии бота
     await bot.session.close()
     
@@ -62,9 +114,19 @@ async def main():
         # Настройка диспетчера
         dp = setup_dispatcher()
         
-        # Запуск поллинга
-        logger.info("📡 Запуск polling...")
-        await dp.start_polling(bot)
+        if settings.RUN_MODE == "webhook":
+            # Запуск webhook-сервера
+            logger.info("🌐 Запуск webhook...")
+            await run_webhook(dp, bot)
+        else:
+            # Метрики на отдельном порту (в режиме webhook - на том же сервере)
+            if settings.METRICS_PORT:
+                await start_metrics_server(settings.WEBAPP_HOST, settings.METRICS_PORT)
+            
+            # Запуск поллинга
+            logger.info("📡 Запуск polling...")
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
         
     except Exception as e:
         logger.exception(f"❌ Критическая ошибка: {e}")
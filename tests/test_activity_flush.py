@@ -0,0 +1,68 @@
+"""
+Пакетная запись активности пользователей в SQLite
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault('BOT_TOKEN', '123:abc')
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite://')
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from DATABASE.base import Base
+from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+from DATABASE.users import User
+from SERVICES.utils import activity_tracker as tracker_module
+from SERVICES.utils.activity_tracker import ActivityTracker
+
+LONG_AGO = datetime(2025, 1, 1)
+FUTURE = datetime(2100, 1, 1)
+
+
+async def flush_twice(url: str, monkeypatch):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_session():
+        async with sessions() as session:
+            yield session
+
+    monkeypatch.setattr(tracker_module, 'get_session', get_session)
+
+    try:
+        async with sessions() as session:
+            session.add_all([
+                User(id=1, uid=1, last_activity=LONG_AGO, message_count=3),
+                User(id=2, uid=2, last_activity=FUTURE, message_count=0),
+            ])
+            await session.commit()
+
+        tracker = ActivityTracker()
+        for user_id in (1, 1, 2):
+            tracker.touch(user_id)
+        assert await tracker.flush() == 2
+        assert tracker.depth == 0
+
+        tracker.touch(1)
+        assert await tracker.flush() == 1
+
+        async with sessions() as session:
+            rows = {
+                user.id: user
+                for user in (await session.execute(select(User))).scalars()
+            }
+        assert rows[1].message_count == 6
+        assert rows[1].last_activity > LONG_AGO + timedelta(days=365)
+        # Более поздняя отметка в БД не затирается
+        assert rows[2].message_count == 1
+        assert rows[2].last_activity == FUTURE
+    finally:
+        await engine.dispose()
+
+
+def test_flush_writes_activity_on_sqlite(tmp_path, monkeypatch):
+    asyncio.run(flush_twice(f"sqlite+aiosqlite:///{tmp_path / 'activity.db'}", monkeypatch))
@@ -0,0 +1,78 @@
+"""
+Keyset-пагинация каталога: возврат к первой странице после появления новых карточек
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+os.environ.setdefault('BOT_TOKEN', '123:abc')
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite://')
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from DATABASE.base import Base
+from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+from DATABASE.catalog import CatalogPost
+from SERVICES.database.catalog_service import CatalogService
+from SERVICES.utils.cursor import (
+    BACKWARD, CatalogCursor, decode_cursor, encode_cursor
+)
+
+START = datetime(2025, 1, 1)
+
+
+def add_posts(session, numbers):
+    for number in numbers:
+        session.add(CatalogPost(
+            catalog_number=number,
+            user_id=1,
+            category='Услуги',
+            name=f'Карточка {number}',
+            created_at=START + timedelta(minutes=number),
+            is_active=True
+        ))
+
+
+async def walk_back_to_first_page(url: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    try:
+        async with sessions() as session:
+            add_posts(session, range(1, 13))
+            await session.commit()
+
+            first, page, next_cursor, _ = await CatalogService.list_catalog_page(session, limit=5)
+            assert page == 0 and next_cursor
+            _, page, _, prev_cursor = await CatalogService.list_catalog_page(session, cursor=next_cursor, limit=5)
+            assert page == 1 and prev_cursor
+
+            # Пока пользователь листал, появились более новые карточки
+            add_posts(session, range(13, 16))
+            await session.commit()
+
+            back, page, _, before_first = await CatalogService.list_catalog_page(session, cursor=prev_cursor, limit=5)
+            assert page == 0
+            assert [p.id for p in back] == [p.id for p in first]
+            assert before_first is not None
+
+            position = decode_cursor(before_first)
+            assert position.direction == BACKWARD and position.page == 0
+
+            newer, page, _, _ = await CatalogService.list_catalog_page(session, cursor=before_first, limit=5)
+            assert page == 0
+            assert sorted(p.catalog_number for p in newer) == [13, 14, 15]
+    finally:
+        await engine.dispose()
+
+
+def test_back_to_first_page_round_trip(tmp_path):
+    asyncio.run(walk_back_to_first_page(f"sqlite+aiosqlite:///{tmp_path / 'catalog.db'}"))
+
+
+def test_encode_rejects_unpackable_cursor():
+    with pytest.raises(ValueError):
+        encode_cursor(CatalogCursor(BACKWARD, -1, None, START, 1))
@@ -0,0 +1,74 @@
+"""
+Таблицы лидеров: изменения постов после коммита и экранирование HTML
+"""
+import asyncio
+import os
+
+os.environ.setdefault('BOT_TOKEN', '123:abc')
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite://')
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from DATABASE.base import Base
+from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+from DATABASE.games import RatingPost
+from SERVICES.database.leaderboard import BOARD_ALL, BOARD_GIRLS, LeaderboardEntry, Leaderboards, leaderboards
+
+
+def test_render_escapes_user_text():
+    boards = Leaderboards()
+    boards.loaded = True
+    boards.upsert_post(LeaderboardEntry(1, '<b>Ann</b>', 'cats & <i>dogs</i>', 'girl', 5, 1))
+
+    text = boards.render(BOARD_ALL)
+    assert '&lt;b&gt;Ann&lt;/b&gt;' in text
+    assert 'cats &amp; &lt;i&gt;dogs&lt;/i&gt;' in text
+    assert '&lt;b&gt;Ann&lt;/b&gt;' in boards.render(BOARD_GIRLS)
+
+
+def test_upsert_bumps_each_board_once():
+    boards = Leaderboards()
+    boards.upsert_post(LeaderboardEntry(1, 'Ann', 'hi', 'girl', 5, 1))
+    before = dict(boards.versions)
+
+    boards.upsert_post(LeaderboardEntry(1, 'Anna', 'hi', 'girl', 0, 0))
+    assert boards.versions[BOARD_ALL] == before[BOARD_ALL] + 1
+    assert boards.versions[BOARD_GIRLS] == before[BOARD_GIRLS] + 1
+    # Счет в памяти не перезаписывается карточкой
+    assert boards.entries[1].score == 5
+
+
+async def approve_then_rollback_and_commit(url: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    try:
+        async with sessions() as session:
+            post = RatingPost(
+                catalog_number=201, author_user_id=1, name='Rolled', about='back',
+                gender='girl', status='approved'
+            )
+            session.add(post)
+            await session.flush()
+            assert post.id not in leaderboards.entries
+            await session.rollback()
+        assert leaderboards.entries == {}
+
+        async with sessions() as session:
+            post = RatingPost(
+                catalog_number=202, author_user_id=1, name='Kept', about='here',
+                gender='girl', status='approved'
+            )
+            session.add(post)
+            await session.commit()
+        assert leaderboards.entries[post.id].name == 'Kept'
+    finally:
+        await engine.dispose()
+
+
+def test_board_follows_commits_not_flushes(tmp_path, monkeypatch):
+    monkeypatch.setattr(leaderboards, 'entries', {})
+    monkeypatch.setattr(leaderboards, 'loaded', True)
+    asyncio.run(approve_then_rollback_and_commit(f"sqlite+aiosqlite:///{tmp_path / 'board.db'}"))
@@ -0,0 +1,39 @@
+"""
+Ограничитель частоты в общем бэкенде: один бюджет на все воркеры
+"""
+import asyncio
+import os
+
+os.environ.setdefault('BOT_TOKEN', '123:abc')
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite://')
+
+from CORE.storage import LocalRedis
+from SERVICES.utils.rate_limiter import RateRule, SharedTokenBucketLimiter
+
+RULES = {'/search': RateRule(rate=1.0, burst=3)}
+
+
+async def hits(limiters, count):
+    return [await limiters[i % len(limiters)].throttle(7, '/search') for i in range(count)]
+
+
+def test_workers_share_one_budget():
+    client = LocalRedis()
+    workers = [SharedTokenBucketLimiter(client, RULES) for _ in range(3)]
+
+    waits = asyncio.run(hits(workers, 5))
+
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert all(wait > 0 for wait in waits[3:])
+    assert sum(worker.rejected_total for worker in workers) == 2
+
+
+def test_users_and_actions_have_separate_buckets():
+    client = LocalRedis()
+    limiter = SharedTokenBucketLimiter(client, RULES)
+
+    async def scenario():
+        await hits([limiter], 3)
+        return await limiter.throttle(8, '/search'), await limiter.throttle(7, '/catalog')
+
+    assert asyncio.run(scenario()) == (0.0, 0.0)
@@ -0,0 +1,52 @@
+"""
+Инвертированный индекс поиска меняется только после коммита
+"""
+import asyncio
+import os
+
+os.environ.setdefault('BOT_TOKEN', '123:abc')
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite://')
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from DATABASE.base import Base
+from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+from DATABASE.catalog import CatalogPost
+from SERVICES.database.search_service import InvertedIndex
+from SERVICES.database import search_service
+
+
+async def save_post_then_rollback_and_commit(url: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    index = search_service.search_index
+
+    try:
+        async with sessions() as session:
+            session.add(CatalogPost(catalog_number=301, user_id=1, category='Маникюр', name='Ногти'))
+            await session.flush()
+            assert index.search('ногти') == []
+            await session.rollback()
+        assert index.search('ногти') == []
+
+        async with sessions() as session:
+            post = CatalogPost(catalog_number=302, user_id=1, category='Маникюр', name='Ногти')
+            session.add(post)
+            await session.commit()
+        assert index.search('ногти') == [post.id]
+
+        async with sessions() as session:
+            await session.delete(await session.get(CatalogPost, post.id))
+            await session.commit()
+        assert index.search('ногти') == []
+    finally:
+        await engine.dispose()
+
+
+def test_index_follows_commits_not_flushes(tmp_path, monkeypatch):
+    index = InvertedIndex()
+    index.loaded = True
+    monkeypatch.setattr(search_service, 'search_index', index)
+    asyncio.run(save_post_then_rollback_and_commit(f"sqlite+aiosqlite:///{tmp_path / 'search.db'}"))
@@ -0,0 +1,123 @@
+"""
+Выборка слотов каталога при почти полностью просмотренном пуле
+и снятие освобожденного номера с карт просмотренного
+"""
+import asyncio
+import os
+
+os.environ.setdefault('BOT_TOKEN', '123:abc')
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite://')
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from DATABASE.base import Base
+from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+from DATABASE.catalog import CatalogPost, UserSession
+from SERVICES.database.seen_posts import SeenPostsStore
+from SERVICES.database.slot_pool import IdPool, POOL_REGULAR, sample_union, slot_pools
+from SERVICES.utils.seen_set import SeenSet
+
+
+def test_sample_finds_last_unseen_in_large_pool():
+    pool = IdPool(range(1, 10001))
+    unseen = {4242, 9001}
+    for _ in range(20):
+        picked = sample_union([pool], 3, skip=lambda post_id: post_id not in unseen)
+        assert sorted(picked) == sorted(unseen)
+
+
+def test_sample_small_pool_respects_skip_and_exclude():
+    pool = IdPool([1, 2, 3])
+    assert sample_union([pool], 5, exclude=[1], skip=lambda post_id: post_id == 2) == [3]
+
+
+def test_forget_clears_cached_and_stored_maps(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'seen.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        stored = SeenSet(9999)
+        stored.update([7, 8, 9, 13])
+        untouched = SeenSet(9999)
+        untouched.update([7, 9])
+        async with sessions() as session:
+            session.add_all([
+                UserSession(user_id=1, seen_bitmap=stored.to_bytes()),
+                UserSession(user_id=2, seen_bitmap=stored.to_bytes()),
+                UserSession(user_id=3, seen_bitmap=untouched.to_bytes()),
+            ])
+            await session.commit()
+
+        store = SeenPostsStore(high=9999)
+        async with sessions() as session:
+            cached = await store.get(session, 1)
+            store.forget([8])
+            assert 8 not in cached and 7 in cached
+            # Карта, загруженная после освобождения номера, тоже без него
+            assert 8 not in await store.get(session, 2)
+
+            # 9000 - за пределами всех карт
+            await store._clear_bits(session, [8, 13, 9000])
+            await session.commit()
+            blobs = dict((await session.execute(
+                select(UserSession.user_id, UserSession.seen_bitmap)
+            )).all())
+        await engine.dispose()
+
+        for blob in blobs.values():
+            assert list(SeenSet(9999, blob)) == [7, 9]
+
+    asyncio.run(run())
+
+
+def test_eviction_skips_unflushed_maps():
+    store = SeenPostsStore(high=9999, max_cached_users=2)
+    store._remember(1, SeenSet(9999))
+    store.mark(1, [5])
+    store._remember(2, SeenSet(9999))
+    store._remember(3, SeenSet(9999))
+    # Грязная карта 1 пережила вытеснение, ушла чистая 2
+    assert store.peek(1) is not None and 5 in store.peek(1)
+    assert store.peek(2) is None
+    assert store.peek(3) is not None
+
+    store.mark(3, [6])
+    store._remember(4, SeenSet(9999))
+    # Все кроме новой карты грязные - кэш временно больше лимита
+    assert [user_id for user_id in (1, 3, 4) if store.peek(user_id) is not None] == [1, 3, 4]
+
+
+async def save_post_then_rollback_and_commit(url: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    try:
+        async with sessions() as session:
+            post = CatalogPost(catalog_number=101, user_id=1, category='Test', name='Rolled back')
+            session.add(post)
+            await session.flush()
+            # Flush еще не коммит - пул не меняется
+            assert post.id not in slot_pools.pools[POOL_REGULAR]
+            await session.rollback()
+        assert len(slot_pools.pools[POOL_REGULAR]) == 0
+
+        async with sessions() as session:
+            post = CatalogPost(catalog_number=102, user_id=1, category='Test', name='Committed')
+            session.add(post)
+            await session.commit()
+        assert post.id in slot_pools.pools[POOL_REGULAR]
+        assert slot_pools.numbers[post.id] == 102
+    finally:
+        await engine.dispose()
+
+
+def test_pools_follow_commits_not_flushes(tmp_path, monkeypatch):
+    monkeypatch.setattr(slot_pools, 'pools', {name: IdPool() for name in slot_pools.pools})
+    monkeypatch.setattr(slot_pools, 'numbers', {})
+    monkeypatch.setattr(slot_pools, 'loaded', True)
+    asyncio.run(save_post_then_rollback_and_commit(f"sqlite+aiosqlite:///{tmp_path / 'pools.db'}"))
@@ -0,0 +1,58 @@
+"""
+Индекс подписок: изменения после коммита, только подписки на категории
+"""
+import asyncio
+import os
+
+os.environ.setdefault('BOT_TOKEN', '123:abc')
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite://')
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from DATABASE.base import Base
+from DATABASE import users, catalog, games, posts, analytics, broadcasts  # noqa: F401
+from DATABASE.catalog import Subscription
+from SERVICES.database import subscriptions
+from SERVICES.database.subscriptions import SUBSCRIPTION_CATEGORY, SubscriptionIndex
+
+
+def category_subscription(user_id: int) -> Subscription:
+    return Subscription(user_id=user_id, subscription_type=SUBSCRIPTION_CATEGORY, subscription_value='Маникюр')
+
+
+async def subscribe_then_rollback_and_commit(url: str):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    index = subscriptions.subscription_index
+
+    try:
+        async with sessions() as session:
+            session.add(category_subscription(1))
+            await session.flush()
+            assert index.followers('Маникюр') == set()
+            await session.rollback()
+        assert index.followers('Маникюр') == set()
+
+        async with sessions() as session:
+            session.add(category_subscription(1))
+            # Подписка другого типа с тем же значением не трогает индекс категорий
+            other = Subscription(user_id=2, subscription_type='tag', subscription_value='Маникюр')
+            session.add(other)
+            await session.commit()
+        assert index.followers('Маникюр') == {1}
+
+        async with sessions() as session:
+            await session.delete(await session.get(Subscription, other.id))
+            await session.commit()
+        assert index.followers('Маникюр') == {1}
+    finally:
+        await engine.dispose()
+
+
+def test_index_follows_commits_and_category_type(tmp_path, monkeypatch):
+    index = SubscriptionIndex()
+    index.loaded = True
+    monkeypatch.setattr(subscriptions, 'subscription_index', index)
+    asyncio.run(subscribe_then_rollback_and_commit(f"sqlite+aiosqlite:///{tmp_path / 'subscriptions.db'}"))